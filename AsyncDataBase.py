@@ -0,0 +1,181 @@
+"""Модуль асинхронного (asyncio) доступа к БД"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable
+
+from .DataBase import DataBase
+
+# Методы, только читающие БД: выполняются параллельно в потоках чтения.
+# Остальные (в том числе новые методы DataBase) - по очереди в потоке записи
+READ_METHODS = frozenset((
+    "getTimeLastUpdate", "getColumns", "getColumnsNames", "getRowByValue",
+    "getIDbyValue", "getRowsbyColumn", "getIdsFromView", "getValueByValues",
+    "getRowByValues", "getValueByValue", "getValueById", "getRowsbyValues",
+    "getIDsByValues", "getValuesByIds", "getRowsByIds", "getColumnsArrays",
+    "requestArrays", "getDescendants", "getAncestors", "getSubtree",
+    "search", "changesSince", "archiveView", "indexAdvice", "cacheInfo",
+    "queryCacheInfo",
+))
+# Методы-генераторы: оборачиваются в асинхронные итераторы
+ITER_METHODS = frozenset(("iterRequest", "iterRows"))
+# Порций результата в очереди асинхронного итератора
+ITER_QUEUE_SIZE = 4
+
+_ITEM, _ERROR, _DONE = range(3)
+
+
+class AsyncDataBase:
+    """
+    Асинхронная обертка над DataBase для asyncio
+
+    Публичные методы DataBase доступны как сопрограммы:
+
+    >>> adb = AsyncDataBase(DB())
+    >>> row = await adb.getRowByValue("name", "links")
+    >>> async for rows in adb.iterRequest("SELECT * FROM links"):
+    ...     ...
+
+    Чтение (методы READ_METHODS) выполняется в пуле потоков размером с
+    пул соединений БД (каждый поток держит собственное соединение для
+    чтения, чтения идут параллельно), остальные методы - в единственном
+    потоке записи, т.е. строго по очереди и без блокировки потоков
+    чтения. Свойства DataBase (например tables) возвращаются как
+    awaitable.
+    """
+
+    def __init__(self, db: DataBase = None, max_workers: int = None):
+        """
+        Parameters
+        ----------
+        db : DataBase, optional
+            Экземпляр БД (по умолчанию DB()).
+        max_workers : int, optional
+            Число потоков чтения (по умолчанию - размер пула соединений).
+        """
+        if db is None:
+            from . import DB
+            db = DB()
+        self.db = db
+        if max_workers is None:
+            max_workers = db._pool.size
+        self._readers = ThreadPoolExecutor(max_workers,
+                                           thread_name_prefix="DataBaseRead")
+        self._writer = ThreadPoolExecutor(1, thread_name_prefix="DataBaseWrite")
+
+    async def _run(self, executor: ThreadPoolExecutor,
+                   func: Callable, *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor, functools.partial(func, *args, **kwargs))
+
+    async def read(self, func: Callable, *args, **kwargs) -> Any:
+        """Выполнение func(*args, **kwargs) в потоке чтения"""
+        return await self._run(self._readers, func, *args, **kwargs)
+
+    async def write(self, func: Callable, *args, **kwargs) -> Any:
+        """Выполнение func(*args, **kwargs) в потоке записи"""
+        return await self._run(self._writer, func, *args, **kwargs)
+
+    async def makeRequest(self, txt: str, *args) -> list:
+        """Запрос на чтение - в потоке чтения, остальные - в потоке записи"""
+        if self.db._isReadRequest(txt):
+            return await self.read(self.db.makeRequest, txt, *args)
+        return await self.write(self.db.makeRequest, txt, *args)
+
+    async def transaction(self, func: Callable[..., Any],
+                          *args, **kwargs) -> Any:
+        """
+        Выполнение func(db, *args, **kwargs) в одной транзакции
+
+        Транзакция привязана к потоку, поэтому вся функция выполняется
+        синхронно в потоке записи; при исключении транзакция откатывается.
+        """
+        def run():
+            with self.db.transaction():
+                return func(self.db, *args, **kwargs)
+        return await self.write(run)
+
+    async def iterate(self, method: Callable[..., Any],
+                      *args, **kwargs) -> AsyncIterator[Any]:
+        """
+        Асинхронный итератор по синхронному генератору method(*args, **kwargs)
+
+        Генератор целиком выполняется в одном потоке чтения (соединение
+        привязано к потоку), порции передаются через очередь ограниченного
+        размера, поэтому чтение не опережает потребителя.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(ITER_QUEUE_SIZE)
+        stop = threading.Event()
+
+        def put(kind: int, value: Any = None) -> None:
+            asyncio.run_coroutine_threadsafe(
+                queue.put((kind, value)), loop).result()
+
+        def produce() -> None:
+            items = method(*args, **kwargs)
+            try:
+                for item in items:
+                    if stop.is_set():
+                        break
+                    put(_ITEM, item)
+            except Exception as e:
+                put(_ERROR, e)
+            finally:
+                items.close()
+                put(_DONE)
+
+        future = loop.run_in_executor(self._readers, produce)
+        done = False
+        try:
+            while True:
+                kind, value = await queue.get()
+                if kind == _ITEM:
+                    yield value
+                elif kind == _ERROR:
+                    raise value
+                else:
+                    done = True
+                    break
+        finally:
+            stop.set()
+            # освобождаем поток чтения, ожидающий места в очереди
+            while not done:
+                done = (await queue.get())[0] == _DONE
+            await future
+
+    async def close(self) -> None:
+        """Завершение потоков и закрытие соединений БД"""
+        await asyncio.get_running_loop().run_in_executor(None, self._shutdown)
+
+    def _shutdown(self) -> None:
+        self._readers.shutdown(wait=True)
+        self._writer.shutdown(wait=True)
+        self.db.close()
+
+    async def __aenter__(self) -> "AsyncDataBase":
+        return self
+
+    async def __aexit__(self, type_, value, traceback) -> None:
+        await self.close()
+
+    def __getattr__(self, name: str) -> Any:
+        """Асинхронная версия публичного метода или свойства DataBase"""
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if isinstance(getattr(type(self.db), name, None), property):
+            return self.read(getattr, self.db, name)
+        attribute = getattr(self.db, name)
+        if not callable(attribute):
+            return attribute
+        if name in ITER_METHODS:
+            method = functools.partial(self.iterate, attribute)
+        elif name in READ_METHODS:
+            method = functools.partial(self.read, attribute)
+        else:
+            method = functools.partial(self.write, attribute)
+        functools.update_wrapper(method, attribute)
+        setattr(self, name, method)
+        return method
@@ -0,0 +1,141 @@
+"""Модуль горячего резервного копирования БД"""
+import gzip
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+from typing import Any, Callable, List
+
+BACKUP_PAGES = 1024
+BACKUP_SLEEP = 0.005
+TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+
+
+def archiveName(filename: str, moment: datetime = None) -> str:
+    """Имя архива вида `<имя>_<ГГГГММДД_ЧЧММСС><расширение>`"""
+    stem, ext = os.path.splitext(os.path.basename(filename))
+    moment = moment or datetime.now()
+    return f"{stem}_{moment.strftime(TIMESTAMP_FORMAT)}{ext}"
+
+
+def backup(source: str,
+           target: str,
+           pages: int = BACKUP_PAGES,
+           sleep: float = BACKUP_SLEEP,
+           compress: bool = False,
+           progress: Callable[[int, int, int], Any] = None) -> str:
+    """
+    Горячая копия БД через sqlite3 backup API
+
+    Копирование идет порциями по pages страниц с паузой sleep между ними
+    внутри одной транзакции чтения: в режиме WAL писатели не блокируются,
+    а их изменения не перезапускают копирование.
+
+    Parameters
+    ----------
+    source : str
+        Путь к исходной БД.
+    target : str
+        Путь к файлу копии.
+    pages : int, optional
+        Число страниц за один шаг.
+    sleep : float, optional
+        Пауза между шагами в секундах.
+    compress : bool, optional
+        Сжать копию gzip (к имени добавляется ".gz").
+    progress : Callable, optional
+        Функция progress(status, remaining, total) после каждого шага.
+
+    Returns
+    -------
+    str
+        Путь к созданной копии.
+    """
+    temp = target + ".tmp"
+    src = sqlite3.connect(source)
+    try:
+        src.execute("BEGIN")
+        src.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()
+        dst = sqlite3.connect(temp)
+        try:
+            src.backup(dst, pages=pages, progress=progress, sleep=sleep)
+            # архив - самодостаточный файл без -wal/-shm
+            dst.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            dst.close()
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+    finally:
+        src.rollback()
+        src.close()
+    if compress:
+        target += ".gz"
+        with open(temp, "rb") as file_in, gzip.open(target, "wb") as file_out:
+            shutil.copyfileobj(file_in, file_out)
+        os.remove(temp)
+    else:
+        os.replace(temp, target)
+    return target
+
+
+def archives(folder: str, filename: str) -> List[str]:
+    """Архивы БД filename в папке folder, от старых к новым"""
+    stem, ext = os.path.splitext(os.path.basename(filename))
+    pattern = re.compile(re.escape(stem) + r"_\d{8}_\d{6}" +
+                         re.escape(ext) + r"(\.gz)?$")
+    if not os.path.isdir(folder):
+        return []
+    names = sorted(name for name in os.listdir(folder) if pattern.match(name))
+    return [os.path.join(folder, name) for name in names]
+
+
+def rotate(folder: str, filename: str, keep: int) -> List[str]:
+    """
+    Удаление старых архивов БД, остаются keep последних
+
+    Returns
+    -------
+    list
+        Пути удаленных архивов.
+    """
+    removed = archives(folder, filename)[:-keep] if keep > 0 else []
+    for path in removed:
+        os.remove(path)
+    return removed
+
+
+class BackupScheduler(threading.Thread):
+    """Фоновый поток периодического резервного копирования."""
+
+    def __init__(self, run: Callable[[], Any], interval: float):
+        """
+        Parameters
+        ----------
+        run : Callable
+            Функция резервного копирования.
+        interval : float
+            Период копирования в секундах.
+        """
+        super().__init__(name="DataBaseBackup", daemon=True)
+        self.interval = interval
+        self._run = run
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                self._run()
+            except Exception as e:
+                print(f"Ошибка резервного копирования БД: {e}",
+                      file=sys.stderr)
+
+    def stop(self) -> None:
+        """Остановка потока"""
+        self._stop_event.set()
+        if self is not threading.current_thread():
+            self.join()
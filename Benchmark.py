@@ -0,0 +1,320 @@
+"""
+Модуль замеров производительности API БД на синтетических данных
+
+Создает во временной папке БД со схемой как у рабочей (tags, items,
+links) заданного размера, замеряет основные методы DataBase (в том
+числе insertMany против цикла insertObject и typed=True против
+dict(zip())) и импорт пакета, результаты выводит в JSON для сравнения
+между коммитами.
+
+Запуск (из папки, содержащей пакет):
+
+    python -m database.Benchmark --rows 10000 100000 --output new.json
+    python -m database.Benchmark --rows 10000 --compare old.json
+"""
+import argparse
+import configparser
+import contextlib
+import itertools
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+from .ConfigManager import ConfigManager
+from .DataBase import DataBase
+
+ROWS = (10_000,)
+REPEAT = 5
+NUMBER = 1000
+TAGS = 100
+BATCH = 50_000
+INSERT_BATCH = 100
+SEED = 1
+
+SCHEMA = """\
+CREATE TABLE IF NOT EXISTS tags (id INTEGER PRIMARY KEY, name TEXT UNIQUE);
+CREATE TABLE IF NOT EXISTS items (id INTEGER PRIMARY KEY, name TEXT, tag INTEGER, value REAL);
+CREATE TABLE IF NOT EXISTS links (id INTEGER PRIMARY KEY, id_child INTEGER, name TEXT, date_update DATETIME DEFAULT CURRENT_TIMESTAMP);
+CREATE INDEX IF NOT EXISTS idx_items_tag ON items (tag);
+CREATE INDEX IF NOT EXISTS idx_links_id_child ON links (id_child);
+CREATE INDEX IF NOT EXISTS idx_links_date_update ON links (date_update);
+"""
+
+Tag = namedtuple("Tag", "id name")
+
+
+def prepareFolder(folder: str) -> ConfigManager:
+    """
+    Конфигурация и скрипт создания БД во временной папке folder
+
+    ConfigManager - одиночка, поэтому вызывается до первого его
+    создания в процессе (при запуске через `python -m` так и есть).
+    """
+    configs = os.path.join(folder, "configs")
+    scripts = os.path.join(folder, "sql_request")
+    archives = os.path.join(folder, "archives")
+    for path in (configs, scripts, archives):
+        os.makedirs(path, exist_ok=True)
+    with open(os.path.join(scripts, "database_creator.sql"), "w",
+              encoding="utf-8") as file:
+        file.write(SCHEMA)
+    parser = configparser.ConfigParser()
+    for key in ("DB", "DB_TEST"):
+        parser[key] = {"dbFolder": folder, "archiveFolder": archives,
+                       "dbName": "benchmark.db3", "persistent": False,
+                       "poolSize": 4, "cachedStatements": 128}
+        parser[key + "_PERF"] = {"preset": "safe"}
+    with open(os.path.join(configs, "config.ini"), "w") as file:
+        parser.write(file)
+    config = ConfigManager(configs, folder)
+    if config.folder != configs:
+        raise RuntimeError("ConfigManager уже создан в этом процессе")
+    return config
+
+
+def fillDataBase(db: DataBase, rows: int, rng: random.Random) -> None:
+    """Заполнение tags, items и links (rows строк в items и links)"""
+    start = datetime(2020, 1, 1)
+    with db.writer() as cursor:
+        cursor.executemany("INSERT INTO tags (id, name) VALUES (?, ?)",
+                           ((i, f"tag{i}") for i in range(1, TAGS + 1)))
+        for first in range(1, rows + 1, BATCH):
+            ids = range(first, min(first + BATCH, rows + 1))
+            cursor.executemany(
+                "INSERT INTO items (id, name, tag, value) "
+                "VALUES (?, ?, ?, ?)",
+                ((i, f"item{i}", rng.randint(1, TAGS), rng.random())
+                 for i in ids))
+            cursor.executemany(
+                "INSERT INTO links (id, id_child, name, date_update) "
+                "VALUES (?, ?, ?, ?)",
+                ((i, rng.randint(1, rows), f"link{i}",
+                  str(start + timedelta(seconds=i))) for i in ids))
+    db.makeRequest("ANALYZE")
+
+
+def _stats(times: List[float], number: int) -> Dict[str, float]:
+    """Сводка серий замеров (время одного вызова в микросекундах)"""
+    return {"number": number, "repeat": len(times),
+            "min_us": round(min(times), 3),
+            "median_us": round(statistics.median(times), 3),
+            "mean_us": round(statistics.mean(times), 3),
+            "ops_per_sec": round(1e6 / min(times), 1)}
+
+
+def measure(func: Callable[[], Any], number: int,
+            repeat: int = REPEAT) -> Dict[str, float]:
+    """
+    Замер func: repeat серий по number вызовов
+
+    Returns
+    -------
+    dict
+        Время одного вызова в микросекундах (min/median/mean по сериям)
+        и число вызовов в секунду по лучшей серии.
+    """
+    func()
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - started) / number * 1e6)
+    return _stats(times, number)
+
+
+def measureImport(repeat: int = REPEAT) -> Dict[str, float]:
+    """Время импорта пакета в новом интерпретаторе"""
+    package = __package__ or "database"
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, (root, env.get("PYTHONPATH"))))
+    code = "import time; t = time.perf_counter(); " \
+        f"import {package}; print(time.perf_counter() - t)"
+    times = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", code], env=env,
+                                check=True, capture_output=True, text=True)
+        times.append(float(output.stdout.split()[-1]) * 1e6)
+    return _stats(times, 1)
+
+
+def runSize(db: DataBase, rows: int, number: int,
+            rng: random.Random) -> Dict[str, Dict[str, float]]:
+    """Замеры методов DataBase на БД из rows строк"""
+    ids = [rng.randint(1, rows) for _ in range(number)]
+    keys = itertools.cycle(ids)
+    links = [{"id": i} for i in ids]
+    tags = [Tag(i, f"tag{i}") for i in range(1, TAGS + 1, 2)]
+    names = itertools.count()
+    results = {}
+    results["getValueById"] = measure(
+        lambda: db.getValueById(next(keys), "links"), number)
+    results["getRowsbyValues"] = measure(
+        lambda: db.getRowsbyValues("links", id=next(keys)), number)
+    results["getRowsbyValues_scan"] = measure(
+        lambda: db.getRowsbyValues("links", name=f"link{next(keys)}"),
+        max(1, number // 100))
+    results["getIdsFromView"] = measure(
+        lambda: db.getIdsFromView("items", links, tags),
+        max(1, number // 100))
+    results["getTimeLastUpdate"] = measure(db.getTimeLastUpdate, number)
+    # строки как dict(zip()) и с декодированием типов (date_update)
+    results[f"getRowsByIds_x{number}"] = measure(
+        lambda: db.getRowsByIds(ids, "links"), max(1, number // 100))
+    results[f"getRowsByIds_typed_x{number}"] = measure(
+        lambda: db.getRowsByIds(ids, "links", typed=True),
+        max(1, number // 100))
+    results["insertObject"] = measure(
+        lambda: db.insertObject("links", True, id_child=1,
+                                name=f"new{next(names)}"),
+        max(1, number // 10))
+
+    def insertBatch():
+        with db.transaction():
+            for _ in range(INSERT_BATCH):
+                db.insertObject("links", True, id_child=1,
+                                name=f"new{next(names)}")
+    results[f"insertObject_transaction_x{INSERT_BATCH}"] = measure(
+        insertBatch, max(1, number // 100))
+
+    def insertLoop():
+        for _ in range(INSERT_BATCH):
+            db.insertObject("links", True, id_child=1,
+                            name=f"new{next(names)}")
+    results[f"insertObject_loop_x{INSERT_BATCH}"] = measure(
+        insertLoop, max(1, number // 1000))
+    results[f"insertMany_x{INSERT_BATCH}"] = measure(
+        lambda: db.insertMany("links", [
+            {"id_child": 1, "name": f"new{next(names)}"}
+            for _ in range(INSERT_BATCH)]),
+        max(1, number // 100))
+    return results
+
+
+def gitCommit() -> str:
+    """Текущий коммит репозитория пакета (None, если не git)"""
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], check=True, text=True,
+            capture_output=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip()
+
+
+def run(sizes=ROWS, number: int = NUMBER, folder: str = None,
+        seed: int = SEED) -> Dict[str, Any]:
+    """
+    Все замеры для каждого размера БД из sizes
+
+    Parameters
+    ----------
+    sizes : Iterable[int]
+        Число строк в items и links.
+    number : int
+        Число вызовов в серии для быстрых методов.
+    folder : str, optional
+        Папка для БД (по умолчанию временная, удаляется после замеров).
+    seed : int
+        Начальное значение генератора случайных данных.
+
+    Returns
+    -------
+    dict
+        Сведения об окружении и результаты {размер: {метод: замер}}.
+    """
+    temp = None
+    if folder is None:
+        temp = tempfile.TemporaryDirectory(prefix="benchmark_")
+        folder = temp.name
+    try:
+        config = prepareFolder(folder)
+        results = {}
+        for rows in sizes:
+            rng = random.Random(seed)
+            name = f"benchmark_{rows}.db3"
+            path = os.path.join(folder, name)
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+            config.config["DB_TEST"]["dbName"] = name
+            db = DataBase(config, is_test=True)
+            try:
+                started = time.perf_counter()
+                fillDataBase(db, rows, rng)
+                fill = time.perf_counter() - started
+                results[str(rows)] = runSize(db, rows, number, rng)
+                results[str(rows)]["fill_s"] = round(fill, 3)
+            finally:
+                db.close()
+        return {"commit": gitCommit(),
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "sqlite": sqlite3.sqlite_version,
+                "platform": platform.platform(),
+                "import": measureImport(),
+                "sizes": results}
+    finally:
+        if temp is not None:
+            temp.cleanup()
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any]) -> List[str]:
+    """Строки сравнения median_us двух результатов (new / old)"""
+    lines = []
+    pairs = [("import", old.get("import"), new.get("import"))]
+    for rows, methods in new["sizes"].items():
+        for method, result in methods.items():
+            previous = old.get("sizes", {}).get(rows, {}).get(method)
+            pairs.append((f"{rows}/{method}", previous, result))
+    for name, previous, result in pairs:
+        if not isinstance(result, dict) or not isinstance(previous, dict):
+            continue
+        ratio = result["median_us"] / previous["median_us"] \
+            if previous["median_us"] else float("inf")
+        lines.append(f"{name:40} {previous['median_us']:>12.1f} "
+                     f"{result['median_us']:>12.1f} {ratio:>7.2f}x")
+    return lines
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Замеры производительности API БД")
+    parser.add_argument("--rows", type=int, nargs="+", default=list(ROWS),
+                        help="размеры БД (строк в items и links)")
+    parser.add_argument("--number", type=int, default=NUMBER,
+                        help="вызовов в серии для быстрых методов")
+    parser.add_argument("--folder", help="папка для БД вместо временной")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--output", help="файл для результатов JSON")
+    parser.add_argument("--compare", help="JSON предыдущего запуска")
+    args = parser.parse_args(argv)
+    # stdout - только JSON, служебный вывод DataBaseManager - в stderr
+    with contextlib.redirect_stdout(sys.stderr):
+        result = run(args.rows, args.number, args.folder, args.seed)
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text)
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            old = json.load(file)
+        print("\n".join(compare(old, result)), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
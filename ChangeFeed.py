@@ -0,0 +1,101 @@
+"""Модуль журнала изменений таблиц БД"""
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Tuple, Union
+
+CHANGELOG = "changelog"
+DATE_COLUMN = "date_update"
+CHANGES_LIMIT = 1000
+
+CREATE_CHANGELOG = f"CREATE TABLE IF NOT EXISTS {CHANGELOG} (" \
+    "seq INTEGER PRIMARY KEY, " \
+    "table_name TEXT NOT NULL, " \
+    "row_id INTEGER NOT NULL, " \
+    "op TEXT NOT NULL, " \
+    "changed_at DATETIME DEFAULT CURRENT_TIMESTAMP)"
+
+# Событие триггера: (код операции в журнале, запись с id)
+OPERATIONS = {
+    "INSERT": ("I", "NEW"),
+    "UPDATE": ("U", "NEW"),
+    "DELETE": ("D", "OLD"),
+}
+
+
+def triggerName(table: str, event: str) -> str:
+    return f"{CHANGELOG}_{table}_{event.lower()}"
+
+
+def createTriggers(table: str) -> List[str]:
+    """Запросы создания триггеров, пишущих изменения table в журнал"""
+    return [f"CREATE TRIGGER IF NOT EXISTS {triggerName(table, event)} "
+            f"AFTER {event} ON {table} BEGIN "
+            f"INSERT INTO {CHANGELOG} (table_name, row_id, op) "
+            f"VALUES ('{table}', {record}.id, '{op}'); END"
+            for event, (op, record) in OPERATIONS.items()]
+
+
+def dropTriggers(table: str) -> List[str]:
+    """Запросы удаления триггеров журнала для table"""
+    return [f"DROP TRIGGER IF EXISTS {triggerName(table, event)}"
+            for event in OPERATIONS]
+
+
+class ChangeCursor:
+    """
+    Позиция в ленте изменений, с которой продолжается синхронизация
+
+    Два режима:
+    - seq - номер последней прочитанной записи журнала changelog;
+    - marks - для каждой таблицы последние прочитанные (date_update, id),
+      timestamp - начальная отметка для таблиц без marks.
+
+    str(cursor) - строка для сохранения, ChangeCursor.of(строка) -
+    восстановление.
+    """
+
+    def __init__(self, seq: int = None, timestamp: str = None,
+                 marks: Dict[str, Tuple[str, int]] = None):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.marks = {table: tuple(mark)
+                      for table, mark in (marks or {}).items()}
+
+    @classmethod
+    def of(cls, since: Union["ChangeCursor", int, str, datetime, None]
+           ) -> "ChangeCursor":
+        """
+        Позиция из аргумента changesSince
+
+        None - начало журнала, int - номер записи журнала, datetime или
+        строка даты - изменения по date_update после этого момента,
+        строка str(cursor) - сохраненная позиция.
+        """
+        if since is None:
+            return cls(seq=0)
+        if isinstance(since, cls):
+            return cls(since.seq, since.timestamp, since.marks)
+        if isinstance(since, int):
+            return cls(seq=since)
+        if isinstance(since, datetime):
+            return cls(timestamp=str(since))
+        if isinstance(since, str) and since.startswith("{"):
+            return cls(**json.loads(since))
+        if isinstance(since, str):
+            return cls(timestamp=since)
+        raise TypeError(f"Неверная позиция ленты изменений: {since!r}")
+
+    def mark(self, table: str) -> Tuple[str, int]:
+        """Последние прочитанные (date_update, id) таблицы"""
+        return self.marks.get(table, (self.timestamp or "", 0))
+
+    def __str__(self) -> str:
+        if self.seq is not None:
+            return json.dumps({"seq": self.seq})
+        return json.dumps({"timestamp": self.timestamp, "marks": self.marks})
+
+    def __repr__(self) -> str:
+        return f"ChangeCursor({self})"
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, ChangeCursor) and str(self) == str(other)
@@ -0,0 +1,89 @@
+"""Модуль колоночной выборки результатов запросов в массивы NumPy"""
+import sqlite3
+from typing import Dict, List, Optional
+
+import numpy as np
+
+DTYPES = {
+    "INTEGER": np.dtype("int64"),
+    "REAL": np.dtype("float64"),
+    "BOOLEAN": np.dtype("bool"),
+    "DATETIME": np.dtype("datetime64[s]"),
+    "TEXT": np.dtype("object"),
+    "BLOB": np.dtype("object"),
+    "NULL": np.dtype("object"),
+}
+
+
+def _datetimes(values: tuple) -> np.ndarray:
+    """Массив datetime64 из строк ISO и меток времени unix"""
+    if all(isinstance(v, str) and not v.isdigit() for v in values):
+        return np.array(values, dtype=DTYPES["DATETIME"])
+    return np.array([np.datetime64(int(v), "s")
+                     if isinstance(v, (int, float))
+                     or (isinstance(v, str) and v.isdigit())
+                     else v for v in values], dtype=DTYPES["DATETIME"])
+
+
+def _toArray(values: tuple, dtype: Optional[np.dtype]) -> np.ndarray:
+    """Массив значений одной колонки порции строк"""
+    if dtype is None:
+        return np.array(values)
+    if dtype == DTYPES["DATETIME"]:
+        return _datetimes(values)
+    try:
+        return np.array(values, dtype=dtype)
+    except (TypeError, ValueError):
+        # NULL в целочисленной колонке - переходим на float64 с NaN
+        if dtype.kind in "iub":
+            try:
+                return np.array(values, dtype=DTYPES["REAL"])
+            except (TypeError, ValueError):
+                pass
+        return np.array(values, dtype=DTYPES["TEXT"])
+
+
+def fetchColumns(cursor: sqlite3.Cursor,
+                 dtypes: Dict[str, np.dtype] = None,
+                 batch_size: int = 1000) -> Dict[str, np.ndarray]:
+    """
+    Выборка результата выполненного запроса по колонкам
+
+    Строки читаются порциями fetchmany, каждая порция транспонируется
+    и сразу переводится в массивы, словари на строку не создаются.
+
+    Parameters
+    ----------
+    cursor : sqlite3.Cursor
+        Курсор с выполненным запросом.
+    dtypes : dict, optional
+        Типы массивов по именам колонок (остальные определяет NumPy).
+    batch_size : int, optional
+        Число строк в одной порции fetchmany.
+
+    Returns
+    -------
+    dict
+        Массивы по именам колонок.
+    """
+    dtypes = dtypes or {}
+    names = [d[0] for d in cursor.description]
+    chunks: List[List[np.ndarray]] = [[] for _ in names]
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        for i, values in enumerate(zip(*rows)):
+            chunks[i].append(_toArray(values, dtypes.get(names[i])))
+    result = {}
+    for name, arrays in zip(names, chunks):
+        if arrays:
+            result[name] = np.concatenate(arrays)
+        else:
+            result[name] = np.array([], dtype=dtypes.get(name, DTYPES["NULL"]))
+    return result
+
+
+def toRecords(columns: Dict[str, np.ndarray]) -> np.ndarray:
+    """Структурированный массив (record array) из массивов колонок"""
+    return np.rec.fromarrays(list(columns.values()), names=list(columns))
@@ -1,10 +1,51 @@
 import os
 import configparser
 from threading import Lock
+from typing import Dict, Iterable, Optional, Tuple
 
 FOLDER_PROJECT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 FOLDER_FILES = os.path.join(FOLDER_PROJECT,"configs")
 
+# Порядок важен: page_size действует только до включения WAL
+PERF_PRAGMAS = ('page_size', 'journal_mode', 'synchronous', 'cache_size',
+                'mmap_size', 'temp_store', 'busy_timeout')
+# Хранятся в файле БД: применяются один раз, а не на каждое соединение
+FILE_PRAGMAS = ('page_size', 'journal_mode')
+PERF_VALUES = {
+    'journal_mode': ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'),
+    'synchronous': ('OFF', 'NORMAL', 'FULL', 'EXTRA'),
+    'temp_store': ('DEFAULT', 'FILE', 'MEMORY'),
+}
+PERF_PRESETS = {
+    'safe': {
+        'page_size': 4096,
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'cache_size': -2000,
+        'mmap_size': 0,
+        'temp_store': 'DEFAULT',
+        'busy_timeout': 5000,
+    },
+    'fast-read': {
+        'page_size': 4096,
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -65536,
+        'mmap_size': 268435456,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,
+    },
+    'bulk-load': {
+        'page_size': 8192,
+        'journal_mode': 'WAL',
+        'synchronous': 'OFF',
+        'cache_size': -262144,
+        'mmap_size': 0,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 30000,
+    },
+}
+
 class ConfigManager:
     
     _instance = None
@@ -40,12 +81,20 @@ class ConfigManager:
             'dbFolder': self.folder_db,
             'archiveFolder': archive_folder, 
             'dbName': "database.db3",
+            'persistent': False,
+            'poolSize': 4,
+            'cachedStatements': 128,
         }
         self.config['DB_TEST'] = {
             'dbFolder': self.folder_db,
             'archiveFolder': archive_folder, 
             'dbName': "database_test.db3",
+            'persistent': False,
+            'poolSize': 4,
+            'cachedStatements': 128,
         }
+        self.config['DB_PERF'] = {'preset': 'safe'}
+        self.config['DB_TEST_PERF'] = {'preset': 'safe'}
         os.makedirs(self.folder_db, exist_ok=True)
         os.makedirs(archive_folder, exist_ok=True)
         self.saveConfig()
@@ -77,6 +126,110 @@ class ConfigManager:
         """Возвращает путь к текущей базе данных."""
         return self.config[self.getKey(is_test)].get('dbName', '')
 
+    def getPersistent(self, is_test:bool=True) -> bool:
+        """Возвращает признак постоянного соединения с базой данных."""
+        return self.config[self.getKey(is_test)].getboolean('persistent',
+                                                           fallback=False)
+
+    def getPoolSize(self, is_test:bool=True) -> int:
+        """Возвращает размер пула соединений с базой данных."""
+        return self.config[self.getKey(is_test)].getint('poolSize', fallback=4)
+
+    def getCachedStatements(self, is_test:bool=True) -> int:
+        """Возвращает размер кэша подготовленных выражений соединения."""
+        return self.config[self.getKey(is_test)].getint('cachedStatements',
+                                                       fallback=128)
+
+    def getCacheTables(self, is_test:bool=True) -> Dict[str, Tuple[int, float]]:
+        """Возвращает настройки кэша строк: {таблица: (размер, ttl)}."""
+        key = self.getKey(is_test) + "_CACHE"
+        if key not in self.config:
+            return {}
+        tables = {}
+        for table, value in self.config[key].items():
+            if table == 'dataversion':
+                continue
+            size, _, ttl = value.partition(',')
+            tables[table] = (int(size), float(ttl) if ttl.strip() else None)
+        return tables
+
+    def getCacheDataVersion(self, is_test:bool=True) -> bool:
+        """Возвращает признак сброса кэша строк по PRAGMA data_version."""
+        key = self.getKey(is_test) + "_CACHE"
+        if key not in self.config:
+            return False
+        return self.config[key].getboolean('dataVersion', fallback=False)
+
+    def getSearchTables(self, is_test:bool=True
+                        ) -> Dict[str, Optional[Tuple[str, ...]]]:
+        """Возвращает таблицы полнотекстового поиска: {таблица: колонки}.
+
+        None вместо колонок - все колонки TEXT таблицы.
+        """
+        key = self.getKey(is_test) + "_FTS"
+        if key not in self.config:
+            return {}
+        tables = {}
+        for table, value in self.config[key].items():
+            if table == 'tokenize':
+                continue
+            columns = tuple(c.strip() for c in value.split(',') if c.strip())
+            tables[table] = None if columns in ((), ('*',)) else columns
+        return tables
+
+    def getSearchTokenize(self, is_test:bool=True) -> Optional[str]:
+        """Возвращает токенизатор FTS5 (None - по умолчанию)."""
+        key = self.getKey(is_test) + "_FTS"
+        if key not in self.config:
+            return None
+        return self.config[key].get('tokenize')
+
+    def getArchiveAttach(self, is_test:bool=True) -> bool:
+        """Возвращает признак присоединения архивных шардов (ATTACH)."""
+        key = self.getKey(is_test) + "_ARCHIVE"
+        if key not in self.config:
+            return False
+        return self.config[key].getboolean('attach', fallback=False)
+
+    def getArchivePeriod(self, is_test:bool=True) -> str:
+        """Возвращает период архивного шарда: year или month."""
+        key = self.getKey(is_test) + "_ARCHIVE"
+        if key not in self.config:
+            return 'year'
+        return self.config[key].get('period', 'year')
+
+    def getPerfPreset(self, is_test:bool=True) -> str:
+        """Возвращает имя набора PRAGMA производительности."""
+        key = self.getKey(is_test) + "_PERF"
+        if key not in self.config:
+            return 'safe'
+        return self.config[key].get('preset', 'safe')
+
+    def getPerfPragmas(self, is_test:bool=True) -> Dict[str, str]:
+        """Возвращает PRAGMA производительности для новых соединений.
+
+        Значения набора (preset) переопределяются ключами секции.
+        """
+        key = self.getKey(is_test) + "_PERF"
+        pragmas = {name: str(value) for name, value
+                   in PERF_PRESETS[self.getPerfPreset(is_test)].items()}
+        if key in self.config:
+            for name in PERF_PRAGMAS:
+                if name in self.config[key]:
+                    pragmas[name] = self.config[key][name]
+        return {name: self.checkPerfValue(name, pragmas[name])
+                for name in PERF_PRAGMAS}
+
+    @staticmethod
+    def checkPerfValue(name: str, value) -> str:
+        """Проверяет значение PRAGMA производительности."""
+        if name in PERF_VALUES:
+            value = str(value).strip().upper()
+            if value not in PERF_VALUES[name]:
+                raise ValueError(f"Недопустимое значение {name}: {value}")
+            return value
+        return str(int(value))
+
     def setDbFolder(self, folder_path):
         """Устанавливает путь к папке базы данных."""
         self.config['DB']['dbFolder'] = folder_path
@@ -93,6 +246,90 @@ class ConfigManager:
         """Устанавливает путь к текущей базе данных."""
         self.config['DB']['dbName'] = db_path
         self.saveConfig()
+
+    def setPersistent(self, persistent: bool, is_test:bool=True):
+        """Включает/выключает постоянное соединение с базой данных."""
+        self.config[self.getKey(is_test)]['persistent'] = str(bool(persistent))
+        self.saveConfig()
+
+    def setPoolSize(self, size: int, is_test:bool=True):
+        """Устанавливает размер пула соединений с базой данных."""
+        self.config[self.getKey(is_test)]['poolSize'] = str(int(size))
+        self.saveConfig()
+
+    def setPerfPreset(self, preset: str, is_test:bool=True):
+        """Устанавливает набор PRAGMA производительности
+        ("safe", "fast-read", "bulk-load") и сбрасывает переопределения."""
+        if preset not in PERF_PRESETS:
+            raise ValueError(f"Неизвестный набор PRAGMA: {preset}")
+        self.config[self.getKey(is_test) + "_PERF"] = {'preset': preset}
+        self.saveConfig()
+
+    def setPerfPragma(self, name: str, value, is_test:bool=True):
+        """Переопределяет одну PRAGMA производительности."""
+        if name not in PERF_PRAGMAS:
+            raise ValueError(f"Неизвестная PRAGMA: {name}")
+        value = self.checkPerfValue(name, value)
+        key = self.getKey(is_test) + "_PERF"
+        if key not in self.config:
+            self.config[key] = {'preset': 'safe'}
+        self.config[key][name] = str(value)
+        self.saveConfig()
+
+    def setCacheTable(self, table: str, size: int, ttl: float = None,
+                      is_test:bool=True):
+        """Включает кэш строк таблицы (size=0 - выключает)."""
+        key = self.getKey(is_test) + "_CACHE"
+        if key not in self.config:
+            self.config[key] = {}
+        if size:
+            value = str(int(size))
+            if ttl is not None:
+                value += f", {ttl}"
+            self.config[key][table] = value
+        else:
+            self.config.remove_option(key, table)
+        self.saveConfig()
+
+    def setSearchTable(self, table: str, columns: Iterable[str] = ('*',),
+                       is_test:bool=True):
+        """Включает полнотекстовый поиск по колонкам таблицы
+        (columns=None - выключает)."""
+        key = self.getKey(is_test) + "_FTS"
+        if key not in self.config:
+            self.config[key] = {}
+        if columns is None:
+            self.config.remove_option(key, table)
+        else:
+            self.config[key][table] = ', '.join(columns)
+        self.saveConfig()
+
+    def setArchiveAttach(self, enabled: bool, period: str = None,
+                         is_test:bool=True):
+        """Включает присоединение архивных шардов и задает их период."""
+        if period is not None and period not in ('year', 'month'):
+            raise ValueError(f"Неизвестный период шарда: {period}")
+        key = self.getKey(is_test) + "_ARCHIVE"
+        if key not in self.config:
+            self.config[key] = {}
+        self.config[key]['attach'] = str(bool(enabled))
+        if period is not None:
+            self.config[key]['period'] = period
+        self.saveConfig()
+
+    def setCacheDataVersion(self, enabled: bool, is_test:bool=True):
+        """Включает сброс кэша строк при изменении БД другим процессом
+        (только вместе с persistent)."""
+        key = self.getKey(is_test) + "_CACHE"
+        if key not in self.config:
+            self.config[key] = {}
+        self.config[key]['dataVersion'] = str(bool(enabled))
+        self.saveConfig()
+
+    def setCachedStatements(self, size: int, is_test:bool=True):
+        """Устанавливает размер кэша подготовленных выражений соединения."""
+        self.config[self.getKey(is_test)]['cachedStatements'] = str(int(size))
+        self.saveConfig()
         
 if __name__ == "__main__":
     config = ConfigManager()
\ No newline at end of file
@@ -0,0 +1,340 @@
+"""Модуль пула соединений с БД"""
+import queue
+import sqlite3
+import threading
+import time
+from typing import Callable, List, Optional
+
+from .Profiler import QueryProfiler
+
+
+class Connection(sqlite3.Connection):
+    """Соединение пула со служебными отметками."""
+
+    data_version: Optional[int] = None
+    writer: bool = False
+    generation: int = 0
+    profiler: Optional[QueryProfiler] = None
+
+
+class Checkout:
+    """Выдача соединения потоку: передается в ConnectionPool.release."""
+
+    __slots__ = ("connection", "write")
+
+    def __init__(self, connection: sqlite3.Connection, write: bool):
+        self.connection = connection
+        self.write = write
+
+
+class ConnectionPool:
+    """Пул соединений SQLite с выдачей соединения на поток.
+
+    Каждый поток получает собственное соединение для чтения (не более size
+    одновременно), все записи идут через единственное соединение-писатель,
+    доступ к которому сериализован блокировкой. В режиме WAL читатели
+    работают параллельно с писателем.
+    """
+
+    def __init__(self,
+                 fullpath: str,
+                 size: int = 4,
+                 persistent: bool = True,
+                 cached_statements: int = 128,
+                 on_connect: Callable[[sqlite3.Connection], None] = None,
+                 profiler: QueryProfiler = None):
+        """
+        Parameters
+        ----------
+        fullpath : str
+            Путь к файлу БД.
+        size : int, optional
+            Максимальное число одновременно выданных соединений для чтения.
+        persistent : bool, optional
+            Хранить соединения открытыми между вызовами (по умолчанию True).
+            При False соединение закрывается при возврате в пул.
+        cached_statements : int, optional
+            Размер кэша подготовленных выражений каждого соединения.
+        on_connect : Callable, optional
+            Функция настройки нового соединения (PRAGMA и т.п.).
+        profiler : QueryProfiler, optional
+            Профилировщик запросов и времени открытия/закрытия соединений.
+        """
+        if size < 1:
+            raise ValueError(f"Размер пула должен быть >= 1: {size}")
+        self.fullpath = fullpath
+        self.size = size
+        self.persistent = persistent
+        self.cached_statements = cached_statements
+        self._on_connect = on_connect
+        self.profiler = profiler
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = set()
+        # соединения прошлых поколений закрываются при возврате (reset)
+        self._generation = 0
+        self._writer: Optional[sqlite3.Connection] = None
+        self._writer_lock = threading.RLock()
+        # поток, оставивший незафиксированную транзакцию писателя
+        self._owner: Optional[int] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Открытие нового соединения"""
+        start = time.perf_counter()
+        connection = sqlite3.connect(self.fullpath, check_same_thread=False,
+                                     cached_statements=self.cached_statements,
+                                     factory=Connection)
+        if self._on_connect is not None:
+            self._on_connect(connection)
+        connection.profiler = self.profiler
+        connection.generation = self._generation
+        if self.profiler is not None and self.profiler.active:
+            self.profiler.connection("open", time.perf_counter() - start)
+        with self._lock:
+            self._connections.add(connection)
+        return connection
+
+    def _close(self, connection: sqlite3.Connection) -> None:
+        """Закрытие соединения с учетом времени в профилировщике"""
+        start = time.perf_counter()
+        connection.close()
+        if self.profiler is not None and self.profiler.active:
+            self.profiler.connection("close", time.perf_counter() - start)
+
+    def _discard(self, connection: sqlite3.Connection) -> None:
+        """Закрытие соединения и исключение его из пула"""
+        with self._lock:
+            self._connections.discard(connection)
+        self._close(connection)
+
+    def _isAlive(self, connection: sqlite3.Connection) -> bool:
+        """Соединение не было закрыто через close() и не устарело (reset)"""
+        with self._lock:
+            return connection in self._connections and \
+                connection.generation == self._generation
+
+    def _retireWriter(self) -> None:
+        """Закрытие устаревшего писателя, если он свободен"""
+        writer = self._writer
+        if writer is not None and not self._isAlive(writer) \
+                and not writer.in_transaction and not self._count(writer):
+            self._writer = None
+            self._discard(writer)
+
+    def _stack(self) -> List[Checkout]:
+        """Выдачи текущему потоку в порядке получения"""
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _count(self, connection: sqlite3.Connection) -> int:
+        """Число вложенных выдач connection текущему потоку"""
+        return sum(1 for item in self._stack()
+                   if item.connection is connection)
+
+    @property
+    def depth(self) -> int:
+        """Число выдач соединений текущему потоку (0 - ничего не выдано)"""
+        return len(self._stack())
+
+    @property
+    def generation(self) -> int:
+        """Поколение соединений: увеличивается при reset() и close()"""
+        return self._generation
+
+    @property
+    def checkout(self) -> int:
+        """Номер текущей выдачи соединений потоку (0 - ничего не выдано)
+
+        Увеличивается при каждой первой выдаче после полного возврата.
+        """
+        return getattr(self._local, 'checkout', 0) if self._stack() else 0
+
+    def current(self) -> Optional[sqlite3.Connection]:
+        """Соединение, выданное текущему потоку последним, или None"""
+        stack = self._stack()
+        return stack[-1].connection if stack else None
+
+    def controls(self, checkout: Checkout) -> bool:
+        """Выдача управляет фиксацией транзакции своего соединения
+
+        Для читателя - последняя выдача соединения потоку, для писателя -
+        последняя выдача для записи (чтение через писателя фиксацией не
+        управляет).
+        """
+        connection = checkout.connection
+        others = [item for item in self._stack()
+                  if item.connection is connection and item is not checkout]
+        if connection.writer:
+            return checkout.write and not any(item.write for item in others)
+        return not others
+
+    def _ownsTransaction(self) -> bool:
+        """Незафиксированная транзакция писателя оставлена текущим потоком"""
+        writer = self._writer
+        return writer is not None and writer.in_transaction \
+            and self._owner == threading.get_ident()
+
+    def acquire(self, write: bool = False) -> Checkout:
+        """
+        Выдача соединения текущему потоку
+
+        Выдачи для чтения и записи учитываются раздельно: запись внутри
+        блока чтения получает соединение-писатель (под блокировкой);
+        чтение внутри блока записи или при незафиксированной транзакции
+        писателя, оставленной этим потоком, идет через писателя (видны
+        свои изменения); повторное чтение возвращает уже выданное
+        соединение для чтения.
+
+        Parameters
+        ----------
+        write : bool, optional
+            Выдать соединение-писатель (по умолчанию False).
+
+        Returns
+        -------
+        Checkout
+            Выдача (соединение - checkout.connection), которую нужно
+            вернуть через release; выдачи можно возвращать в любом
+            порядке (например, при досрочно закрытых генераторах).
+        """
+        stack = self._stack()
+        if not stack:
+            self._local.checkout = getattr(self._local, 'checkout', 0) + 1
+        held = [item.connection for item in stack]
+        if self._writer is not None and self._writer in held:
+            connection = self._writer
+        elif write or self._ownsTransaction():
+            self._writer_lock.acquire()
+            try:
+                self._retireWriter()
+                if self._writer is None:
+                    self._writer = self._connect()
+                    self._writer.writer = True
+            except BaseException:
+                self._writer_lock.release()
+                raise
+            connection = self._writer
+        elif held:
+            connection = held[-1]
+        else:
+            self._slots.acquire()
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                try:
+                    connection = self._connect()
+                except BaseException:
+                    self._slots.release()
+                    raise
+        checkout = Checkout(connection, write)
+        stack.append(checkout)
+        return checkout
+
+    def release(self, checkout: Checkout) -> None:
+        """Возврат выдачи checkout текущего потока"""
+        stack = self._stack()
+        for i in range(len(stack) - 1, -1, -1):
+            if stack[i] is checkout:
+                del stack[i]
+                break
+        else:
+            return
+        connection = checkout.connection
+        if self._count(connection):
+            return
+        if connection.writer:
+            try:
+                self._owner = threading.get_ident() \
+                    if connection.in_transaction else None
+                if connection is not self._writer:
+                    self._discard(connection)
+                elif not self.persistent and not connection.in_transaction:
+                    self._writer = None
+                    self._discard(connection)
+                else:
+                    self._retireWriter()
+            finally:
+                self._writer_lock.release()
+        else:
+            try:
+                if self._isAlive(connection) and self.persistent:
+                    self._idle.put(connection)
+                else:
+                    self._discard(connection)
+            finally:
+                self._slots.release()
+
+    def commit(self) -> None:
+        """Фиксация транзакции соединения-писателя"""
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.commit()
+                self._owner = None
+                if not self.persistent and not self._count(self._writer):
+                    self._discard(self._writer)
+                    self._writer = None
+                else:
+                    self._retireWriter()
+
+    def rollback(self) -> None:
+        """Откат транзакции соединения-писателя"""
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.rollback()
+                self._owner = None
+                if not self.persistent and not self._count(self._writer):
+                    self._discard(self._writer)
+                    self._writer = None
+                else:
+                    self._retireWriter()
+
+    def reset(self) -> None:
+        """Переоткрытие соединений без прерывания работы других потоков
+
+        Ожидает окончания записи (блокировка писателя); свободные
+        соединения закрываются сразу, выданные потокам - при возврате,
+        писатель с незафиксированной транзакцией - после ее окончания.
+        Новые соединения заново настраиваются (on_connect).
+        """
+        with self._writer_lock:
+            with self._lock:
+                self._generation += 1
+            while True:
+                try:
+                    self._discard(self._idle.get_nowait())
+                except queue.Empty:
+                    break
+            self._retireWriter()
+
+    def close(self) -> None:
+        """Закрытие соединений пула без прерывания работы других потоков
+
+        Свободные соединения закрываются сразу, выданные потокам - при
+        возврате. Писатель закрывается сразу, если он свободен (его
+        незафиксированная транзакция, оставленная текущим потоком,
+        откатывается); писатель во время записи или transaction()
+        другого потока - при возврате, с транзакцией, оставленной другим
+        потоком, - после ее commit/rollback.
+        """
+        with self._lock:
+            self._generation += 1
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        if not self._writer_lock.acquire(blocking=False):
+            return
+        try:
+            writer = self._writer
+            if writer is not None and not self._count(writer) and not (
+                    writer.in_transaction and not self._ownsTransaction()):
+                self._writer = None
+                self._owner = None
+                self._discard(writer)
+        finally:
+            self._writer_lock.release()
@@ -1,10 +1,32 @@
 """Класс для работы с БД"""
 from datetime import datetime
 from enum import Enum
-from typing import List, Callable, Tuple, Dict, Any
+from functools import lru_cache
+import os
+import sqlite3
+import sys
+import threading
+from typing import List, Callable, Tuple, Dict, Any, Iterable, Iterator
 
 from .DataBaseManager import DataBaseManager
 from .ConfigManager import ConfigManager
+from .RowCache import RowCache, MISSING
+from .IndexAdvisor import IndexAdvisor
+from . import WriteQueue
+from . import ChangeFeed
+from . import Graph
+from . import FullText
+from . import Shards
+
+READ_STATEMENTS = ("SELECT", "WITH", "EXPLAIN", "VALUES")
+CTE_STATEMENTS = ("SELECT", "VALUES", "INSERT", "UPDATE", "DELETE",
+                  "REPLACE")
+SCHEMA_STATEMENTS = ("CREATE", "DROP", "ALTER")
+ON_CONFLICT = (None, "IGNORE", "REPLACE", "UPDATE")
+QUERY_CACHE_SIZE = 1024
+SQLITE_MAX_VARIABLE_NUMBER = 999
+IN_CHUNKS_LIMIT = 10
+FETCH_BATCH_SIZE = 1000
 
 
 class DBError(Exception):
@@ -42,7 +64,11 @@ class DataBase(DataBaseManager):
                 
             class dt:
                 def __call__(self, t):
-                    return datetime.strptime(t, "%Y-%m-%d %H:%M:%S")
+                    if t is None or isinstance(t, datetime):
+                        return t
+                    if isinstance(t, (int, float)) or t.isdigit():
+                        return datetime.fromtimestamp(int(t))
+                    return datetime.fromisoformat(t)
                 
                 def __repr__(self):
                     return "<DATETIME>"
@@ -53,7 +79,7 @@ class DataBase(DataBaseManager):
             TEXT = str
             BLOB = bytes
             BOOLEAN = bool
-            DATETIME = datetime
+            DATETIME = dt()
             
             @classmethod
             def get(cls, name: str):
@@ -74,16 +100,44 @@ class DataBase(DataBaseManager):
                 elif self.col_type == self.Type.INTEGER:
                     self.dflt_value = int(dflt_value)
 
+        NATIVE = (Type.NULL, Type.INTEGER, Type.REAL, Type.TEXT, Type.BLOB)
+
         def convert(self, value: Any) -> Any:
             if value is None: #and not self.notnull:
                 return None
             return self.col_type.value(value)
 
+        @property
+        def converter(self) -> Callable[[Any], Any]:
+            """Функция декодирования значения (None, если sqlite уже
+            возвращает значение нужного типа)"""
+            if self.col_type in self.NATIVE:
+                return None
+            return self.col_type.value
+
 
-    def __init__(self, config: ConfigManager, is_test: bool):
-        super().__init__(config, is_test)
-        self._tables = {table: self._getColumns(table)
-                        for table in self.tables}
+    def __init__(self, config: ConfigManager, is_test: bool,
+                 persistent: bool = None, pool_size: int = None):
+        self._caches = {table: RowCache(size, ttl) for table, (size, ttl)
+                        in config.getCacheTables(is_test).items()}
+        self._cacheDataVersion = config.getCacheDataVersion(is_test)
+        self._dirty = set()
+        self._dirtyLock = threading.Lock()
+        self._decoders = {}
+        self._tables = {}
+        self._tableNames = frozenset()
+        self._schemaVersion = None
+        self._advisor = IndexAdvisor()
+        self._writeQueue: WriteQueue.WriteQueue = None
+        self._archiveAttach = config.getArchiveAttach(is_test)
+        # (поколение пула, [(псевдоним, путь шарда)], [SQL представлений])
+        self._shardPlan: Tuple[int, List[Tuple[str, str]], List[str]] = None
+        super().__init__(config, is_test, persistent, pool_size)
+        if self._cacheDataVersion and self._caches and not self.persistent:
+            raise DBError("Сброс кэша по PRAGMA data_version (dataVersion) "
+                          "требует постоянных соединений (persistent)")
+        if config.getSearchTables(is_test):
+            self.enableSearch()
 
     @staticmethod
     def j1(args) -> str:
@@ -127,21 +181,581 @@ class DataBase(DataBaseManager):
         else:
             raise ValueError(f"Unsupported operator: {operator}")
 
+    @classmethod
+    @lru_cache(maxsize=QUERY_CACHE_SIZE)
+    def _selectQueryText(cls, table: str, column: str,
+                         keys: Tuple[str, ...],
+                         operator: Callable = all) -> str:
+        """Кэшированный текст запроса `SELECT column FROM table WHERE ...`.
+
+        Ключ кэша - (table, column, keys, operator).
+        """
+        return f'SELECT {column} FROM {table} WHERE '\
+            f'{cls._get_func(operator)(keys)}'
+
+    def _selectQuery(self, table: str, column: str,
+                     keys: Tuple[str, ...], operator: Callable = all) -> str:
+        """Текст запроса с фильтром по keys с учетом фильтра в IndexAdvisor"""
+        self._advisor.record(table, keys, column, operator)
+        return self._selectQueryText(table, column, keys, operator)
+
+    @classmethod
+    @lru_cache(maxsize=QUERY_CACHE_SIZE)
+    def _selectInQuery(cls, table: str, column: str, key: str,
+                       count: int) -> str:
+        """Кэшированный текст запроса `SELECT key, column ... IN (?, ...)`"""
+        return f'SELECT {table}.{key}, {column} FROM {table} '\
+            f'WHERE {table}.{key} IN ({cls.j2(range(count))})'
+
+    @staticmethod
+    def _variableLimit(connection: sqlite3.Connection) -> int:
+        """Максимальное число параметров в одном запросе"""
+        getlimit = getattr(connection, "getlimit", None)
+        if getlimit is None:
+            return SQLITE_MAX_VARIABLE_NUMBER
+        return getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
+
+    @staticmethod
+    def _fillLookup(cursor: sqlite3.Cursor, values: Iterable) -> None:
+        """Заполнение временной таблицы temp.lookup_values"""
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS "
+                       "lookup_values (value PRIMARY KEY)")
+        cursor.execute("DELETE FROM temp.lookup_values")
+        cursor.executemany("INSERT INTO temp.lookup_values VALUES (?)",
+                           ((v,) for v in values))
+
+    def _selectIn(self, table: str, column: str, key: str,
+                  values: Iterable) -> Tuple[List[str], List[tuple]]:
+        """
+        Выборка строк, у которых key входит в values
+
+        Список values делится на части по SQLITE_MAX_VARIABLE_NUMBER
+        параметров, очень длинные списки соединяются через временную
+        таблицу.
+
+        Returns
+        -------
+        tuple
+            Имена колонок и строки вида (key, column...).
+        """
+        values = list(dict.fromkeys(values))
+        rows = []
+        columns = [key]
+        with self as cursor:
+            limit = self._variableLimit(cursor.connection)
+            if len(values) > limit * IN_CHUNKS_LIMIT:
+                self._fillLookup(cursor, values)
+                cursor.execute(
+                    f'SELECT {table}.{key}, {column} FROM {table} '
+                    f'INNER JOIN temp.lookup_values '
+                    f'ON {table}.{key} = lookup_values.value')
+                rows = cursor.fetchall()
+                columns += [d[0] for d in cursor.description[1:]]
+                cursor.execute("DELETE FROM temp.lookup_values")
+                return columns, rows
+            for i in range(0, len(values), limit):
+                chunk = values[i:i + limit]
+                cursor.execute(
+                    self._selectInQuery(table, column, key, len(chunk)),
+                    chunk)
+                rows.extend(cursor.fetchall())
+                if len(columns) == 1:
+                    columns += [d[0] for d in cursor.description[1:]]
+        return columns, rows
+
+    def queryCacheInfo(self) -> Dict[str, int]:
+        """Статистика кэша текстов запросов (попадания/промахи)"""
+        info = self._selectQueryText.cache_info()
+        return {"hits": info.hits, "misses": info.misses,
+                "size": info.currsize, "maxsize": info.maxsize}
+
+    def _cached(self, table: str, key: tuple, load: Callable[[], Any]) -> Any:
+        """
+        Чтение через кэш строк таблицы table
+
+        Без настроенного кэша и внутри transaction() значение читается
+        из БД функцией load напрямую.
+        """
+        cache = self._caches.get(table.lower()) if self._caches else None
+        if cache is None or getattr(self._local, 'transaction', 0):
+            return load()
+        if self._cacheDataVersion:
+            self._syncDataVersion()
+        value = cache.get(key)
+        if value is MISSING:
+            generation = cache.generation
+            value = load()
+            cache.put(key, value, generation)
+        return value
+
+    def _syncDataVersion(self) -> None:
+        """Сброс кэшей, если БД изменилась через другое соединение
+
+        PRAGMA data_version сравним только в пределах одного соединения,
+        поэтому режим требует persistent; для нового соединения
+        изменения до его открытия неизвестны - кэши тоже сбрасываются.
+        """
+        with self as cursor:
+            cursor.execute("PRAGMA data_version")
+            version = cursor.fetchone()[0]
+            connection = cursor.connection
+            if connection.data_version != version:
+                for cache in self._caches.values():
+                    cache.clear()
+            connection.data_version = version
+
+    def _invalidate(self, table: str = None) -> None:
+        """
+        Сброс кэша строк таблицы table (всех таблиц, если None)
+
+        Таблица запоминается и сбрасывается повторно по окончании
+        транзакции писателя, чтобы не остались значения, прочитанные
+        другими потоками до фиксации.
+        """
+        if not self._caches:
+            return
+        tables = list(self._caches) if table is None else [table.lower()]
+        with self._dirtyLock:
+            self._dirty.update(tables)
+        for name in tables:
+            if name in self._caches:
+                self._caches[name].clear()
+
+    def _onTransactionEnd(self) -> None:
+        with self._dirtyLock:
+            tables, self._dirty = self._dirty, set()
+        for name in tables:
+            if name in self._caches:
+                self._caches[name].clear()
+
+    def cacheInfo(self) -> Dict[str, Dict[str, Any]]:
+        """Статистика кэшей строк по таблицам"""
+        return {table: cache.info() for table, cache in self._caches.items()}
+
+    def indexAdvice(self, min_count: int = 1) -> List[Dict[str, Any]]:
+        """
+        Рекомендации по индексам для фильтров вспомогательных методов
+
+        Для каждого учтенного фильтра (таблица, колонки) выполняется
+        EXPLAIN QUERY PLAN; фильтры с полным просмотром (SCAN) получают
+        рекомендацию индекса.
+
+        Parameters
+        ----------
+        min_count : int, optional
+            Минимальное число запросов с фильтром.
+
+        Returns
+        -------
+        list
+            Словари table, columns, count, plan, name, sql.
+        """
+        tables = {table: tuple(self.getColumns(table))
+                  for table in self._plainTables()}
+        # отдельное соединение: план EXPLAIN строится при подготовке
+        # выражения, а кэш выражений пула мог сохранить план до индексов
+        connection = sqlite3.connect(self.fullpath)
+        try:
+            return self._advisor.advise(
+                lambda query, args: connection.execute(
+                    "EXPLAIN QUERY PLAN " + query, args).fetchall(),
+                tables, min_count)
+        finally:
+            connection.close()
+
+    def ensureIndexes(self, create: bool = True,
+                      min_count: int = 1) -> List[Dict[str, Any]]:
+        """
+        Создание недостающих индексов по рекомендациям indexAdvice
+
+        Parameters
+        ----------
+        create : bool, optional
+            Создать индексы (False - только отчет).
+        min_count : int, optional
+            Минимальное число запросов с фильтром.
+
+        Returns
+        -------
+        list
+            Рекомендации (созданные индексы при create=True).
+        """
+        advice = self.indexAdvice(min_count)
+        if create and advice:
+            with self.writer() as cursor:
+                for item in advice:
+                    cursor.execute(item["sql"])
+                cursor.execute("PRAGMA optimize")
+        return advice
+
     def getTimeLastUpdate(self) -> datetime:
         txt = "SELECT MAX(date_update) FROM links"
+        self._advisor.record("links", ("date_update",))
         with self as cursor:
             cursor.execute(txt)
             value = cursor.fetchone()[0]
-            try:
-                dt = datetime.fromtimestamp(int(value))
-            except ValueError:
-                dt = datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
-            return dt
+        return self.Column.Type.DATETIME.value(value)
+
+    def _plainTables(self) -> List[str]:
+        """Обычные таблицы БД: без представлений, служебных sqlite_*,
+        виртуальных таблиц (FTS5) и их теневых таблиц"""
+        txt = "SELECT name FROM sqlite_master AS t WHERE type = 'table' " \
+            "AND name NOT LIKE 'sqlite_%' " \
+            "AND sql NOT LIKE 'CREATE VIRTUAL TABLE%' " \
+            "AND NOT EXISTS (SELECT 1 FROM sqlite_master AS v " \
+            "WHERE v.sql LIKE 'CREATE VIRTUAL TABLE%' " \
+            "AND t.name LIKE v.name || '!_%' ESCAPE '!')"
+        return [row[0] for row in self.makeRequest(txt)]
+
+    def _configureConnection(self, connection: sqlite3.Connection) -> None:
+        """Настройка нового соединения: PRAGMA и архивные шарды."""
+        super()._configureConnection(connection)
+        if self._archiveAttach:
+            self._attachShards(connection)
+
+    def _attachShards(self, connection: sqlite3.Connection) -> None:
+        """ATTACH шардов из archiveFolder и представления `<таблица>_all`
+
+        Присоединяются самые новые шарды в пределах лимита
+        SQLITE_LIMIT_ATTACHED. Список шардов и SQL представлений
+        вычисляются один раз на поколение пула (до reset() в enableArchive,
+        disableArchive, archiveRows или изменения схемы основной БД),
+        остальные соединения только повторяют ATTACH и создание
+        представлений.
+        """
+        generation = self._pool.generation
+        plan = self._shardPlan
+        if plan is not None and plan[0] == generation:
+            for schema, path in plan[1]:
+                connection.execute(f"ATTACH DATABASE ? AS {schema}", (path,))
+            for txt in plan[2]:
+                connection.execute(txt)
+            return
+        found = Shards.shards(self.config.getArchivesFolder(self.is_test),
+                              self.filename)
+        keys = list(found)[-Shards.attachLimit(connection):]
+        if len(keys) < len(found):
+            print(f"Присоединено {len(keys)} из {len(found)} архивных "
+                  "шардов (лимит ATTACH)", file=sys.stderr)
+        attached = [(Shards.alias(key), found[key]) for key in keys]
+        shard_columns: Dict[str, Dict[str, List[str]]] = {}
+        for schema, path in attached:
+            connection.execute(f"ATTACH DATABASE ? AS {schema}", (path,))
+            txt = f"SELECT name FROM {schema}.sqlite_master " \
+                "WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+            for (table,) in connection.execute(txt).fetchall():
+                shard_columns.setdefault(table, {})[schema] = [
+                    row[1] for row in connection.execute(
+                        f"PRAGMA {schema}.table_info({table})")]
+        views = []
+        for table, shards in shard_columns.items():
+            columns = [row[1] for row in connection.execute(
+                f"PRAGMA main.table_info({table})")]
+            if columns:
+                views.append(Shards.viewSql(table, columns, shards))
+                connection.execute(views[-1])
+        self._shardPlan = (generation, attached, views)
+
+    def enableArchive(self, period: str = None) -> None:
+        """
+        Режим архивных шардов: ATTACH шардов archiveFolder к соединениям
+
+        Для каждой таблицы, которая есть в шардах, создается временное
+        представление `<таблица>_all` = основная таблица UNION ALL шарды;
+        вспомогательные методы чтения работают с ним как с таблицей
+        (см. archiveView). Настройка сохраняется в секции *_ARCHIVE.
+
+        Parameters
+        ----------
+        period : str, optional
+            Период шарда для archiveRows: "year" или "month".
+        """
+        self.config.setArchiveAttach(True, period, self.is_test)
+        self._archiveAttach = True
+        self._pool.reset()
+        self.refreshSchema()
+
+    def disableArchive(self) -> None:
+        """Выключение режима архивных шардов (файлы шардов остаются)"""
+        self.config.setArchiveAttach(False, is_test=self.is_test)
+        self._archiveAttach = False
+        self._pool.reset()
+        self.refreshSchema()
+
+    def archiveView(self, table: str) -> str:
+        """
+        Имя источника строк table вместе с архивом
+
+        `<table>_all`, если шарды присоединены и содержат table, иначе
+        table (только основная БД).
+
+        >>> DB.getRowsbyValues(DB.archiveView("links"), id_child=1)
+        """
+        view = Shards.viewName(table)
+        self._checkSchema()
+        return view if view in self._tableNames else table
+
+    def archiveRows(self, cutoff,
+                    tables: Iterable[str] = None,
+                    period: str = None,
+                    vacuum: bool = False) -> Dict[str, int]:
+        """
+        Перенос строк старше cutoff (по date_update) в архивные шарды
+
+        Строки раскладываются по файлам `<имя БД>_shard_<период>` в
+        archiveFolder. Сначала фиксируется запись в шарды, затем удаление
+        из основной БД, поэтому при сбое строки не теряются (повторный
+        вызов допишет их заново). Строка с максимальным id таблицы
+        остается в основной БД, чтобы новые id не повторяли архивные.
+
+        Parameters
+        ----------
+        cutoff : datetime or str
+            Граница: переносятся строки с date_update < cutoff.
+        tables : Iterable[str], optional
+            Таблицы (по умолчанию все таблицы с колонкой date_update).
+        period : str, optional
+            Период шарда "year" или "month" (по умолчанию из конфигурации).
+        vacuum : bool, optional
+            Выполнить VACUUM основной БД после переноса.
+
+        Returns
+        -------
+        dict
+            Число перенесенных строк по путям шардов.
+        """
+        cutoff = str(cutoff)
+        period = period or self.config.getArchivePeriod(self.is_test)
+        if period not in Shards.PERIODS:
+            raise DBError(f"Неизвестный период шарда: {period}")
+        tables = [table for table in self._trackedTables(tables)
+                  if Shards.DATE_COLUMN in self._schema(table)]
+        key_sql = Shards.periodSql(period)
+        condition = {
+            table: f"{Shards.DATE_COLUMN} < ? AND {key_sql} IS NOT NULL "
+                   f"AND id < (SELECT MAX(id) FROM main.{table})"
+            for table in tables}
+        keys = sorted({key for table in tables for (key,) in self.makeRequest(
+            f"SELECT DISTINCT {key_sql} FROM main.{table} "
+            f"WHERE {condition[table]}", cutoff)})
+        if not keys:
+            return {}
+        folder = self.config.getArchivesFolder(self.is_test)
+        os.makedirs(folder, exist_ok=True)
+        paths = {key: os.path.join(folder, Shards.shardName(self.filename,
+                                                            key))
+                 for key in keys}
+        schema, columns, indexes = {}, {}, {}
+        for table in tables:
+            schema[table] = self.makeRequest(
+                "SELECT sql FROM sqlite_master WHERE type = 'table' "
+                "AND name = ?", table)[0][0]
+            columns[table] = {row[1]: row[2] for row in self.makeRequest(
+                f"PRAGMA table_info({table})")}
+            indexes[table] = [row[0] for row in self.makeRequest(
+                "SELECT sql FROM sqlite_master WHERE type = 'index' "
+                "AND tbl_name = ? AND sql IS NOT NULL", table)]
+        for path in paths.values():
+            Shards.prepareShard(path, schema, columns, indexes)
+        moved = dict.fromkeys(paths.values(), 0)
+        try:
+            with self.writer(True) as cursor:
+                attached = {row[1] for row in
+                            cursor.execute("PRAGMA database_list")}
+                for key, path in paths.items():
+                    if Shards.alias(key) not in attached:
+                        cursor.execute(f"ATTACH DATABASE ? AS "
+                                       f"{Shards.alias(key)}", (path,))
+                for table in tables:
+                    names = self.j1(columns[table])
+                    for key, path in paths.items():
+                        cursor.execute(
+                            f"INSERT OR REPLACE INTO {Shards.alias(key)}."
+                            f"{table} ({names}) SELECT {names} FROM "
+                            f"main.{table} WHERE {condition[table]} "
+                            f"AND {key_sql} = ?", (cutoff, key))
+                        moved[path] += cursor.rowcount
+                cursor.connection.commit()
+                for table in tables:
+                    cursor.execute(f"DELETE FROM main.{table} WHERE "
+                                   f"{condition[table]} AND {key_sql} IN "
+                                   f"({self.j2(keys)})", [cutoff] + keys)
+                    self._invalidate(table)
+        finally:
+            # соединения переоткрываются с актуальным набором шардов
+            self._pool.reset()
+            self.refreshSchema()
+        if vacuum:
+            self.makeRequest("VACUUM")
+        return moved
+
+    def _trackedTables(self, tables: Iterable[str] = None) -> List[str]:
+        """Таблицы (не представления) с колонкой id, кроме журнала"""
+        names = [name for name in self._plainTables()
+                 if name != ChangeFeed.CHANGELOG]
+        if tables is not None:
+            unknown = set(tables) - set(names)
+            if unknown:
+                raise DBError(f"Несуществующие таблицы {sorted(unknown)}")
+            names = [name for name in names if name in tables]
+        return [name for name in names if "id" in self._schema(name)]
+
+    def enableChangeLog(self, tables: Iterable[str] = None) -> List[str]:
+        """
+        Включение журнала изменений changelog для changesSince
+
+        Создает таблицу changelog и триггеры INSERT/UPDATE/DELETE, которые
+        записывают в нее (таблица, id, операция). Повторный вызов ничего
+        не меняет.
+
+        Parameters
+        ----------
+        tables : Iterable[str], optional
+            Отслеживаемые таблицы (по умолчанию все таблицы с колонкой id).
+
+        Returns
+        -------
+        list
+            Отслеживаемые таблицы.
+        """
+        tables = self._trackedTables(tables)
+        with self.transaction() as cursor:
+            cursor.execute(ChangeFeed.CREATE_CHANGELOG)
+            for table in tables:
+                for txt in ChangeFeed.createTriggers(table):
+                    cursor.execute(txt)
+        self.refreshSchema()
+        return tables
+
+    def disableChangeLog(self, tables: Iterable[str] = None) -> None:
+        """Удаление триггеров журнала изменений (записи журнала остаются)"""
+        with self.transaction() as cursor:
+            for table in self._trackedTables(tables):
+                for txt in ChangeFeed.dropTriggers(table):
+                    cursor.execute(txt)
+        self.refreshSchema()
+
+    def purgeChangeLog(self, cursor: ChangeFeed.ChangeCursor) -> int:
+        """
+        Удаление записей журнала, прочитанных до позиции cursor
+
+        Последняя запись журнала сохраняется, чтобы номера seq не
+        начинались заново.
+
+        Returns
+        -------
+        int
+            Число удаленных записей.
+        """
+        txt = f"DELETE FROM {ChangeFeed.CHANGELOG} WHERE seq <= ? AND " \
+            f"seq < (SELECT MAX(seq) FROM {ChangeFeed.CHANGELOG})"
+        with self.writer() as db_cursor:
+            db_cursor.execute(txt, (ChangeFeed.ChangeCursor.of(cursor).seq,))
+            return db_cursor.rowcount
+
+    def changesSince(self, since=None,
+                     tables: Iterable[str] = None,
+                     limit: int = ChangeFeed.CHANGES_LIMIT,
+                     typed: bool = False
+                     ) -> Tuple[List[Dict[str, Any]], ChangeFeed.ChangeCursor]:
+        """
+        Изменения строк после позиции since
+
+        Позиция - номер записи журнала changelog (int, None - с начала;
+        нужен enableChangeLog) или момент времени (datetime или строка),
+        тогда изменения ищутся по колонке date_update (удаления не видны).
+        Вызов возвращает не более limit изменений и новую позицию;
+        синхронизация - повтор вызова с ней, пока список не пуст:
+
+        >>> changes, cursor = DB.changesSince(saved)
+        >>> while changes:
+        ...     apply(changes)
+        ...     changes, cursor = DB.changesSince(cursor)
+
+        Parameters
+        ----------
+        since : ChangeCursor, int, datetime or str, optional
+            Позиция, str(ChangeCursor) для сохраненной позиции.
+        tables : Iterable[str], optional
+            Таблицы (по умолчанию все отслеживаемые).
+        limit : int, optional
+            Максимальное число записей журнала (для date_update - строк
+            каждой таблицы) за вызов.
+        typed : bool, optional
+            Декодировать значения по типам колонок (DATETIME и т.п.).
+
+        Returns
+        -------
+        tuple
+            (изменения, новая позиция). Изменение - словарь table, op
+            ("I", "U", "D"), id, row (текущая строка, None для удаленной).
+            Несколько изменений строки в пределах вызова сводятся к
+            последнему.
+        """
+        cursor = ChangeFeed.ChangeCursor.of(since)
+        if cursor.seq is None:
+            return self._changesByDate(cursor, tables, limit, typed)
+        if ChangeFeed.CHANGELOG not in self.tables:
+            raise DBError("Журнал изменений не включен: enableChangeLog()")
+        txt = "SELECT seq, table_name, row_id, op FROM " \
+            f"{ChangeFeed.CHANGELOG} WHERE seq > ?"
+        args = [cursor.seq]
+        if tables is not None:
+            tables = list(tables)
+            txt += f" AND table_name IN ({self.j2(tables)})"
+            args += tables
+        log = self.makeRequest(txt + " ORDER BY seq LIMIT ?", *args, limit)
+        last = {}
+        for seq, table, id_, op in log:
+            last.pop((table, id_), None)
+            last[(table, id_)] = op
+        ids = {}
+        for (table, id_), op in last.items():
+            if op != "D":
+                ids.setdefault(table, []).append(id_)
+        rows = {table: self.getRowsByIds(table_ids, table, typed)
+                for table, table_ids in ids.items()}
+        changes = []
+        for (table, id_), op in last.items():
+            row = rows.get(table, {}).get(id_) or None
+            changes.append({"table": table, "op": op if row else "D",
+                            "id": id_, "row": row})
+        if log:
+            cursor.seq = log[-1][0]
+        return changes, cursor
+
+    def _changesByDate(self, cursor: ChangeFeed.ChangeCursor,
+                       tables: Iterable[str], limit: int, typed: bool
+                       ) -> Tuple[List[Dict[str, Any]],
+                                  ChangeFeed.ChangeCursor]:
+        """Изменения строк по колонке date_update после отметок cursor"""
+        changes = []
+        for table in self._trackedTables(tables):
+            if ChangeFeed.DATE_COLUMN not in self._schema(table):
+                continue
+            date, id_ = cursor.mark(table)
+            txt = f"SELECT * FROM {table} WHERE date_update > ? OR " \
+                "(date_update = ? AND id > ?) ORDER BY date_update, id LIMIT ?"
+            self._advisor.record(table, (ChangeFeed.DATE_COLUMN,))
+            with self as db_cursor:
+                db_cursor.execute(txt, (date, date, id_, limit))
+                columns = [d[0] for d in db_cursor.description]
+                rows = db_cursor.fetchall()
+            if not rows:
+                continue
+            date, id_ = (rows[-1][columns.index(name)]
+                         for name in (ChangeFeed.DATE_COLUMN, "id"))
+            cursor.marks[table] = (date, id_)
+            for row in self._toDicts(table, columns, rows, typed):
+                changes.append({"table": table, "op": "U", "id": row["id"],
+                                "row": row})
+        return changes, cursor
 
     @property
     def tables(self) -> Tuple[str]:
         """Получение имен таблиц БД"""
-        txt = "SELECT name FROM sqlite_master WHERE type IN ('table', 'view');"
+        txt = "SELECT name FROM sqlite_master WHERE type IN ('table', 'view') "\
+            "UNION ALL SELECT name FROM sqlite_temp_master WHERE type = 'view'"
         with self as cursor:
             cursor.execute(txt)
             return tuple(t[0] for t in cursor.fetchall())
@@ -158,16 +772,146 @@ class DataBase(DataBaseManager):
                 processed_columns.append(column_obj)
         return dict((col.name, col) for col in processed_columns)
 
+    def _checkSchema(self) -> None:
+        """Сброс кэша схемы, если изменился PRAGMA schema_version"""
+        with self as cursor:
+            cursor.execute("PRAGMA schema_version")
+            version = cursor.fetchone()[0]
+        if version != self._schemaVersion:
+            self._tableNames = frozenset(self.tables)
+            self._tables = {}
+            self._decoders = {}
+            self._shardPlan = None
+            self._schemaVersion = version
+
+    def refreshSchema(self) -> None:
+        """Принудительная перезагрузка кэша схемы при следующем обращении"""
+        self._schemaVersion = None
+        self._tables = {}
+        self._decoders = {}
+        self._shardPlan = None
+
+    def _schema(self, table: str) -> Dict[str, Column]:
+        """
+        Колонки таблицы table из кэша схемы
+
+        PRAGMA table_info выполняется при первом обращении к таблице.
+        PRAGMA schema_version проверяется один раз за выдачу соединения
+        потоку (внутри `with self`); вне выдачи используется кэш без
+        проверки, а схема перечитывается только для неизвестной таблицы.
+        Изменения схемы другими соединениями видны в блоке `with self`.
+        """
+        checkout = self._pool.checkout
+        if checkout and \
+                getattr(self._local, 'schema_checkout', None) != checkout:
+            self._checkSchema()
+            self._local.schema_checkout = checkout
+        columns = self._tables.get(table)
+        if columns is None:
+            if table not in self._tableNames:
+                self._checkSchema()
+                if table not in self._tableNames:
+                    raise DBError(f"Несуществующая таблица {table}")
+            columns = self._getColumns(table)
+            self._tables[table] = columns
+        return columns
+
     def getColumnsNames(self, table: str) -> Tuple[str]:
         """Получение названия колонок таблицы table"""
-        if table not in self._tables:
-            raise DBError(f"Несуществующая таблица {table}")
-        return tuple(col for col in self._tables[table])
+        return tuple(col for col in self._schema(table))
+
+    def _decoder(self, table: str,
+                 names: Tuple[str, ...]) -> Callable[[tuple], list]:
+        """
+        Функция типизированного декодирования строки таблицы table
+
+        Преобразователи колонок собираются один раз на набор колонок
+        names; колонки, которые sqlite возвращает в нужном типе,
+        пропускаются. None, если декодировать нечего.
+        """
+        key = (table, names)
+        if key in self._decoders:
+            return self._decoders[key]
+        columns = self.getColumns(table)
+        converters = tuple((i, columns[name].converter)
+                           for i, name in enumerate(names)
+                           if name in columns
+                           and columns[name].converter is not None)
+        decode = None
+        if converters:
+            def decode(row: tuple) -> list:
+                row = list(row)
+                for i, convert in converters:
+                    if row[i] is not None:
+                        row[i] = convert(row[i])
+                return row
+        self._decoders[key] = decode
+        return decode
+
+    def _toDicts(self, table: str, names: List[str], rows: List[tuple],
+                 typed: bool = False) -> List[Dict[str, Any]]:
+        """Преобразование строк в словари (с декодированием типов)"""
+        if typed:
+            decode = self._decoder(table, tuple(names))
+            if decode is not None:
+                return [dict(zip(names, decode(row))) for row in rows]
+        return [dict(zip(names, row)) for row in rows]
 
     def getColumns(self, table: str) -> Dict[str, Column]:
-        if table not in self._tables:
-            raise DBError(f"Несуществующая таблица {table}")
-        return self._tables[table]
+        return self._schema(table)
+
+    @staticmethod
+    def _isRequest(txt: str, statements: Tuple[str, ...]) -> bool:
+        """Запрос начинается с одного из операторов statements"""
+        words = txt.lstrip(" \t\n(").split(None, 1)
+        return bool(words) and words[0].upper() in statements
+
+    @staticmethod
+    @lru_cache(maxsize=QUERY_CACHE_SIZE)
+    def _mainStatement(txt: str) -> str:
+        """
+        Основной оператор запроса `WITH ... <оператор>`
+
+        Первое слово из CTE_STATEMENTS вне скобок, комментариев, строк
+        и идентификаторов в кавычках, то есть после списка CTE; пустая
+        строка, если не найдено.
+        """
+        depth = 0
+        i = 0
+        while i < len(txt):
+            char = txt[i]
+            if txt.startswith(("--", "/*"), i):
+                end = txt.find("\n" if char == "-" else "*/", i + 2)
+                i = len(txt) if end < 0 else end + 2
+                continue
+            if char in "'\"`[":
+                end = txt.find("]" if char == "[" else char, i + 1)
+                i = len(txt) if end < 0 else end + 1
+                continue
+            if char == "(":
+                depth += 1
+            elif char == ")":
+                depth -= 1
+            elif depth == 0 and (char.isalpha() or char == "_"):
+                start = i
+                while i < len(txt) and (txt[i].isalnum() or txt[i] == "_"):
+                    i += 1
+                word = txt[start:i].upper()
+                if word in CTE_STATEMENTS:
+                    return word
+                continue
+            i += 1
+        return ""
+
+    @classmethod
+    def _isReadRequest(cls, txt: str) -> bool:
+        """Запрос только читает данные и может выполняться читателем
+
+        Для `WITH ...` проверяется основной оператор после списка CTE.
+        """
+        if cls._isRequest(txt, ("WITH",)):
+            return cls._mainStatement(txt) in READ_STATEMENTS
+        return cls._isRequest(txt, READ_STATEMENTS)
 
     def makeRequest(self, txt: str, *args) -> List:
         """
@@ -185,17 +929,176 @@ class DataBase(DataBaseManager):
         list
             Результат выполнения запроса.
         """
-        with self as cursor:
+        if self._isReadRequest(txt):
+            context = self
+        else:
+            context = self.writer()
+            self._invalidate()
+        with context as cursor:
             if args:
                 cursor.execute(txt, args)
             else:
                 cursor.execute(txt)
-            return cursor.fetchall()
+            rows = cursor.fetchall()
+        if self._isRequest(txt, SCHEMA_STATEMENTS):
+            self.refreshSchema()
+        return rows
+
+    def iterRequest(self, txt: str, *args,
+                    batch_size: int = FETCH_BATCH_SIZE) -> Iterator[List]:
+        """
+        Потоковое выполнение SQL запроса на чтение
+
+        Соединение удерживается, пока итератор не исчерпан или не закрыт
+        (используйте contextlib.closing при досрочном выходе).
+
+        Parameters
+        ----------
+        txt : str
+            Текст SQL запроса.
+        *args
+            Аргументы для SQL запроса.
+        batch_size : int, optional
+            Число строк в одной порции fetchmany.
+
+        Yields
+        ------
+        list
+            Порции строк результата.
+        """
+        with self.reader() as cursor:
+            cursor.execute(txt, args)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+
+    def iterRows(self, table: str,
+                 operator: Callable = all,
+                 typed: bool = False,
+                 batch_size: int = FETCH_BATCH_SIZE,
+                 **kwargs) -> Iterator[Dict[str, Any]]:
+        """
+        Потоковое получение строк таблицы по заданным ключам и значениям
+
+        Parameters
+        ----------
+        table : str
+            Название таблицы.
+        typed : bool, optional
+            Декодировать значения по типам колонок (DATETIME и т.п.).
+        batch_size : int, optional
+            Число строк в одной порции fetchmany.
+        **kwargs
+            Ключи и значения для поиска (без них - вся таблица).
+
+        Yields
+        ------
+        dict
+            Строки таблицы в виде словарей.
+        """
+        if kwargs:
+            txt = self._selectQuery(table, "*", tuple(kwargs), operator)
+        else:
+            txt = f"SELECT * FROM {table}"
+        with self.reader() as cursor:
+            cursor.execute(txt, list(kwargs.values()))
+            keys = [d[0] for d in cursor.description]
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from self._toDicts(table, keys, rows, typed)
+
+    def getColumnsArrays(self, table: str,
+                         columns: Iterable[str] = None,
+                         operator: Callable = all,
+                         structured: bool = False,
+                         batch_size: int = FETCH_BATCH_SIZE,
+                         **kwargs) -> Dict[str, Any]:
+        """
+        Колоночная выборка строк таблицы в массивы NumPy
+
+        Типы массивов берутся из типов колонок: INTEGER - int64,
+        REAL - float64, DATETIME - datetime64, прочие - object.
+        Требует установленного numpy.
+
+        Parameters
+        ----------
+        table : str
+            Название таблицы.
+        columns : Iterable[str], optional
+            Колонки выборки (по умолчанию все).
+        structured : bool, optional
+            Вернуть структурированный массив вместо словаря массивов.
+        batch_size : int, optional
+            Число строк в одной порции fetchmany.
+        **kwargs
+            Ключи и значения для поиска (без них - вся таблица).
+
+        Returns
+        -------
+        dict or numpy.recarray
+            Массивы по именам колонок или структурированный массив.
+        """
+        from . import Columnar
+        with self as cursor:
+            table_columns = self.getColumns(table)
+            names = tuple(columns) if columns else tuple(table_columns)
+            if kwargs:
+                txt = self._selectQuery(table, self.j1(names), tuple(kwargs),
+                                        operator)
+            else:
+                txt = f"SELECT {self.j1(names)} FROM {table}"
+            dtypes = {name: Columnar.DTYPES.get(
+                table_columns[name].col_type.name)
+                for name in names if name in table_columns}
+            cursor.execute(txt, list(kwargs.values()))
+            result = Columnar.fetchColumns(cursor, dtypes, batch_size)
+        return Columnar.toRecords(result) if structured else result
+
+    def requestArrays(self, txt: str, *args,
+                      dtypes: Dict[str, Any] = None,
+                      structured: bool = False,
+                      batch_size: int = FETCH_BATCH_SIZE) -> Dict[str, Any]:
+        """
+        Колоночное выполнение SQL запроса на чтение в массивы NumPy
+
+        Parameters
+        ----------
+        txt : str
+            Текст SQL запроса.
+        *args
+            Аргументы для SQL запроса.
+        dtypes : dict, optional
+            Типы массивов по именам колонок результата (имена типов
+            колонок "INTEGER", "DATETIME", ... или типы NumPy).
+        structured : bool, optional
+            Вернуть структурированный массив вместо словаря массивов.
+        batch_size : int, optional
+            Число строк в одной порции fetchmany.
+
+        Returns
+        -------
+        dict or numpy.recarray
+            Массивы по именам колонок или структурированный массив.
+        """
+        from . import Columnar
+        import numpy as np
+        dtypes = {name: Columnar.DTYPES[dtype] if dtype in Columnar.DTYPES
+                  else np.dtype(dtype)
+                  for name, dtype in (dtypes or {}).items()}
+        with self as cursor:
+            cursor.execute(txt, args)
+            result = Columnar.fetchColumns(cursor, dtypes, batch_size)
+        return Columnar.toRecords(result) if structured else result
 
     def getRowByValue(self,
                       value: any,
                       table: str,
-                      key: str = "name") -> Dict[str, Any]:
+                      key: str = "name",
+                      typed: bool = False) -> Dict[str, Any]:
         """
         Получение значений из таблицы по заданному ключу и значению
 
@@ -207,22 +1110,30 @@ class DataBase(DataBaseManager):
             Название таблицы.
         key : str, optional
             Ключ для поиска, по умолчанию "name".
+        typed : bool, optional
+            Декодировать значения по типам колонок (DATETIME и т.п.).
 
         Returns
         -------
         dict
             Значения из таблицы в виде словаря.
         """
-        txt = f'SELECT * FROM {table} WHERE {key} = ?'
-        with self as cursor:
-            cursor.execute(txt, (value,))
-            values = cursor.fetchone()
-            columns = list(map(lambda x: x[0], cursor.description))
-            if not values:
-                return {}
-                raise DBError(f"Не найден в таблице {table} в колонке "
-                              f"{key} значение {value}")
-            return dict(zip(columns, values))
+        def load():
+            txt = self._selectQuery(table, "*", (key,))
+            with self as cursor:
+                cursor.execute(txt, (value,))
+                values = cursor.fetchone()
+                columns = list(map(lambda x: x[0], cursor.description))
+                if not values:
+                    return {}
+                    raise DBError(f"Не найден в таблице {table} в колонке "
+                                  f"{key} значение {value}")
+                return dict(zip(columns, values))
+        row = self._cached(table, ("*", key, value), load)
+        if typed and row:
+            return self._toDicts(table, list(row), [tuple(row.values())],
+                                 typed)[0]
+        return dict(row)
 
     def getIDbyValue(self,
                      value: any,
@@ -245,12 +1156,15 @@ class DataBase(DataBaseManager):
         int or None
             ID найденной записи или None, если запись не найдена.
         """
-        with self as cursor:
-            cursor.execute(f'SELECT id FROM {table} WHERE {key} = ?', (value,))
-            id_ = cursor.fetchone()
-        if id_ is None:
-            return None
-        return id_[0]
+        def load():
+            with self as cursor:
+                cursor.execute(self._selectQuery(table, "id", (key,)),
+                               (value,))
+                id_ = cursor.fetchone()
+            if id_ is None:
+                return None
+            return id_[0]
+        return self._cached(table, ("id", key, value), load)
 
     def getRowsbyColumn(self,
                         table: str,
@@ -276,26 +1190,338 @@ class DataBase(DataBaseManager):
         return l
 
     def getIdsFromView(self, table: str, links: list, tags: set) -> list:
-        links = [l["id"] for l in links]
-        tag_exists = any(col == 'tag' for col in self.getColumns(table))
+        """
+        Получение пар (links.id, links.id_child) для ссылок links
+
+        Если в таблице table есть колонка tag, остаются только ссылки,
+        дочерняя запись которых имеет один из тегов tags.
+
+        Parameters
+        ----------
+        table : str
+            Название таблицы дочерних записей.
+        links : list
+            Ссылки (словари с ключом "id").
+        tags : set
+            Теги (объекты с атрибутом id).
+
+        Returns
+        -------
+        list
+            Кортежи (links.id, links.id_child), упорядоченные по links.id.
+        """
+        ids = sorted({l["id"] for l in links})
+        if not ids:
+            return []
+        tag_ids = []
+        txt = "SELECT links.id, links.id_child FROM links "
+        rows = []
         with self as cursor:
-            cursor.execute(f"DROP VIEW IF EXISTS view_{table};")
-            txt = f"""
-            CREATE VIEW view_{table} AS
-            SELECT links.id, links.id_child
-            FROM links
-            """
-            if tag_exists:
-                ids = [f"{table}.tag = {tag.id}" for tag in tags]
-                txt += f"""INNER JOIN {table} ON links.id_child = {table}.id
-                AND ({' OR '.join(ids)})
-                """
-            cursor.execute(txt)
+            if "tag" in self.getColumns(table):
+                tag_ids = sorted({tag.id for tag in tags})
+                if not tag_ids:
+                    return []
+                txt += f"INNER JOIN {table} ON links.id_child = {table}.id "\
+                    f"AND {table}.tag IN ({self.j2(tag_ids)}) "
+            limit = self._variableLimit(cursor.connection) - len(tag_ids)
+            if len(ids) > limit * IN_CHUNKS_LIMIT:
+                self._fillLookup(cursor, ids)
+                cursor.execute(txt + "WHERE links.id IN "
+                               "(SELECT value FROM temp.lookup_values) "
+                               "ORDER BY links.id", tag_ids)
+                rows = cursor.fetchall()
+                cursor.execute("DELETE FROM temp.lookup_values")
+                return rows
+            for i in range(0, len(ids), limit):
+                chunk = ids[i:i + limit]
+                cursor.execute(txt + f"WHERE links.id IN ({self.j2(chunk)}) "
+                               "ORDER BY links.id", tag_ids + chunk)
+                rows.extend(cursor.fetchall())
+        return rows
+
+    def _traverse(self, ids: Iterable[int], direction: Tuple[str, str],
+                  depth: int, table: str, tags: set,
+                  edges: bool = False) -> List[tuple]:
+        """Обход links от узлов ids одним запросом (см. getDescendants)"""
+        ids = sorted(set(ids))
         with self as cursor:
-            cursor.execute(f"SELECT * FROM view_{table}")
+            # схема проверяется в той же выдаче соединения, что и запрос
+            self._schema(Graph.LINKS)
+            tag_ids = []
+            if table is not None and "tag" in self.getColumns(table):
+                tag_ids = sorted({tag.id for tag in tags or ()})
+                if not tag_ids:
+                    return []
+            if not ids:
+                return []
+            closure = Graph.CLOSURE in self._tableNames
+            if len(ids) + len(tag_ids) > self._variableLimit(
+                    cursor.connection):
+                self._fillLookup(cursor, ids)
+                roots, args = "SELECT value AS node FROM temp.lookup_values", []
+            else:
+                roots, args = Graph.rootsSql(len(ids)), ids
+            if closure:
+                txt = Graph.closureSql(roots, direction, depth)
+                args = args * 2
+            else:
+                txt = Graph.traverseSql(roots, direction, depth)
+            if edges:
+                txt += f"SELECT {Graph.LINKS}.{Graph.PARENT}, "\
+                    f"{Graph.LINKS}.{Graph.CHILD}, MIN(tree.depth) FROM tree "\
+                    f"JOIN {Graph.LINKS} ON "\
+                    f"{Graph.LINKS}.{Graph.PARENT} = tree.node "\
+                    f"AND {Graph.LINKS}.{Graph.CHILD} IS NOT NULL "
+                if tag_ids:
+                    txt += f"JOIN {table} ON {table}.id = "\
+                        f"{Graph.LINKS}.{Graph.CHILD} AND {table}.tag IN "\
+                        f"({self.j2(tag_ids)}) "
+                if depth is not None:
+                    txt += f"WHERE tree.depth < {int(depth)} "
+                txt += "GROUP BY 1, 2 ORDER BY 3, 1, 2"
+            else:
+                txt += "SELECT tree.node, MIN(tree.depth) FROM tree "
+                if tag_ids:
+                    txt += Graph.tagFilterSql(table, len(tag_ids))
+                txt += "WHERE tree.depth > 0 GROUP BY tree.node ORDER BY 2, 1"
+            cursor.execute(txt, args + tag_ids)
             rows = cursor.fetchall()
-            rows = list(filter(lambda r: r[0] in links, rows))
-            return rows
+            if roots.endswith("lookup_values"):
+                cursor.execute("DELETE FROM temp.lookup_values")
+        return rows
+
+    def getDescendants(self, id_: int, depth: int = None,
+                       table: str = None,
+                       tags: set = None) -> List[Tuple[int, int]]:
+        """
+        Потомки узла по связям links (id -> id_child) одним запросом
+
+        Обход выполняется WITH RECURSIVE с защитой от циклов, либо по
+        closure table, если она создана enableClosure() (связи без
+        циклов).
+
+        Parameters
+        ----------
+        id_ : int
+            Идентификатор начального узла.
+        depth : int, optional
+            Максимальная глубина (None - без ограничения).
+        table : str, optional
+            Таблица узлов для фильтра по тегам (как в getIdsFromView).
+        tags : set, optional
+            Теги (объекты с атрибутом id), если в table есть колонка tag.
+
+        Returns
+        -------
+        list
+            Кортежи (id узла, глубина), упорядоченные по глубине и id.
+        """
+        return self._traverse((id_,), Graph.DOWN, depth, table, tags)
+
+    def getAncestors(self, id_: int, depth: int = None,
+                     table: str = None,
+                     tags: set = None) -> List[Tuple[int, int]]:
+        """
+        Предки узла по связям links (id_child -> id) одним запросом
+
+        Параметры и результат - как у getDescendants.
+        """
+        return self._traverse((id_,), Graph.UP, depth, table, tags)
+
+    def getSubtree(self, ids: Iterable[int], depth: int = None,
+                   table: str = None,
+                   tags: set = None) -> List[Tuple[int, int, int]]:
+        """
+        Связи поддеревьев узлов ids одним запросом
+
+        Parameters
+        ----------
+        ids : Iterable[int]
+            Идентификаторы корней поддеревьев.
+        depth : int, optional
+            Максимальная глубина дочерних узлов (None - без ограничения).
+        table : str, optional
+            Таблица узлов для фильтра дочерних узлов по тегам.
+        tags : set, optional
+            Теги (объекты с атрибутом id), если в table есть колонка tag.
+
+        Returns
+        -------
+        list
+            Кортежи (links.id, links.id_child, глубина links.id от
+            ближайшего корня), упорядоченные по глубине.
+        """
+        return self._traverse(ids, Graph.DOWN, depth, table, tags,
+                              edges=True)
+
+    def enableClosure(self) -> None:
+        """
+        Создание closure table links_closure (предок, потомок, глубина)
+
+        Таблица заполняется по текущим links и далее поддерживается
+        триггерами при вставке, изменении и удалении связей; обход в
+        getDescendants/getAncestors/getSubtree идет по ней без рекурсии.
+        Триггеры точны только для связей без циклов, поэтому links с
+        циклом не принимаются (DBError), а вставка или изменение связи,
+        замыкающее цикл, отклоняется триггером (sqlite3.IntegrityError).
+        """
+        self._schema(Graph.LINKS)
+        with self.transaction() as cursor:
+            for txt in Graph.closureStatements():
+                cursor.execute(txt)
+            cursor.execute(Graph.CYCLE_SQL)
+            cycle = cursor.fetchone()
+            if cycle is not None:
+                raise DBError(f"Цикл в {Graph.LINKS} через узел {cycle[0]}: "
+                              "closure table требует связей без циклов")
+        self.refreshSchema()
+
+    def disableClosure(self) -> None:
+        """Удаление closure table и ее триггеров"""
+        with self.transaction() as cursor:
+            for txt in Graph.DROP_CLOSURE:
+                cursor.execute(txt)
+        self.refreshSchema()
+
+    def _searchColumns(self, table: str,
+                       columns: Iterable[str] = None) -> Tuple[str, ...]:
+        """Колонки TEXT таблицы для полнотекстового индекса"""
+        schema = self._schema(table)
+        text = tuple(name for name, column in schema.items()
+                     if column.col_type == self.Column.Type.TEXT)
+        if columns is None:
+            columns = text
+        columns = tuple(columns)
+        wrong = [column for column in columns if column not in text]
+        if wrong or not columns:
+            raise DBError(f"Нет колонок TEXT {wrong or ''} для "
+                          f"полнотекстового поиска в таблице {table}")
+        if "id" not in schema:
+            raise DBError(f"Нет колонки id в таблице {table}")
+        return columns
+
+    def enableSearch(self, table: str = None,
+                     columns: Iterable[str] = None) -> None:
+        """
+        Создание полнотекстового индекса FTS5 `<table>_fts`
+
+        Индекс заполняется по текущим данным и далее поддерживается
+        триггерами. Повторный вызов для существующего индекса ничего не
+        меняет.
+
+        Parameters
+        ----------
+        table : str, optional
+            Таблица (по умолчанию все таблицы секции *_FTS конфигурации).
+        columns : Iterable[str], optional
+            Колонки TEXT (по умолчанию - из конфигурации или все TEXT).
+        """
+        tables = self.config.getSearchTables(self.is_test)
+        if table is not None:
+            tables = {table: columns or tables.get(table)}
+        tokenize = self.config.getSearchTokenize(self.is_test) \
+            or FullText.TOKENIZE
+        self._checkSchema()
+        # без транзакции (блокировки записи), если все индексы уже есть
+        missing = {name: self._searchColumns(name, names)
+                   for name, names in tables.items()
+                   if FullText.ftsName(name) not in self._tableNames}
+        if not missing:
+            return
+        try:
+            with self.transaction() as cursor:
+                for name, names in missing.items():
+                    for txt in FullText.createSql(name, names, tokenize):
+                        cursor.execute(txt)
+                    cursor.execute(FullText.rebuildSql(name))
+        except sqlite3.OperationalError as e:
+            raise DBError(f"Ошибка создания индекса FTS5: {e}", e)
+        self.refreshSchema()
+
+    def disableSearch(self, table: str) -> None:
+        """Удаление полнотекстового индекса таблицы и его триггеров"""
+        with self.transaction() as cursor:
+            for txt in FullText.dropSql(table):
+                cursor.execute(txt)
+        self.refreshSchema()
+
+    def rebuildSearch(self, table: str = None) -> None:
+        """
+        Перестроение полнотекстовых индексов по текущим данным
+
+        Нужно после изменений таблицы в обход триггеров (например, при
+        импорте с отключенными триггерами или восстановлении из архива).
+
+        Parameters
+        ----------
+        table : str, optional
+            Таблица (по умолчанию все таблицы с индексом).
+        """
+        self._checkSchema()
+        tables = [table] if table is not None else \
+            [name[:-len(FullText.SUFFIX)] for name in self._tableNames
+             if name.endswith(FullText.SUFFIX)
+             and name[:-len(FullText.SUFFIX)] in self._tableNames]
+        with self.writer() as cursor:
+            for name in tables:
+                cursor.execute(FullText.rebuildSql(name))
+            cursor.execute("PRAGMA optimize")
+
+    def search(self, table: str, query: str,
+               limit: int = FullText.SEARCH_LIMIT,
+               rank: bool = True,
+               prefix: bool = True,
+               raw: bool = False,
+               typed: bool = False) -> List[Dict[str, Any]]:
+        """
+        Полнотекстовый поиск строк таблицы
+
+        Parameters
+        ----------
+        table : str
+            Название таблицы с индексом (enableSearch).
+        query : str
+            Строка поиска: все слова должны встретиться в строке.
+        limit : int, optional
+            Максимальное число строк (None - без ограничения).
+        rank : bool, optional
+            Упорядочить по релевантности (bm25), иначе по id.
+        prefix : bool, optional
+            Искать слова как начало слов ("ива" найдет "Иванов").
+        raw : bool, optional
+            query - выражение MATCH в синтаксисе FTS5 (как есть).
+        typed : bool, optional
+            Декодировать значения по типам колонок (DATETIME и т.п.).
+
+        Returns
+        -------
+        list
+            Найденные строки в виде словарей.
+        """
+        fts = FullText.ftsName(table)
+        match = query if raw else FullText.matchQuery(query, prefix)
+        txt = f"SELECT {table}.* FROM {fts} JOIN {table} " \
+            f"ON {table}.id = {fts}.rowid WHERE {fts} MATCH ? " \
+            f"ORDER BY {f'{fts}.rank' if rank else f'{table}.id'}"
+        args = [match]
+        if limit is not None:
+            txt += " LIMIT ?"
+            args.append(limit)
+        try:
+            with self as cursor:
+                # schema_version проверяется один раз за выдачу (_schema)
+                self._schema(table)
+                if fts not in self._tableNames:
+                    raise DBError(f"Нет полнотекстового индекса таблицы "
+                                  f"{table}: enableSearch()")
+                if not match:
+                    return []
+                cursor.execute(txt, args)
+                columns = [d[0] for d in cursor.description]
+                rows = cursor.fetchall()
+        except sqlite3.OperationalError as e:
+            raise DBError(f"Ошибка полнотекстового поиска: {e}", e)
+        return self._toDicts(table, columns, rows, typed)
 
     def getValueByValues(self, table: str,
                          column: str = "name",
@@ -318,12 +1544,10 @@ class DataBase(DataBaseManager):
         any or None
             Найденное значение из таблицы или None, если запись не найдена.
         """
-        join_func = self._get_func(operator)
         if not kwargs:
             raise AttributeError("Не заданы значения для поиска")
         with self as cursor:
-            txt = f'SELECT {column} FROM {table} WHERE '\
-                f'{join_func(list(kwargs.keys()))}'
+            txt = self._selectQuery(table, column, tuple(kwargs), operator)
             cursor.execute(txt, list(kwargs.values()))
             values = cursor.fetchone()
             if values:
@@ -332,6 +1556,7 @@ class DataBase(DataBaseManager):
 
     def getRowByValues(self, table: str,
                        operator: Callable = all,
+                       typed: bool = False,
                        **kwargs) -> any:
         """
         Получение значения из таблицы по заданным ключам и значениям
@@ -342,6 +1567,8 @@ class DataBase(DataBaseManager):
             Название таблицы.
         tag : str, optional
             Тег для возвращения, по умолчанию "name".
+        typed : bool, optional
+            Декодировать значения по типам колонок (DATETIME и т.п.).
         **kwargs
             Ключи и значения для поиска.
 
@@ -350,15 +1577,13 @@ class DataBase(DataBaseManager):
         any or None
             Найденное значение из таблицы или None, если запись не найдена.
         """
-        join_func = self._get_func(operator)
-        columns = self.getColumnsNames(table)
         with self as cursor:
-            txt = f'SELECT * FROM {table} WHERE '\
-                f'{join_func(list(kwargs.keys()))}'
+            txt = self._selectQuery(table, "*", tuple(kwargs), operator)
             cursor.execute(txt, list(kwargs.values()))
             values = cursor.fetchone()
             if values:
-                return dict(zip(columns, values))
+                columns = [d[0] for d in cursor.description]
+                return self._toDicts(table, columns, [values], typed)[0]
         return {}
 
     def getValueByValue(self,
@@ -385,7 +1610,7 @@ class DataBase(DataBaseManager):
         any
             Найденное значение из таблицы.
         """
-        txt = f'SELECT {columnOut} FROM {table} WHERE {columnIn} = ?'
+        txt = self._selectQuery(table, columnOut, (columnIn,))
         with self as cursor:
             cursor.execute(txt, (value,))
             v = cursor.fetchall()
@@ -413,14 +1638,17 @@ class DataBase(DataBaseManager):
         any
             Найденное значение из таблицы.
         """
-        with self as cursor:
-            txt = f'SELECT {key} FROM {table} WHERE id = ?'
-            cursor.execute(txt, (id_,))
-            value = cursor.fetchone()
+        def load():
+            with self as cursor:
+                txt = self._selectQuery(table, key, ("id",))
+                cursor.execute(txt, (id_,))
+                return cursor.fetchone()
+        value = self._cached(table, (key, "id", id_), load)
         return value[0]
 
     def getRowsbyValues(self, table: str,
                         operator=all,
+                        typed: bool = False,
                         **kwargs) -> List[dict]:
         """
         Получение всех строк из таблицы по заданным ключам и значениям
@@ -429,6 +1657,8 @@ class DataBase(DataBaseManager):
         ----------
         table : str
             Название таблицы.
+        typed : bool, optional
+            Декодировать значения по типам колонок (DATETIME и т.п.).
         **kwargs
             Ключи и значения для поиска.
 
@@ -437,13 +1667,95 @@ class DataBase(DataBaseManager):
         list
             Список словарей с найденными значениями из таблицы.
         """
-        join_func = self._get_func(operator)
-        txt = f'SELECT * FROM {table} WHERE {join_func(list(kwargs.keys()))}'
+        txt = self._selectQuery(table, "*", tuple(kwargs), operator)
         with self as cursor:
             cursor.execute(txt, list(kwargs.values()))
             keys = list(map(lambda x: x[0], cursor.description))
             values = cursor.fetchall()
-        return list(map(lambda value: dict(zip(keys, value)), values))
+        return self._toDicts(table, keys, values, typed)
+
+    def getIDsByValues(self,
+                       values: Iterable,
+                       table: str,
+                       key: str = "name") -> Dict[Any, int]:
+        """
+        Получение ID из таблицы для набора значений ключа
+
+        Parameters
+        ----------
+        values : Iterable
+            Значения ключа для поиска.
+        table : str
+            Название таблицы.
+        key : str, optional
+            Ключ для поиска, по умолчанию "name".
+
+        Returns
+        -------
+        dict
+            Словарь {значение: ID}, None для ненайденных значений.
+        """
+        values = list(values)
+        result = dict.fromkeys(values)
+        for value, id_ in self._selectIn(table, "id", key, values)[1]:
+            if result.get(value) is None:
+                result[value] = id_
+        return result
+
+    def getValuesByIds(self,
+                       ids: Iterable[int],
+                       table: str,
+                       key: str = "name") -> Dict[int, Any]:
+        """
+        Получение значений из таблицы для набора ID
+
+        Parameters
+        ----------
+        ids : Iterable[int]
+            Идентификаторы записей.
+        table : str
+            Название таблицы.
+        key : str, optional
+            Колонка значения, по умолчанию "name".
+
+        Returns
+        -------
+        dict
+            Словарь {ID: значение}, None для ненайденных ID.
+        """
+        ids = list(ids)
+        result = dict.fromkeys(ids)
+        result.update(self._selectIn(table, key, "id", ids)[1])
+        return result
+
+    def getRowsByIds(self,
+                     ids: Iterable[int],
+                     table: str,
+                     typed: bool = False) -> Dict[int, Dict[str, Any]]:
+        """
+        Получение строк из таблицы для набора ID
+
+        Parameters
+        ----------
+        ids : Iterable[int]
+            Идентификаторы записей.
+        table : str
+            Название таблицы.
+        typed : bool, optional
+            Декодировать значения по типам колонок (DATETIME и т.п.).
+
+        Returns
+        -------
+        dict
+            Словарь {ID: строка в виде словаря}, {} для ненайденных ID.
+        """
+        ids = list(ids)
+        result = {id_: {} for id_ in ids}
+        columns, rows = self._selectIn(table, "*", "id", ids)
+        dicts = self._toDicts(table, columns[1:], [row[1:] for row in rows],
+                              typed)
+        result.update(zip((row[0] for row in rows), dicts))
+        return result
 
     # def getConnectsItems(self, id_link:int) -> List[list]:
     #     """
@@ -475,6 +1787,55 @@ class DataBase(DataBaseManager):
             if v is None:
                 del kwargs[k]
 
+    def startWriteQueue(self,
+                        max_batch: int = WriteQueue.MAX_BATCH,
+                        max_delay: float = WriteQueue.MAX_DELAY,
+                        retries: int = WriteQueue.RETRIES,
+                        backoff: float = WriteQueue.BACKOFF
+                        ) -> WriteQueue.WriteQueue:
+        """
+        Включение режима очереди записи с групповой фиксацией
+
+        insertObject и deleteById из любых потоков передаются единственному
+        потоку записи и фиксируются пакетами (autocommit игнорируется),
+        вызов ждет фиксации своего пакета. Без ожидания - через Future
+        методов возвращаемой очереди. Вызовы внутри writer()/transaction()
+        выполняются напрямую.
+
+        Parameters
+        ----------
+        max_batch : int, optional
+            Максимальное число операций в одной транзакции.
+        max_delay : float, optional
+            Максимальное ожидание пополнения пакета в секундах.
+        retries : int, optional
+            Число повторов пакета при занятости БД другим процессом.
+        backoff : float, optional
+            Начальная задержка повтора в секундах (удваивается).
+
+        Returns
+        -------
+        WriteQueue
+            Запущенная очередь записи.
+        """
+        self.stopWriteQueue()
+        self._writeQueue = WriteQueue.WriteQueue(self, max_batch, max_delay,
+                                                 retries, backoff)
+        self._writeQueue.start()
+        return self._writeQueue
+
+    def stopWriteQueue(self) -> None:
+        """Выполнение оставшихся операций и выключение очереди записи"""
+        write_queue, self._writeQueue = self._writeQueue, None
+        if write_queue is not None:
+            write_queue.stop()
+
+    def _queued(self) -> bool:
+        """Запись нужно передать в очередь записи"""
+        write_queue = self._writeQueue
+        return write_queue is not None and not write_queue.isWriter() \
+            and not self._pool.depth
+
     def insertObject(self,
                      table: str,
                      autocommit: bool,
@@ -494,15 +1855,16 @@ class DataBase(DataBaseManager):
         int
             Идентификатор вставленной записи.
         """
-        print(kwargs)
+        if self._queued():
+            return self._writeQueue.insertObject(table, **kwargs).result()
         id_ = kwargs.pop("id") if "id" in list(kwargs.keys()) else None
         self.filterKwargs(kwargs)
-        self._autocommit = autocommit
         if id_:
             cut = self.j1([f"{k}='{v}'" for k, v in kwargs.items()])
             txt = f'UPDATE {table} SET {cut} WHERE id = {id_}'
-            with self as cursor:
+            with self.writer(autocommit) as cursor:
                 cursor.execute(txt,)
+                self._invalidate(table)
             return id_
         else:
             columns = list(kwargs.keys())
@@ -511,10 +1873,125 @@ class DataBase(DataBaseManager):
                 raise AttributeError("Не указаны аргументы")
             txt = f'INSERT INTO {table} ({self.j1(columns)}) VALUES '\
                 f'({self.j2(columns)})'
-            with self as cursor:
+            with self.writer(autocommit) as cursor:
                 cursor.execute(txt, values)
+                self._invalidate(table)
             return cursor.lastrowid
 
+    def insertMany(self,
+                   table: str,
+                   rows: Iterable[Dict[str, Any]],
+                   on_conflict: str = None,
+                   conflict: Iterable[str] = None,
+                   autocommit: bool = True) -> List[int]:
+        """
+        Пакетная вставка объектов в таблицу одной транзакцией
+
+        Строки группируются по набору колонок. Группа с колонкой id или
+        с on_conflict="UPDATE" вставляется одним executemany, остальные -
+        построчно одним подготовленным выражением, чтобы id каждой строки
+        брался из БД (lastrowid), а не вычислялся.
+
+        Parameters
+        ----------
+        table : str
+            Название таблицы.
+        rows : Iterable[dict]
+            Параметры объектов для вставки.
+        on_conflict : str, optional
+            Поведение при конфликте: None (ошибка), "IGNORE", "REPLACE"
+            (INSERT OR ...) или "UPDATE" (ON CONFLICT DO UPDATE).
+        conflict : Iterable[str], optional
+            Колонки ограничения уникальности. Обязательны для "UPDATE",
+            для "IGNORE" и "REPLACE" используются для поиска id
+            пропущенных и замененных строк (по умолчанию - все колонки).
+        autocommit : bool, optional
+            Фиксировать транзакцию после вставки (по умолчанию True).
+
+        Returns
+        -------
+        list
+            Идентификаторы записей в порядке строк rows.
+        """
+        if on_conflict is not None:
+            on_conflict = on_conflict.upper()
+        if on_conflict not in ON_CONFLICT:
+            raise ValueError(f"Unsupported on_conflict: {on_conflict}")
+        conflict = tuple(conflict) if conflict else ()
+        if on_conflict == "UPDATE" and not conflict:
+            raise AttributeError("Не указаны колонки конфликта для UPDATE")
+        groups: Dict[Tuple[str, ...], List[Tuple[int, tuple]]] = {}
+        count = 0
+        for count, row in enumerate(rows, 1):
+            row = dict(row)
+            self.filterKwargs(row)
+            if not row:
+                raise AttributeError("Не указаны аргументы")
+            groups.setdefault(tuple(row), []).append(
+                (count - 1, tuple(row.values())))
+        ids: List[int] = [None] * count
+        with self.writer(autocommit) as cursor:
+            for columns, group in groups.items():
+                values = [v for _, v in group]
+                for (i, _), id_ in zip(group, self._insertGroup(
+                        cursor, table, columns, values,
+                        on_conflict, conflict)):
+                    ids[i] = id_
+            self._invalidate(table)
+        return ids
+
+    def _insertText(self, table: str, columns: Tuple[str, ...],
+                    on_conflict: str, conflict: Tuple[str, ...]) -> str:
+        """Текст INSERT для insertMany"""
+        verb = "INSERT"
+        if on_conflict in ("IGNORE", "REPLACE"):
+            verb += f" OR {on_conflict}"
+        txt = f'{verb} INTO {table} ({self.j1(columns)}) VALUES '\
+            f'({self.j2(columns)})'
+        if on_conflict == "UPDATE":
+            update = [c for c in columns if c not in conflict]
+            action = self.j1([f"{c} = excluded.{c}" for c in update]) \
+                if update else None
+            txt += f' ON CONFLICT ({self.j1(conflict)}) ' + \
+                (f'DO UPDATE SET {action}' if action else 'DO NOTHING')
+        return txt
+
+    def _insertGroup(self, cursor, table: str, columns: Tuple[str, ...],
+                     values: List[tuple], on_conflict: str,
+                     conflict: Tuple[str, ...]) -> List[int]:
+        """Вставка группы строк insertMany и идентификаторы этих строк"""
+        txt = self._insertText(table, columns, on_conflict, conflict)
+        if "id" in columns:
+            cursor.executemany(txt, values)
+            i = columns.index("id")
+            return [v[i] for v in values]
+        keys = conflict or columns
+        index = [columns.index(k) for k in keys]
+        lookup = f'SELECT id FROM {table} WHERE ' + \
+            " AND ".join(f"{k} IS ?" for k in keys)
+        if on_conflict == "UPDATE":
+            cursor.executemany(txt, values)
+            inserted = [None] * len(values)
+        else:
+            inserted = []
+            for v in values:
+                cursor.execute(txt, v)
+                # rowcount 0 - строка пропущена (OR IGNORE)
+                inserted.append(cursor.lastrowid if cursor.rowcount else None)
+        if on_conflict == "REPLACE":
+            # строку группы могла заменить более поздняя с тем же ключом
+            exists = f"SELECT 1 FROM {table} WHERE id = ?"
+            inserted = [id_ if cursor.execute(exists, (id_,)).fetchone()
+                        else None for id_ in inserted]
+        ids = []
+        for v, id_ in zip(values, inserted):
+            if id_ is None:
+                cursor.execute(lookup, [v[i] for i in index])
+                row = cursor.fetchone()
+                id_ = row[0] if row else None
+            ids.append(id_)
+        return ids
+
     def deleteById(self, table: str, id_: int) -> None:
         """
         Удаление записи из таблицы по идентификатору
@@ -526,6 +2003,9 @@ class DataBase(DataBaseManager):
         id_ : int
             Идентификатор записи для удаления.
         """
+        if self._queued():
+            return self._writeQueue.deleteById(table, id_).result()
         txt = f"DELETE FROM {table} WHERE id = ?"
-        with self as cursor:
+        with self.writer() as cursor:
             cursor.execute(txt, (id_,))
+            self._invalidate(table)
@@ -2,10 +2,16 @@
 import sys
 import sqlite3
 import os
-from typing import Type
+import threading
+import zlib
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple, Type
 
 
-from .ConfigManager import ConfigManager
+from .ConfigManager import ConfigManager, FILE_PRAGMAS, PERF_VALUES
+from .ConnectionPool import Checkout, ConnectionPool
+from .Profiler import ProfilingCursor, QueryProfiler
+from . import Backup
 
 SQL_CREATOR = 'database_creator.sql'
 
@@ -17,10 +23,12 @@ class DataBaseManager:
     _instance = None
     _is_test = None
     _autocommit: bool = True
-    _connection = None
-    _cursor: sqlite3.Cursor
+    _persistent: bool = False
+    _pool: ConnectionPool = None
+    _backupScheduler: Backup.BackupScheduler = None
 
-    def __new__(cls, config: ConfigManager, is_test: bool = True):
+    def __new__(cls, config: ConfigManager, is_test: bool = True,
+                persistent: bool = None, pool_size: int = None):
         if cls._instance is None or \
             config != cls._config or \
                 cls._is_test != is_test:
@@ -30,7 +38,23 @@ class DataBaseManager:
         print("database:", cls._instance.fullpath)
         return cls._instance
 
-    def __init__(self, config: ConfigManager, is_test: bool = True):
+    def __init__(self, config: ConfigManager, is_test: bool = True,
+                 persistent: bool = None, pool_size: int = None):
+        if persistent is None:
+            persistent = config.getPersistent(is_test)
+        if pool_size is None:
+            pool_size = config.getPoolSize(is_test)
+        self._persistent = persistent
+        self._pragmas = config.getPerfPragmas(is_test)
+        self._connectPragmas = None
+        self._connectLock = threading.Lock()
+        self._local = threading.local()
+        self.profiler = QueryProfiler()
+        self._pool = ConnectionPool(
+            self.fullpath, pool_size, persistent,
+            cached_statements=config.getCachedStatements(is_test),
+            on_connect=self._configureConnection,
+            profiler=self.profiler)
         if not os.path.exists(self.fullpath) or is_test:
             self.createDB()
 
@@ -54,44 +78,270 @@ class DataBaseManager:
     def fullpath(self) -> str:
         return os.path.join(self.folder, self.filename)
 
+    def _configureConnection(self, connection: sqlite3.Connection) -> None:
+        """Настройка нового соединения пула PRAGMA из секции *_PERF.
+
+        PRAGMA, которые хранятся в файле БД (page_size, journal_mode),
+        выполняются только для первого соединения; для остальных
+        выполняются только PRAGMA, значения которых отличаются от
+        значений нового соединения.
+        """
+        if self._connectPragmas is None:
+            with self._connectLock:
+                if self._connectPragmas is None:
+                    for name in FILE_PRAGMAS:
+                        connection.execute(
+                            f"PRAGMA {name} = {self._pragmas[name]}")
+                    self._connectPragmas = self._changedPragmas(connection)
+        for name, value in self._connectPragmas.items():
+            connection.execute(f"PRAGMA {name} = {value}")
+
+    def _changedPragmas(self, connection: sqlite3.Connection
+                        ) -> Dict[str, str]:
+        """PRAGMA соединения, отличающиеся от значений connection"""
+        changed = {}
+        for name, value in self._pragmas.items():
+            if name in FILE_PRAGMAS:
+                continue
+            current = connection.execute(f"PRAGMA {name}").fetchone()[0]
+            expected = PERF_VALUES[name].index(value) \
+                if name in PERF_VALUES else int(value)
+            if current != expected:
+                changed[name] = value
+        return changed
+
+    @property
+    def _connection(self) -> sqlite3.Connection:
+        """Соединение, выданное текущему потоку (или None)."""
+        if self._pool is None:
+            return None
+        return self._pool.current()
+
+    def _open(self, write: bool) -> Tuple[Checkout, sqlite3.Cursor]:
+        checkout = self._pool.acquire(write)
+        if self.profiler.active:
+            return checkout, checkout.connection.cursor(ProfilingCursor)
+        return checkout, checkout.connection.cursor()
+
+    def _release(self, checkout: Checkout, type_,
+                 autocommit: bool = None) -> None:
+        if autocommit is None:
+            autocommit = self._autocommit
+        try:
+            if self._pool.controls(checkout):
+                connection = checkout.connection
+                if type_ is not None:
+                    connection.rollback()
+                elif autocommit:
+                    connection.commit()
+                if connection.writer and not connection.in_transaction:
+                    self._onTransactionEnd()
+        finally:
+            self._pool.release(checkout)
+
+    def _onTransactionEnd(self) -> None:
+        """Вызывается после фиксации или отката транзакции писателя."""
+
+    def _entered(self) -> List[Checkout]:
+        """Выдачи блоков `with self` текущего потока"""
+        entered = getattr(self._local, 'entered', None)
+        if entered is None:
+            entered = self._local.entered = []
+        return entered
+
     def __enter__(self) -> sqlite3.Cursor:
-        """Открытие соединения с базой данных при входе в контекстный блок."""
-        if self._connection is None:
-            self._connection = sqlite3.connect(self.fullpath)
-        self._cursor = self._connection.cursor()
-        return self._cursor
+        """Получение соединения для чтения при входе в контекстный блок."""
+        checkout, cursor = self._open(write=False)
+        self._entered().append(checkout)
+        return cursor
 
     def __exit__(self, type_, value, traceback) -> None:
-        """Закрытие соединения с базой данных при выходе из контекстного блока."""
-        if type_ is not None:
-            self.rollback()
-        elif self._autocommit:
-            self.commit()
+        """Возврат соединения в пул при выходе из контекстного блока."""
+        self._release(self._entered().pop(), type_)
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Cursor]:
+        """Контекстный блок чтения, как `with self`.
+
+        Выдача соединения хранится в самом блоке, поэтому его можно
+        держать открытым в генераторе, который выходит из блока позже
+        внешних блоков (итераторы iterRows/iterRequest).
+        """
+        checkout, cursor = self._open(write=False)
+        try:
+            yield cursor
+        except BaseException:
+            self._release(checkout, sys.exc_info()[0])
+            raise
+        self._release(checkout, None)
+
+    @contextmanager
+    def writer(self, autocommit: bool = None) -> Iterator[sqlite3.Cursor]:
+        """Контекстный блок записи через единственное соединение-писатель.
+
+        autocommit - фиксировать транзакцию на выходе (None - по флагу
+        _autocommit). Внутри transaction() фиксация откладывается.
+        """
+        checkout, cursor = self._open(write=True)
+        try:
+            yield cursor
+        except BaseException:
+            self._release(checkout, sys.exc_info()[0], autocommit)
+            raise
+        self._release(checkout, None, autocommit)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Cursor]:
+        """Явная транзакция на соединении-писателе.
+
+        Все вызовы внутри блока в этом потоке (запись и чтение) идут через
+        одно соединение, фиксация выполняется один раз на выходе, при
+        исключении - откат. Вложенные transaction() оформляются через
+        SAVEPOINT и откатываются независимо.
+        """
+        checkout, cursor = self._open(write=True)
+        level = getattr(self._local, 'transaction', 0)
+        savepoint = f"savepoint_{level}"
+        try:
+            if level:
+                cursor.execute(f"SAVEPOINT {savepoint}")
+            elif not cursor.connection.in_transaction:
+                cursor.execute("BEGIN IMMEDIATE")
+        except BaseException:
+            self._release(checkout, sys.exc_info()[0], True)
+            raise
+        self._local.transaction = level + 1
+        try:
+            yield cursor
+        except BaseException:
+            self._local.transaction = level
+            if level:
+                cursor.execute(f"ROLLBACK TO {savepoint}")
+                cursor.execute(f"RELEASE {savepoint}")
+            self._release(checkout, sys.exc_info()[0], True)
+            raise
+        self._local.transaction = level
+        if level:
+            cursor.execute(f"RELEASE {savepoint}")
+        self._release(checkout, None, True)
+
+    def profile(self):
+        """Профилирование запросов в пределах блока with
+
+        >>> with DB.profile() as profiler:
+        ...     DB.getRowsbyValues("links", id_child=1)
+        >>> profiler.histograms()
+
+        Для постоянного профилирования - self.profiler.enable(slow_threshold,
+        log_file), вывод последних запросов при падении -
+        GlobalErrorHandler().addErrorCallback(DB.profiler.errorCallback).
+        """
+        return self.profiler.scope()
+
+    @property
+    def persistent(self) -> bool:
+        """Соединение остается открытым между вызовами."""
+        return self._persistent
 
     def rollback(self) -> None:
-        if self._connection is not None:
-            self._connection.rollback()
-            self.close()
+        if self._pool is not None:
+            self._pool.rollback()
+            self._onTransactionEnd()
 
     def commit(self) -> None:
-        if self._connection is not None:
-            self._connection.commit()
-            self.close()
+        if self._pool is not None:
+            self._pool.commit()
+            self._onTransactionEnd()
 
     def close(self) -> None:
-        """Явное закрытие соединения, если оно открыто."""
-        if self._connection is not None:
-            self._connection.close()
-            self._connection = None
+        """Закрытие соединений пула (выданных потокам - при возврате)."""
+        if self._pool is not None:
+            self._pool.close()
+
+    def backup(self,
+               folder: str = None,
+               compress: bool = False,
+               keep: int = None,
+               pages: int = Backup.BACKUP_PAGES,
+               sleep: float = Backup.BACKUP_SLEEP) -> str:
+        """
+        Горячая резервная копия БД в папку архивов
+
+        Parameters
+        ----------
+        folder : str, optional
+            Папка архивов (по умолчанию archiveFolder из конфигурации).
+        compress : bool, optional
+            Сжать копию gzip.
+        keep : int, optional
+            Сколько последних архивов оставить (None - не удалять).
+        pages : int, optional
+            Число страниц за один шаг копирования.
+        sleep : float, optional
+            Пауза между шагами в секундах.
+
+        Returns
+        -------
+        str
+            Путь к созданному архиву.
+        """
+        if folder is None:
+            folder = self.config.getArchivesFolder(self.is_test)
+        os.makedirs(folder, exist_ok=True)
+        target = os.path.join(folder, Backup.archiveName(self.filename))
+        path = Backup.backup(self.fullpath, target, pages, sleep, compress)
+        if keep is not None:
+            Backup.rotate(folder, self.filename, keep)
+        return path
+
+    def startBackupRotation(self,
+                            interval: float,
+                            keep: int = 7,
+                            compress: bool = False,
+                            folder: str = None) -> None:
+        """
+        Запуск периодического резервного копирования с ротацией
+
+        Parameters
+        ----------
+        interval : float
+            Период копирования в секундах.
+        keep : int, optional
+            Сколько последних архивов хранить.
+        compress : bool, optional
+            Сжимать копии gzip.
+        folder : str, optional
+            Папка архивов (по умолчанию archiveFolder из конфигурации).
+        """
+        self.stopBackupRotation()
+        self._backupScheduler = Backup.BackupScheduler(
+            lambda: self.backup(folder, compress, keep), interval)
+        self._backupScheduler.start()
+
+    def stopBackupRotation(self) -> None:
+        """Остановка периодического резервного копирования."""
+        if self._backupScheduler is not None:
+            self._backupScheduler.stop()
+            self._backupScheduler = None
 
     def __del__(self):
         self.close()
 
     def createDB(self) -> None:
+        """Выполнение скрипта создания БД.
+
+        Контрольная сумма скрипта сохраняется в PRAGMA user_version,
+        уже примененный скрипт повторно не выполняется.
+        """
         filename = os.path.join(os.path.dirname(self.config.folder),
                                 'sql_request')
         filename = os.path.join(filename, SQL_CREATOR)
         with open(filename, 'r', encoding='utf-8') as file:
             sql_script = file.read()
-            with self as cursor:
-                cursor.executescript(sql_script)
+        version = zlib.crc32(sql_script.encode('utf-8')) & 0x7fffffff
+        with self.writer() as cursor:
+            cursor.execute("PRAGMA user_version")
+            if cursor.fetchone()[0] == version:
+                return
+            cursor.executescript(sql_script)
+            cursor.execute(f"PRAGMA user_version = {version}")
@@ -0,0 +1,72 @@
+"""Модуль полнотекстового поиска (FTS5) по текстовым колонкам таблиц"""
+import re
+from typing import List, Sequence
+
+SUFFIX = "_fts"
+TOKENIZE = "unicode61 remove_diacritics 2"
+SEARCH_LIMIT = 20
+
+_WORDS = re.compile(r"\w+", re.UNICODE)
+
+
+def ftsName(table: str) -> str:
+    """Имя таблицы FTS5 для table"""
+    return table + SUFFIX
+
+
+def _values(record: str, columns: Sequence[str]) -> str:
+    return ", ".join(f"{record}.{column}" for column in columns)
+
+
+def createSql(table: str, columns: Sequence[str],
+              tokenize: str = TOKENIZE) -> List[str]:
+    """
+    Запросы создания таблицы FTS5 (external content) и триггеров
+
+    Индекс хранит только токены, сами значения читаются из table по
+    rowid = id; триггеры поддерживают индекс при изменениях table.
+    """
+    fts = ftsName(table)
+    names = ", ".join(columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({names}, "
+        f"content='{table}', content_rowid='id', tokenize='{tokenize}', "
+        "prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} "
+        f"BEGIN INSERT INTO {fts} (rowid, {names}) "
+        f"VALUES (NEW.id, {_values('NEW', columns)}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} "
+        f"BEGIN INSERT INTO {fts} ({fts}, rowid, {names}) "
+        f"VALUES ('delete', OLD.id, {_values('OLD', columns)}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE ON {table} "
+        f"BEGIN INSERT INTO {fts} ({fts}, rowid, {names}) "
+        f"VALUES ('delete', OLD.id, {_values('OLD', columns)}); "
+        f"INSERT INTO {fts} (rowid, {names}) "
+        f"VALUES (NEW.id, {_values('NEW', columns)}); END",
+    ]
+
+
+def rebuildSql(table: str) -> str:
+    """Запрос перестроения индекса по текущим данным table"""
+    fts = ftsName(table)
+    return f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')"
+
+
+def dropSql(table: str) -> List[str]:
+    """Запросы удаления триггеров и таблицы FTS5"""
+    fts = ftsName(table)
+    return [f"DROP TRIGGER IF EXISTS {fts}_{event}"
+            for event in ("insert", "delete", "update")] + \
+        [f"DROP TABLE IF EXISTS {fts}"]
+
+
+def matchQuery(text: str, prefix: bool = True) -> str:
+    """
+    Запрос MATCH из произвольной строки пользователя
+
+    Каждое слово берется в кавычки (служебный синтаксис FTS5 не
+    срабатывает), при prefix=True ищется как начало слова; все слова
+    должны встретиться (AND).
+    """
+    star = "*" if prefix else ""
+    return " ".join(f'"{word}"{star}' for word in _WORDS.findall(text))
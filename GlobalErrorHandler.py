@@ -1,6 +1,5 @@
 import sys
 import traceback
-from IPython import get_ipython
 from . import DB
 
 
@@ -18,11 +17,18 @@ class GlobalErrorHandler:
         self._original_excepthook = sys.excepthook
         sys.excepthook = self._global_except_hook
         
-        ipython = get_ipython()
+        # IPython уже загружен, если код выполняется в IPython/Spyder
+        ipython_module = sys.modules.get("IPython")
+        ipython = ipython_module.get_ipython() if ipython_module else None
         if ipython:
             self._original_ipython_excepthook = ipython.showtraceback
             ipython.showtraceback = self._ipython_except_hook
 
+    def addErrorCallback(self, callback):
+        """Функция callback(exc_type, exc_value, tb_str) при необработанном исключении"""
+        if callback not in self._error_callbacks:
+            self._error_callbacks.append(callback)
+
     def _ipython_except_hook(self, exc_tuple=None, filename=None, tb_offset=None,
                            exception_only=False, running_compiled_code=False):
         """Кастомный обработчик для IPython/Spyder, совместимый с оригинальным API"""
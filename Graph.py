@@ -0,0 +1,157 @@
+"""Модуль обхода иерархии связей links (WITH RECURSIVE и closure table)"""
+from typing import List, Tuple
+
+LINKS = "links"
+PARENT = "id"
+CHILD = "id_child"
+CLOSURE = "links_closure"
+
+# Направление обхода: (колонка связи с текущим узлом, колонка следующего)
+DOWN = (PARENT, CHILD)
+UP = (CHILD, PARENT)
+
+
+def rootsSql(count: int) -> str:
+    """Подзапрос из count параметров - идентификаторов начальных узлов"""
+    return "SELECT column1 AS node FROM (VALUES " + \
+        ", ".join(["(?)"] * count) + ")"
+
+
+def traverseSql(roots: str, direction: Tuple[str, str],
+                depth: int = None) -> str:
+    """
+    WITH RECURSIVE tree(root, node, depth, path) от узлов подзапроса roots
+
+    path - цепочка пройденных узлов вида "/1/5/", переход в узел, уже
+    входящий в цепочку, отбрасывается (защита от циклов).
+    """
+    current, following = direction
+    limit = "" if depth is None else f" AND tree.depth < {int(depth)}"
+    return "WITH RECURSIVE tree(root, node, depth, path) AS (" \
+        f"SELECT node, node, 0, '/' || node || '/' FROM ({roots}) " \
+        "UNION ALL " \
+        f"SELECT tree.root, {LINKS}.{following}, tree.depth + 1, " \
+        f"tree.path || {LINKS}.{following} || '/' " \
+        f"FROM tree JOIN {LINKS} ON {LINKS}.{current} = tree.node " \
+        f"WHERE {LINKS}.{following} IS NOT NULL AND " \
+        f"instr(tree.path, '/' || {LINKS}.{following} || '/') = 0{limit}) "
+
+
+def closureSql(roots: str, direction: Tuple[str, str],
+               depth: int = None) -> str:
+    """WITH tree(root, node, depth) из closure table от узлов roots"""
+    start, end = ("ancestor", "descendant") if direction == DOWN \
+        else ("descendant", "ancestor")
+    limit = "" if depth is None else f" AND depth <= {int(depth)}"
+    return "WITH tree(root, node, depth) AS (" \
+        f"SELECT node, node, 0 FROM ({roots}) " \
+        "UNION ALL " \
+        f"SELECT {start}, {end}, depth FROM {CLOSURE} " \
+        f"WHERE {start} IN ({roots}){limit}) "
+
+
+def tagFilterSql(table: str, count: int) -> str:
+    """Соединение узлов tree с таблицей table по тегам (count параметров)"""
+    return f"JOIN {table} ON {table}.id = tree.node " \
+        f"AND {table}.tag IN ({', '.join(['?'] * count)}) "
+
+
+CREATE_CLOSURE = (
+    f"CREATE TABLE IF NOT EXISTS {CLOSURE} ("
+    "ancestor INTEGER NOT NULL, descendant INTEGER NOT NULL, "
+    "depth INTEGER NOT NULL, PRIMARY KEY (ancestor, descendant)) "
+    "WITHOUT ROWID",
+    f"CREATE INDEX IF NOT EXISTS idx_{CLOSURE}_descendant "
+    f"ON {CLOSURE} (descendant, ancestor)",
+    f"CREATE INDEX IF NOT EXISTS idx_{LINKS}_{CHILD} ON {LINKS} ({CHILD})",
+)
+
+# Заполнение по текущим links: минимальная глубина для каждой пары
+FILL_CLOSURE = f"INSERT INTO {CLOSURE} (ancestor, descendant, depth) " + \
+    traverseSql(f"SELECT DISTINCT {PARENT} AS node FROM {LINKS}", DOWN) + \
+    "SELECT root, node, MIN(depth) FROM tree " \
+    "WHERE depth > 0 AND root != node GROUP BY root, node"
+
+
+def _insertEdge(record: str) -> str:
+    """Добавление пар через ребро record.id -> record.id_child"""
+    return f"INSERT INTO {CLOSURE} (ancestor, descendant, depth) " \
+        "SELECT a.node, d.node, a.depth + 1 + d.depth FROM " \
+        f"(SELECT {record}.{PARENT} AS node, 0 AS depth UNION ALL " \
+        f"SELECT ancestor, depth FROM {CLOSURE} " \
+        f"WHERE descendant = {record}.{PARENT}) AS a, " \
+        f"(SELECT {record}.{CHILD} AS node, 0 AS depth UNION ALL " \
+        f"SELECT descendant, depth FROM {CLOSURE} " \
+        f"WHERE ancestor = {record}.{CHILD}) AS d " \
+        f"WHERE a.node != d.node AND {record}.{CHILD} IS NOT NULL " \
+        "ON CONFLICT (ancestor, descendant) " \
+        "DO UPDATE SET depth = MIN(depth, excluded.depth);"
+
+
+def _deleteEdge(record: str) -> str:
+    """
+    Удаление пар, проходивших через ребро record.id -> record.id_child
+
+    Пары (предок ребра, потомок ребра) помечаются depth = -1 и
+    пересчитываются через оставшиеся ребра и непомеченные пары; пары
+    без другого пути удаляются. Точно для ациклических связей.
+    """
+    return f"UPDATE {CLOSURE} SET depth = -1 WHERE ancestor IN " \
+        f"(SELECT {record}.{PARENT} UNION SELECT ancestor FROM {CLOSURE} " \
+        f"WHERE descendant = {record}.{PARENT}) AND descendant IN " \
+        f"(SELECT {record}.{CHILD} UNION SELECT descendant FROM {CLOSURE} " \
+        f"WHERE ancestor = {record}.{CHILD});" \
+        f"UPDATE {CLOSURE} SET depth = COALESCE((" \
+        "SELECT MIN(a.depth + 1 + d.depth) FROM " \
+        f"(SELECT {CLOSURE}.ancestor AS node, 0 AS depth UNION ALL " \
+        f"SELECT descendant, depth FROM {CLOSURE} AS c " \
+        f"WHERE c.ancestor = {CLOSURE}.ancestor AND c.depth >= 0) AS a " \
+        f"JOIN {LINKS} AS e ON e.{PARENT} = a.node JOIN " \
+        f"(SELECT {CLOSURE}.descendant AS node, 0 AS depth UNION ALL " \
+        f"SELECT ancestor, depth FROM {CLOSURE} AS c " \
+        f"WHERE c.descendant = {CLOSURE}.descendant AND c.depth >= 0) AS d " \
+        f"ON d.node = e.{CHILD}), -1) WHERE depth = -1;" \
+        f"DELETE FROM {CLOSURE} WHERE depth < 0;"
+
+
+# Узел на цикле links (после заполнения closure table), иначе пусто
+CYCLE_SQL = f"SELECT {PARENT} FROM {LINKS} WHERE {PARENT} = {CHILD} " \
+    f"UNION ALL SELECT ancestor FROM {CLOSURE} AS c WHERE EXISTS (" \
+    f"SELECT 1 FROM {CLOSURE} WHERE ancestor = c.descendant " \
+    "AND descendant = c.ancestor) LIMIT 1"
+
+
+def _rejectCycle(name: str, event: str) -> str:
+    """Триггер BEFORE event, отклоняющий связь, которая замыкает цикл"""
+    return f"CREATE TRIGGER IF NOT EXISTS {CLOSURE}_{name} " \
+        f"BEFORE {event} ON {LINKS} " \
+        f"WHEN NEW.{CHILD} = NEW.{PARENT} OR EXISTS (SELECT 1 FROM " \
+        f"{CLOSURE} WHERE ancestor = NEW.{CHILD} " \
+        f"AND descendant = NEW.{PARENT}) " \
+        f"BEGIN SELECT RAISE(ABORT, 'цикл в {LINKS}: {CLOSURE} требует " \
+        "связей без циклов'); END"
+
+
+CLOSURE_TRIGGERS = (
+    _rejectCycle("insert_cycle", "INSERT"),
+    _rejectCycle("update_cycle", f"UPDATE OF {PARENT}, {CHILD}"),
+    f"CREATE TRIGGER IF NOT EXISTS {CLOSURE}_insert AFTER INSERT ON {LINKS} "
+    f"BEGIN {_insertEdge('NEW')} END",
+    f"CREATE TRIGGER IF NOT EXISTS {CLOSURE}_delete AFTER DELETE ON {LINKS} "
+    f"BEGIN {_deleteEdge('OLD')} END",
+    f"CREATE TRIGGER IF NOT EXISTS {CLOSURE}_update "
+    f"AFTER UPDATE OF {PARENT}, {CHILD} ON {LINKS} "
+    f"BEGIN {_deleteEdge('OLD')} {_insertEdge('NEW')} END",
+)
+
+DROP_CLOSURE = tuple(
+    f"DROP TRIGGER IF EXISTS {CLOSURE}_{event}"
+    for event in ("insert", "delete", "update", "insert_cycle",
+                  "update_cycle")
+) + (f"DROP TABLE IF EXISTS {CLOSURE}",)
+
+
+def closureStatements() -> List[str]:
+    """Запросы создания, заполнения и поддержки closure table"""
+    return list(CREATE_CLOSURE) + [f"DELETE FROM {CLOSURE}", FILL_CLOSURE] \
+        + list(CLOSURE_TRIGGERS)
@@ -0,0 +1,103 @@
+"""Модуль учета фильтров запросов и подбора индексов"""
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, List, Tuple
+
+# Колонки, которые проверяются всегда (getIdsFromView, getTimeLastUpdate)
+CANDIDATES = (("links", ("id_child",)), ("links", ("date_update",)))
+
+
+class IndexAdvisor:
+    """Счетчик фильтров (таблица, колонки) и подбор недостающих индексов."""
+
+    def __init__(self):
+        self._filters: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, table: str, keys: Tuple[str, ...],
+               column: str = "*", operator: Callable = all) -> None:
+        """Учет запроса к table с фильтром по колонкам keys"""
+        with self._lock:
+            self._filters[(table, tuple(keys), column, operator is any)] += 1
+
+    def clear(self) -> None:
+        """Сброс счетчиков"""
+        with self._lock:
+            self._filters.clear()
+
+    def filters(self) -> List[Tuple[Tuple[str, Tuple[str, ...], str, bool],
+                                    int]]:
+        """Учтенные фильтры по убыванию частоты"""
+        with self._lock:
+            return self._filters.most_common()
+
+    @staticmethod
+    def indexColumns(keys: Tuple[str, ...], column: str,
+                     use_or: bool) -> List[Tuple[str, ...]]:
+        """Наборы колонок индексов для фильтра
+
+        Для AND - один составной индекс, дополненный выбираемой колонкой
+        (покрывающий), для OR - по индексу на каждую колонку.
+        """
+        if use_or:
+            return [(key,) for key in keys]
+        columns = tuple(keys)
+        if column not in ("*", "id") and column not in columns:
+            columns += (column,)
+        return [columns]
+
+    @staticmethod
+    def indexName(table: str, columns: Tuple[str, ...]) -> str:
+        return f"idx_{table}_{'_'.join(columns)}"
+
+    def advise(self, explain: Callable[[str, tuple], List[tuple]],
+               tables: Dict[str, Tuple[str, ...]],
+               min_count: int = 1) -> List[Dict[str, Any]]:
+        """
+        Подбор индексов для фильтров, выполняемых полным просмотром (SCAN)
+
+        Parameters
+        ----------
+        explain : Callable
+            Функция explain(txt, args), возвращающая EXPLAIN QUERY PLAN.
+        tables : dict
+            Колонки таблиц (не представлений) БД.
+        min_count : int, optional
+            Минимальное число учтенных запросов с фильтром.
+
+        Returns
+        -------
+        list
+            Рекомендации: table, columns, count, plan, name, sql.
+        """
+        filters = [item for item in self.filters() if item[1] >= min_count]
+        filters += [((table, keys, "*", False), 0)
+                    for table, keys in CANDIDATES]
+        advice = {}
+        for (table, keys, column, use_or), count in filters:
+            if table not in tables or keys == ("id",) or \
+                    not set(keys).issubset(tables[table]):
+                continue
+            word = " OR " if use_or else " AND "
+            txt = f"SELECT * FROM {table} WHERE " + \
+                word.join(f"{key} = ?" for key in keys)
+            plan = [row[-1] for row in explain(txt, (None,) * len(keys))]
+            if not any(detail.startswith("SCAN") for detail in plan):
+                continue
+            for columns in self.indexColumns(keys, column, use_or):
+                if not set(columns).issubset(tables[table]):
+                    columns = tuple(keys)
+                name = self.indexName(table, columns)
+                if name in advice:
+                    advice[name]["count"] += count
+                    continue
+                advice[name] = {
+                    "table": table,
+                    "columns": columns,
+                    "count": count,
+                    "plan": plan,
+                    "name": name,
+                    "sql": f"CREATE INDEX IF NOT EXISTS {name} "
+                           f"ON {table} ({', '.join(columns)})",
+                }
+        return sorted(advice.values(), key=lambda a: -a["count"])
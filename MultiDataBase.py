@@ -0,0 +1,216 @@
+"""Модуль параллельных запросов к нескольким файлам БД"""
+import heapq
+import os
+import pathlib
+import sqlite3
+import threading
+from concurrent.futures import (Executor, ProcessPoolExecutor,
+                                ThreadPoolExecutor, as_completed)
+from typing import (Any, Callable, Dict, Iterable, Iterator, List, Sequence,
+                    Tuple, Union)
+
+from .ConfigManager import ConfigManager
+from .DataBase import DataBase, DBError
+
+Source = Union[str, ConfigManager, Tuple[ConfigManager, bool]]
+
+# Соединения только для чтения рабочего процесса (потока): {путь: соединение}
+_local = threading.local()
+
+
+def _connection(path: str) -> sqlite3.Connection:
+    """Соединение mode=ro с файлом path, открытое в этом процессе/потоке"""
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    connection = connections.get(path)
+    if connection is None:
+        uri = pathlib.Path(path).absolute().as_uri() + "?mode=ro"
+        connection = connections[path] = sqlite3.connect(uri, uri=True)
+    return connection
+
+
+def _query(path: str, txt: str, args: tuple
+           ) -> Tuple[str, List[str], List[tuple]]:
+    """Выполнение запроса в рабочем процессе: (путь, колонки, строки)"""
+    cursor = _connection(path).execute(txt, args)
+    try:
+        columns = [d[0] for d in cursor.description or ()]
+        return path, columns, cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def _sortKey(indexes: Sequence[int]) -> Callable[[tuple], tuple]:
+    """Ключ сортировки строк как в SQLite: NULL раньше значений"""
+    return lambda row: tuple((row[i] is not None, row[i]) for i in indexes)
+
+
+class MultiDataBase:
+    """
+    Один запрос на чтение к нескольким файлам БД параллельно
+
+    Каждый файл обрабатывается в рабочем процессе (или потоке) со
+    своим соединением только для чтения (URI mode=ro), результаты
+    объединяются или выдаются по мере готовности.
+
+    >>> with MultiDataBase(["run1.db3", "run2.db3"]) as mdb:
+    ...     rows = mdb.getRowsbyValues("links", order_by="date_update",
+    ...                                descending=True, limit=10, id_child=5)
+    """
+
+    def __init__(self, sources: Iterable[Source],
+                 workers: int = None,
+                 processes: bool = True):
+        """
+        Parameters
+        ----------
+        sources : Iterable
+            Пути к файлам БД, ConfigManager (тестовая БД) или пары
+            (ConfigManager, is_test).
+        workers : int, optional
+            Число рабочих процессов/потоков (по умолчанию - по числу
+            файлов, но не больше числа ядер).
+        processes : bool, optional
+            Процессы (по умолчанию, для запросов с полным просмотром,
+            нагружающих CPU) или потоки (для коротких запросов).
+        """
+        self.paths = [self._path(source) for source in sources]
+        missing = [path for path in self.paths if not os.path.exists(path)]
+        if missing:
+            raise DBError(f"Нет файлов БД: {missing}")
+        if workers is None:
+            workers = max(1, min(len(self.paths), os.cpu_count() or 1))
+        executor = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        self._executor: Executor = executor(workers)
+
+    @staticmethod
+    def _path(source: Source) -> str:
+        if isinstance(source, (str, os.PathLike)):
+            return os.fspath(source)
+        config, is_test = source if isinstance(source, tuple) \
+            else (source, True)
+        return os.path.join(config.getDbFolder(is_test),
+                            config.getDbCurrent(is_test))
+
+    def iterRequest(self, txt: str, *args
+                    ) -> Iterator[Tuple[str, List[str], List[tuple]]]:
+        """
+        Выполнение запроса на чтение ко всем файлам
+
+        Yields
+        ------
+        tuple
+            (путь, колонки, строки) - по мере готовности файлов.
+        """
+        futures = [self._executor.submit(_query, path, txt, args)
+                   for path in self.paths]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def _request(self, txt: str, args: tuple,
+                 order_by: Union[str, Sequence[str]],
+                 descending: bool, limit: int,
+                 source: bool) -> Tuple[List[str], List[tuple]]:
+        """Запрос с передачей ORDER BY/LIMIT каждому файлу и слиянием"""
+        if not DataBase._isReadRequest(txt):
+            raise DBError(f"MultiDataBase выполняет только чтение: {txt}")
+        order = [order_by] if isinstance(order_by, str) else \
+            list(order_by or ())
+        if order or limit is not None:
+            txt = f"SELECT * FROM ({txt.rstrip().rstrip(';')})"
+            if order:
+                direction = " DESC" if descending else ""
+                txt += " ORDER BY " + ", ".join(
+                    f"{column}{direction}" for column in order)
+            if limit is not None:
+                txt += f" LIMIT {int(limit)}"
+        columns, parts = [], []
+        for path, part_columns, rows in self.iterRequest(txt, *args):
+            columns = columns or part_columns
+            if source:
+                rows = [(path,) + row for row in rows]
+            parts.append(rows)
+        offset = 1 if source else 0
+        if order:
+            unknown = set(order) - set(columns)
+            if unknown:
+                raise DBError(f"Нет колонок для сортировки: {unknown}")
+            key = _sortKey([columns.index(c) + offset for c in order])
+            rows = heapq.merge(*parts, key=key, reverse=descending)
+        else:
+            rows = (row for part in parts for row in part)
+        rows = list(rows if limit is None else
+                    (row for _, row in zip(range(limit), rows)))
+        if source:
+            columns = ["source"] + columns
+        return columns, rows
+
+    def makeRequest(self, txt: str, *args,
+                    order_by: Union[str, Sequence[str]] = None,
+                    descending: bool = False,
+                    limit: int = None,
+                    source: bool = False) -> List[tuple]:
+        """
+        Запрос на чтение ко всем файлам с объединением результатов
+
+        Parameters
+        ----------
+        txt : str
+            Текст SQL запроса (SELECT/WITH).
+        *args
+            Аргументы для SQL запроса.
+        order_by : str or Sequence[str], optional
+            Колонки результата для сортировки: сортирует каждый файл,
+            затем результаты сливаются (heapq.merge).
+        descending : bool, optional
+            Сортировка по убыванию.
+        limit : int, optional
+            Ограничение числа строк (передается и каждому файлу).
+        source : bool, optional
+            Добавить путь к файлу первым элементом строки.
+
+        Returns
+        -------
+        list
+            Строки результата.
+        """
+        return self._request(txt, args, order_by, descending, limit,
+                             source)[1]
+
+    def getRowsbyValues(self, table: str,
+                        operator: Callable = all,
+                        order_by: Union[str, Sequence[str]] = None,
+                        descending: bool = False,
+                        limit: int = None,
+                        source: bool = False,
+                        **kwargs) -> List[Dict[str, Any]]:
+        """
+        Строки таблицы по заданным ключам и значениям из всех файлов
+
+        Параметры order_by, descending, limit, source - как у makeRequest
+        (source добавляет ключ "source").
+
+        Returns
+        -------
+        list
+            Строки в виде словарей.
+        """
+        txt = DataBase._selectQueryText(table, "*", tuple(kwargs), operator)
+        columns, rows = self._request(txt, tuple(kwargs.values()), order_by,
+                                      descending, limit, source)
+        return [dict(zip(columns, row)) for row in rows]
+
+    def close(self) -> None:
+        """Завершение рабочих процессов/потоков"""
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> "MultiDataBase":
+        return self
+
+    def __exit__(self, type_, value, traceback) -> None:
+        self.close()
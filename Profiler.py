@@ -0,0 +1,297 @@
+"""Модуль профилирования запросов к БД"""
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+
+# Границы корзин гистограммы длительности, секунды
+HISTOGRAM_BOUNDS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0,
+                    float("inf"))
+HISTORY_SIZE = 1000
+PACKAGE_FOLDER = os.path.dirname(__file__)
+
+_SPACES = re.compile(r"\s+")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+def sqlShape(sql: str) -> str:
+    """Форма запроса: без лишних пробелов и с IN (?, ?, ...) -> IN (?...)"""
+    return _IN_LIST.sub("(?...)", _SPACES.sub(" ", sql).strip())
+
+
+def callerMethod() -> str:
+    """Имя публичного метода пакета, через который выполняется запрос"""
+    frame = sys._getframe(2)
+    method = "?"
+    while frame is not None:
+        code = frame.f_code
+        # модули пакета, без вложенных папок (tests и т.п.)
+        if os.path.dirname(code.co_filename) != PACKAGE_FOLDER:
+            break
+        if not code.co_name.startswith("_") and code.co_name != "load":
+            method = code.co_name
+        frame = frame.f_back
+    return method
+
+
+class QueryRecord:
+    """Сведения об одном выполненном запросе."""
+
+    __slots__ = ("sql", "method", "binds", "started", "duration", "rows",
+                 "thread")
+
+    def __init__(self, sql: str, method: str, binds: int, duration: float):
+        self.sql = sql
+        self.method = method
+        self.binds = binds
+        self.started = time.time() - duration
+        self.duration = duration
+        self.rows = 0
+        self.thread = threading.current_thread().name
+
+    def asDict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        moment = datetime.fromtimestamp(self.started).strftime("%H:%M:%S.%f")
+        return f"{moment} [{self.thread}] {self.method}: " \
+            f"{self.duration * 1000:.3f} ms, {self.rows} rows, " \
+            f"{self.binds} binds: {self.sql}"
+
+
+class QueryProfiler:
+    """
+    Сборщик статистики запросов: последние запросы, гистограммы по
+    методам, журнал медленных запросов, время открытия/закрытия
+    соединений. Выключен по умолчанию.
+    """
+
+    def __init__(self, history: int = HISTORY_SIZE):
+        self.enabled = False
+        self.slow_threshold: Optional[float] = None
+        self.log_file: Optional[str] = None
+        self._history = history
+        self._lock = threading.Lock()
+        self._scopes: List["QueryProfiler"] = []
+        self.reset()
+
+    def reset(self) -> None:
+        """Сброс накопленной статистики"""
+        with self._lock:
+            self._recent = deque(maxlen=self._history)
+            self._methods: Dict[str, Dict[str, Any]] = {}
+            self._connections = {action: {"count": 0, "total": 0.0}
+                                 for action in ("open", "close")}
+
+    def enable(self, slow_threshold: float = None,
+               log_file: str = None) -> None:
+        """
+        Включение профилирования
+
+        Parameters
+        ----------
+        slow_threshold : float, optional
+            Порог медленного запроса в секундах.
+        log_file : str, optional
+            Файл журнала медленных запросов (по умолчанию stderr).
+        """
+        self.slow_threshold = slow_threshold
+        self.log_file = log_file
+        self.enabled = True
+
+    def disable(self) -> None:
+        """Выключение профилирования"""
+        self.enabled = False
+
+    @property
+    def active(self) -> bool:
+        """Профилирование включено или открыт хотя бы один scope()"""
+        return self.enabled or bool(self._scopes)
+
+    @contextmanager
+    def scope(self) -> Iterator["QueryProfiler"]:
+        """Профилирование в пределах блока with
+
+        Возвращает отдельный профилировщик, собирающий только запросы
+        внутри блока.
+        """
+        scoped = QueryProfiler(self._history)
+        scoped.enabled = True
+        with self._lock:
+            self._scopes.append(scoped)
+        try:
+            yield scoped
+        finally:
+            with self._lock:
+                self._scopes.remove(scoped)
+
+    def _targets(self) -> List["QueryProfiler"]:
+        targets = list(self._scopes)
+        if self.enabled:
+            targets.append(self)
+        return targets
+
+    def record(self, sql: str, binds: int,
+               duration: float) -> List[QueryRecord]:
+        """Учет выполнения запроса"""
+        method = callerMethod()
+        records = []
+        for target in self._targets():
+            record = QueryRecord(sqlShape(sql), method, binds, duration)
+            with target._lock:
+                target._recent.append(record)
+            records.append((target, record))
+        return records
+
+    def fetched(self, records, rows: int, duration: float) -> None:
+        """Учет чтения строк результата запроса"""
+        for target, record in records:
+            record.rows += rows
+            record.duration += duration
+
+    def finish(self, records) -> None:
+        """Учет завершенного запроса в гистограмме метода и журнале"""
+        for target, record in records:
+            target._addToHistogram(record)
+            target._checkSlow(record)
+
+    def connection(self, action: str, duration: float) -> None:
+        """Учет открытия ("open") или закрытия ("close") соединения"""
+        for target in self._targets():
+            with target._lock:
+                stats = target._connections[action]
+                stats["count"] += 1
+                stats["total"] += duration
+
+    def _addToHistogram(self, record: QueryRecord) -> None:
+        with self._lock:
+            stats = self._methods.get(record.method)
+            if stats is None:
+                stats = self._methods[record.method] = {
+                    "count": 0, "total": 0.0, "max": 0.0, "rows": 0,
+                    "histogram": [0] * len(HISTOGRAM_BOUNDS)}
+            stats["count"] += 1
+            stats["total"] += record.duration
+            stats["max"] = max(stats["max"], record.duration)
+            stats["rows"] += record.rows
+            for i, bound in enumerate(HISTOGRAM_BOUNDS):
+                if record.duration <= bound:
+                    stats["histogram"][i] += 1
+                    break
+
+    def _checkSlow(self, record: QueryRecord) -> None:
+        if self.slow_threshold is None or \
+                record.duration < self.slow_threshold:
+            return
+        line = f"SLOW {record!r}\n"
+        if self.log_file is None:
+            sys.stderr.write(line)
+            return
+        with self._lock:
+            with open(self.log_file, "a", encoding="utf-8") as file:
+                file.write(line)
+
+    def recent(self, count: int = None) -> List[QueryRecord]:
+        """Последние выполненные запросы (старые первыми)"""
+        with self._lock:
+            records = list(self._recent)
+        return records if count is None else records[-count:]
+
+    def histograms(self) -> Dict[str, Dict[str, Any]]:
+        """Статистика по методам: count, total, mean, max, rows, histogram"""
+        with self._lock:
+            result = {}
+            for method, stats in self._methods.items():
+                result[method] = dict(stats, histogram=dict(
+                    zip(HISTOGRAM_BOUNDS, stats["histogram"])))
+                result[method]["mean"] = stats["total"] / stats["count"]
+            return result
+
+    def connections(self) -> Dict[str, Dict[str, float]]:
+        """Число и суммарное время открытий/закрытий соединений"""
+        with self._lock:
+            return {action: dict(stats)
+                    for action, stats in self._connections.items()}
+
+    def dump(self, file: TextIO = None, count: int = 20) -> None:
+        """Вывод последних запросов (stderr по умолчанию)"""
+        file = file or sys.stderr
+        file.write(f"Последние запросы к БД ({count}):\n")
+        for record in self.recent(count):
+            file.write(f"  {record!r}\n")
+
+    def errorCallback(self, exc_type, exc_value, tb_str: str) -> None:
+        """Обратный вызов для GlobalErrorHandler: вывод последних запросов"""
+        self.dump()
+
+
+class ProfilingCursor(sqlite3.Cursor):
+    """Курсор, передающий время выполнения и число строк профилировщику."""
+
+    _records = ()
+
+    def _profiler(self) -> QueryProfiler:
+        return self.connection.profiler
+
+    def _start(self, sql: str, binds: int, duration: float) -> None:
+        profiler = self._profiler()
+        profiler.finish(self._records)
+        self._records = profiler.record(sql, binds, duration)
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._start(sql, len(parameters), time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        seq_of_parameters = list(seq_of_parameters)
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._start(sql, sum(len(p) for p in seq_of_parameters),
+                        time.perf_counter() - start)
+
+    def executescript(self, sql_script):
+        start = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            self._start(sql_script, 0, time.perf_counter() - start)
+
+    def _fetch(self, fetch, *args):
+        start = time.perf_counter()
+        rows = fetch(*args)
+        count = 0 if rows is None else \
+            1 if isinstance(rows, tuple) else len(rows)
+        self._profiler().fetched(self._records, count,
+                                 time.perf_counter() - start)
+        return rows
+
+    def fetchone(self):
+        return self._fetch(super().fetchone)
+
+    def fetchmany(self, size=None):
+        if size is None:
+            return self._fetch(super().fetchmany)
+        return self._fetch(super().fetchmany, size)
+
+    def fetchall(self):
+        return self._fetch(super().fetchall)
+
+    def close(self):
+        self._profiler().finish(self._records)
+        self._records = ()
+        super().close()
+
+    def __del__(self):
+        if self._records:
+            self._profiler().finish(self._records)
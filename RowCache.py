@@ -0,0 +1,73 @@
+"""Модуль кэша строк таблиц БД"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Tuple
+
+MISSING = object()
+
+
+class RowCache:
+    """LRU-кэш результатов запросов к одной таблице с временем жизни."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = None):
+        """
+        Parameters
+        ----------
+        maxsize : int, optional
+            Максимальное число записей в кэше.
+        ttl : float, optional
+            Время жизни записи в секундах (None - без ограничения).
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any:
+        """Значение по ключу или MISSING"""
+        with self._lock:
+            item = self._data.get(key, MISSING)
+            if item is not MISSING:
+                stamp, value = item
+                if self.ttl is None or time.monotonic() - stamp < self.ttl:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return MISSING
+
+    def put(self, key: Hashable, value: Any, generation: int = None) -> None:
+        """Сохранение значения по ключу
+
+        generation - поколение кэша на момент чтения значения из БД; если
+        кэш с тех пор очищался, значение устарело и не сохраняется.
+        """
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """Очистка кэша"""
+        with self._lock:
+            self._data.clear()
+            self.generation += 1
+
+    def info(self) -> Dict[str, Any]:
+        """Статистика кэша"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses,
+                    "hit_rate": self.hits / total if total else 0.0,
+                    "size": len(self._data), "maxsize": self.maxsize,
+                    "ttl": self.ttl}
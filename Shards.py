@@ -0,0 +1,115 @@
+"""Модуль архивных шардов БД (ATTACH и представления hot + архив)"""
+import os
+import re
+import sqlite3
+from typing import Dict, Iterable, List
+
+DATE_COLUMN = "date_update"
+PERIODS = {"year": "%Y", "month": "%Y%m"}
+ALIAS_PREFIX = "shard_"
+VIEW_SUFFIX = "_all"
+SQLITE_MAX_ATTACHED = 10
+
+
+def shardName(filename: str, key: str) -> str:
+    """Имя файла шарда вида `<имя>_shard_<ГГГГ[ММ]><расширение>`"""
+    stem, ext = os.path.splitext(os.path.basename(filename))
+    return f"{stem}_shard_{key}{ext}"
+
+
+def shards(folder: str, filename: str) -> Dict[str, str]:
+    """Шарды БД filename в папке folder: {ключ периода: путь}, по порядку"""
+    stem, ext = os.path.splitext(os.path.basename(filename))
+    pattern = re.compile(re.escape(stem) + r"_shard_(\d{4}(?:\d{2})?)" +
+                         re.escape(ext) + "$")
+    if not os.path.isdir(folder):
+        return {}
+    found = {}
+    for name in sorted(os.listdir(folder)):
+        match = pattern.match(name)
+        if match:
+            found[match.group(1)] = os.path.join(folder, name)
+    return found
+
+
+def alias(key: str) -> str:
+    """Имя схемы присоединенного шарда"""
+    return ALIAS_PREFIX + key
+
+
+def viewName(table: str) -> str:
+    """Имя временного представления hot + архив для table"""
+    return table + VIEW_SUFFIX
+
+
+def periodSql(period: str) -> str:
+    """Выражение ключа периода шарда для строки по date_update"""
+    return f"strftime('{PERIODS[period]}', {DATE_COLUMN})"
+
+
+def attachLimit(connection: sqlite3.Connection) -> int:
+    """Максимальное число присоединенных БД соединения"""
+    getlimit = getattr(connection, "getlimit", None)
+    if getlimit is None:
+        return SQLITE_MAX_ATTACHED
+    return getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+
+
+def prepareShard(path: str, schema: Dict[str, str],
+                 columns: Dict[str, Dict[str, str]],
+                 indexes: Dict[str, List[str]]) -> None:
+    """
+    Создание/обновление схемы файла шарда по основной БД
+
+    Отсутствующие таблицы и индексы создаются, колонки, добавленные в
+    основную БД позже создания шарда, добавляются ALTER TABLE.
+
+    Parameters
+    ----------
+    path : str
+        Путь к файлу шарда.
+    schema : dict
+        CREATE TABLE основной БД по именам таблиц.
+    columns : dict
+        Колонки {имя: тип} основной БД по именам таблиц.
+    indexes : dict
+        CREATE INDEX основной БД по именам таблиц.
+    """
+    connection = sqlite3.connect(path)
+    try:
+        with connection:
+            for table, sql in schema.items():
+                existing = [row[1] for row in connection.execute(
+                    f"PRAGMA table_info({table})")]
+                if not existing:
+                    connection.execute(re.sub(
+                        r"^CREATE TABLE (IF NOT EXISTS )?",
+                        "CREATE TABLE IF NOT EXISTS ", sql, flags=re.I))
+                for name, col_type in columns[table].items():
+                    if existing and name not in existing:
+                        connection.execute(f"ALTER TABLE {table} "
+                                           f"ADD COLUMN {name} {col_type}")
+                for index in indexes.get(table, ()):
+                    connection.execute(re.sub(
+                        r"^CREATE (UNIQUE )?INDEX (IF NOT EXISTS )?",
+                        r"CREATE \1INDEX IF NOT EXISTS ", index, flags=re.I))
+    finally:
+        connection.close()
+
+
+def viewSql(table: str, columns: Iterable[str],
+            shard_columns: Dict[str, Iterable[str]]) -> str:
+    """
+    Временное представление `<table>_all`: main.table UNION ALL шарды
+
+    Колонки, которых нет в шарде (добавлены позже), заменяются NULL.
+    """
+    columns = list(columns)
+    selects = [f"SELECT {', '.join(columns)} FROM main.{table}"]
+    for schema, existing in shard_columns.items():
+        existing = set(existing)
+        names = [name if name in existing else f"NULL AS {name}"
+                 for name in columns]
+        selects.append(f"SELECT {', '.join(names)} FROM {schema}.{table}")
+    return f"CREATE TEMP VIEW IF NOT EXISTS {viewName(table)} AS " + \
+        " UNION ALL ".join(selects)
@@ -0,0 +1,181 @@
+"""Модуль очереди записи с групповой фиксацией"""
+import queue
+import random
+import sqlite3
+import sys
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, List, Tuple
+
+if TYPE_CHECKING:
+    # concurrent.futures импортируется при первой операции (submit):
+    # тянет logging и не нужен при импорте пакета
+    from concurrent.futures import Future
+
+MAX_BATCH = 256
+MAX_DELAY = 0.005
+RETRIES = 10
+BACKOFF = 0.01
+MAX_BACKOFF = 1.0
+BUSY_MESSAGES = ("database is locked", "database is busy",
+                 "database table is locked")
+
+_STOP = object()
+
+
+def isBusy(error: Exception) -> bool:
+    """Ошибка занятости БД другим соединением/процессом"""
+    return isinstance(error, sqlite3.OperationalError) and \
+        any(message in str(error) for message in BUSY_MESSAGES)
+
+
+class WriteQueue(threading.Thread):
+    """
+    Единственный поток записи с групповой фиксацией (group commit)
+
+    Операции записи из любых потоков ставятся в очередь и возвращают
+    Future. Поток записи набирает пакет (не более max_batch операций или
+    ожидание не дольше max_delay после первой) и выполняет его одной
+    транзакцией: одна фиксация и один fsync на пакет. Каждая операция
+    выполняется в собственной точке сохранения, так что ошибка одной
+    операции не отменяет остальные. При занятости БД (другой процесс
+    держит блокировку записи) пакет повторяется с экспоненциальной
+    задержкой.
+    """
+
+    def __init__(self, db,
+                 max_batch: int = MAX_BATCH,
+                 max_delay: float = MAX_DELAY,
+                 retries: int = RETRIES,
+                 backoff: float = BACKOFF):
+        """
+        Parameters
+        ----------
+        db : DataBase
+            БД, в которую выполняется запись.
+        max_batch : int, optional
+            Максимальное число операций в одной транзакции.
+        max_delay : float, optional
+            Максимальное ожидание пополнения пакета в секундах.
+        retries : int, optional
+            Число повторов пакета при занятости БД.
+        backoff : float, optional
+            Начальная задержка повтора в секундах (удваивается).
+        """
+        super().__init__(name="DataBaseWriteQueue", daemon=True)
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.retries = retries
+        self.backoff = backoff
+        self.batches = 0
+        self.operations = 0
+        self.busy_retries = 0
+        self._db = db
+        self._queue: "queue.Queue" = queue.Queue()
+        self._stopping = False
+        self._closed = False
+
+    def submit(self, func: Callable[..., Any], *args, **kwargs) -> "Future":
+        """Постановка в очередь операции func(*args, **kwargs)"""
+        from concurrent.futures import Future
+        if self._closed:
+            raise RuntimeError("Очередь записи остановлена")
+        future = Future()
+        self._queue.put((future, func, args, kwargs))
+        return future
+
+    def insertObject(self, table: str, **kwargs) -> "Future":
+        """Вставка объекта; Future с идентификатором записи"""
+        return self.submit(self._db.insertObject, table, False, **kwargs)
+
+    def deleteById(self, table: str, id_: int) -> "Future":
+        """Удаление записи по идентификатору; Future с None"""
+        return self.submit(self._db.deleteById, table, id_)
+
+    def info(self) -> dict:
+        """Статистика очереди"""
+        return {"batches": self.batches, "operations": self.operations,
+                "busy_retries": self.busy_retries,
+                "pending": self._queue.qsize()}
+
+    def run(self) -> None:
+        while True:
+            batch = self._collect()
+            if batch:
+                try:
+                    self._commit(batch)
+                except BaseException as e:
+                    print(f"Ошибка очереди записи БД: {e}", file=sys.stderr)
+                    for future, *_ in batch:
+                        if not future.done():
+                            future.set_exception(e)
+            if self._stopping and self._queue.empty():
+                break
+
+    def _collect(self) -> List[Tuple["Future", Callable, tuple, dict]]:
+        """Набор пакета операций из очереди"""
+        batch = []
+        item = self._queue.get()
+        deadline = time.monotonic() + self.max_delay
+        while True:
+            if item is _STOP:
+                self._stopping = True
+            elif item[0].set_running_or_notify_cancel():
+                batch.append(item)
+            if len(batch) >= self.max_batch:
+                break
+            try:
+                item = self._queue.get(
+                    timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+        return batch
+
+    def _commit(self, batch: List[Tuple["Future", Callable, tuple, dict]]):
+        """Выполнение пакета одной транзакцией с повтором при занятости"""
+        attempt = 0
+        while True:
+            results = []
+            try:
+                with self._db.transaction():
+                    for future, func, args, kwargs in batch:
+                        try:
+                            with self._db.transaction():
+                                results.append((future, True,
+                                                func(*args, **kwargs)))
+                        except Exception as e:
+                            if isBusy(e):
+                                raise
+                            results.append((future, False, e))
+                break
+            except sqlite3.OperationalError as e:
+                if not isBusy(e) or attempt >= self.retries:
+                    raise
+                delay = self.backoff * 2 ** attempt
+                time.sleep(min(delay, MAX_BACKOFF) * random.uniform(0.5, 1))
+                attempt += 1
+                self.busy_retries += 1
+        self.batches += 1
+        self.operations += len(batch)
+        for future, ok, value in results:
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    def isWriter(self) -> bool:
+        """Текущий поток - поток записи очереди"""
+        return threading.current_thread() is self
+
+    def stop(self) -> None:
+        """Остановка потока после выполнения уже поставленных операций"""
+        self._closed = True
+        self._queue.put(_STOP)
+        if self is threading.current_thread() or not self.is_alive():
+            return
+        self.join()
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not _STOP and \
+                    item[0].set_running_or_notify_cancel():
+                item[0].set_exception(RuntimeError("Очередь записи остановлена"))
@@ -1,24 +1,58 @@
+import importlib
 import os
+import sys
+import types
+from threading import RLock
 from .DataBase import DataBase, DBError
 from .ConfigManager import ConfigManager
 
 
 class DBCallable:
     def __init__(self):
+        """БД и конфигурация создаются при первом обращении"""
         self._db_instance = None
-        self._default_config = ConfigManager()
-        self._db_instance = DataBase(self._default_config, is_test=True)
+        self._default_config = None
+        self._lock = RLock()
 
-    def __call__(self, config: ConfigManager = None, is_test: bool = None):
-        """Возвращает экземпляр БД (тестовую по умолчанию)"""
-        if config is None and is_test is None:
+    @property
+    def default_config(self) -> ConfigManager:
+        """Конфигурация по умолчанию (читается при первом обращении)"""
+        with self._lock:
+            if self._default_config is None:
+                self._default_config = ConfigManager()
+            return self._default_config
+
+    def __call__(self, config: ConfigManager = None, is_test: bool = None,
+                 persistent: bool = None, pool_size: int = None):
+        """Возвращает экземпляр БД (тестовую по умолчанию)
+
+        persistent=True оставляет соединение открытым между вызовами,
+        pool_size - число соединений для чтения в пуле,
+        None - берет значение из ConfigManager.
+        """
+        with self._lock:
+            if config is None and is_test is None and persistent is None \
+                    and pool_size is None:
+                if self._db_instance is None:
+                    self._db_instance = DataBase(self.default_config,
+                                                 is_test=True)
+                return self._db_instance
+            if config is None:
+                config = self.default_config
+            if is_test is None:
+                is_test = self._db_instance.is_test \
+                    if self._db_instance is not None else True
+            if self._db_instance is not None:
+                self._db_instance.close()
+            self._db_instance = DataBase(config, is_test=is_test,
+                                         persistent=persistent,
+                                         pool_size=pool_size)
             return self._db_instance
-        if config is None:
-            config = self._default_config
-        if is_test is None:
-            is_test = self.is_test
-        self._db_instance = DataBase(config, is_test=is_test)
-        return self._db_instance
+
+    def close(self) -> None:
+        """Закрытие соединений БД, если она уже создана"""
+        if self._db_instance is not None:
+            self._db_instance.close()
 
     def __getattr__(self, name):
         """Доступ к методам БД по умолчанию"""
@@ -27,5 +61,34 @@ class DBCallable:
 
 
 DB = DBCallable()
+
+# Импортируются при первом обращении: тянут asyncio, multiprocessing
+_LAZY = {"AsyncDataBase": ".AsyncDataBase",
+         "MultiDataBase": ".MultiDataBase"}
+
+
+def __getattr__(name):
+    """Ленивый импорт классов из _LAZY"""
+    if name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class _Package(types.ModuleType):
+    """Модуль пакета: классы _LAZY не затеняются одноименными модулями"""
+
+    def __setattr__(self, name, value):
+        # импорт подмодуля записывает его в атрибут пакета
+        if name in _LAZY and isinstance(value, types.ModuleType):
+            return
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _Package
+
+
 __version__ = '0.1'
-__all__ = ["DB", "ConfigManager", "DBError"]
+__all__ = ["DB", "ConfigManager", "DBError", "AsyncDataBase",
+           "MultiDataBase"]
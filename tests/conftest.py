@@ -0,0 +1,44 @@
+"""Общие фикстуры: пакет импортируется из папки репозитория, БД - во
+временной папке (ConfigManager - одиночка, одна папка на сессию)"""
+import importlib
+import itertools
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(ROOT))
+package = importlib.import_module(os.path.basename(ROOT))
+Benchmark = importlib.import_module(package.__name__ + ".Benchmark")
+DataBase = importlib.import_module(package.__name__ + ".DataBase").DataBase
+
+_names = itertools.count()
+
+
+@pytest.fixture(scope="session")
+def config(tmp_path_factory):
+    return Benchmark.prepareFolder(str(tmp_path_factory.mktemp("db")))
+
+
+@pytest.fixture
+def make_db(config):
+    """Фабрика новых БД (отдельный файл на каждый вызов)"""
+    created = []
+
+    def make(persistent: bool = False, pool_size: int = 4) -> DataBase:
+        config.config["DB_TEST"]["dbName"] = f"test_{next(_names)}.db3"
+        db = DataBase(config, is_test=True, persistent=persistent,
+                      pool_size=pool_size)
+        created.append(db)
+        return db
+
+    yield make
+    for db in created:
+        db.stopWriteQueue()
+        db.close()
+
+
+@pytest.fixture(params=[False, True], ids=["connect", "persistent"])
+def db(request, make_db):
+    return make_db(persistent=request.param)
@@ -0,0 +1,28 @@
+"""Тесты рекомендаций по индексам indexAdvice/ensureIndexes"""
+
+
+def record_filters(db):
+    db.getRowsbyValues("items", name="x")
+    db.getRowsbyValues("items", name="y")
+    db.getRowsbyValues("items", tag=1)
+    db.getRowsbyValues("links", id_child=3, name="a")
+
+
+def test_advice_for_scanned_filters(db):
+    record_filters(db)
+    advice = db.indexAdvice()
+    assert [(item["table"], item["columns"], item["count"])
+            for item in advice] == [("items", ("name",), 2)]
+    assert advice[0]["plan"] == ["SCAN items"]
+    assert db.indexAdvice(min_count=3) == []
+
+
+def test_ensure_indexes(db):
+    record_filters(db)
+    assert db.ensureIndexes(create=False)[0]["name"] == "idx_items_name"
+    assert db.indexAdvice() != []
+    created = db.ensureIndexes()
+    assert [item["name"] for item in created] == ["idx_items_name"]
+    assert db.makeRequest("SELECT name FROM sqlite_master "
+                          "WHERE name = 'idx_items_name'") != []
+    assert db.indexAdvice() == []
@@ -0,0 +1,81 @@
+"""Тесты архивных шардов"""
+import importlib
+import threading
+
+from conftest import package
+
+Shards = importlib.import_module(package.__name__ + ".Shards")
+
+
+def test_disable_archive_does_not_break_running_transaction(make_db):
+    db = make_db(persistent=True)
+    started = threading.Event()
+    resumed = threading.Event()
+    errors = []
+
+    def write():
+        try:
+            with db.transaction():
+                db.insertObject("items", True, name="a")
+                started.set()
+                resumed.wait(5)
+                db.insertObject("items", True, name="b")
+        except BaseException as exc:
+            errors.append(exc)
+
+    thread = threading.Thread(target=write)
+    thread.start()
+    started.wait(5)
+    switch = threading.Thread(target=db.disableArchive)
+    switch.start()
+    switch.join(0.2)
+    resumed.set()
+    thread.join()
+    switch.join()
+    assert errors == []
+    assert len(db.getRowsbyValues("items", name="a")) == 1
+    assert len(db.getRowsbyValues("items", name="b")) == 1
+
+
+def test_archive_rows_to_shard_view(make_db):
+    db = make_db()
+    db.makeRequest("INSERT INTO links (id_child, name, date_update) "
+                   "VALUES (1, 'old', '2020-05-01 00:00:00'), "
+                   "(2, 'new', '2030-01-01 00:00:00')")
+    try:
+        db.enableArchive("year")
+        moved = db.archiveRows("2025-01-01", tables=["links"])
+        assert sum(moved.values()) == 1
+        assert db.getRowsbyValues("links", id_child=1) == []
+        view = db.archiveView("links")
+        assert [row["name"] for row in db.getRowsbyValues(view, id_child=1)] \
+            == ["old"]
+    finally:
+        db.disableArchive()
+
+
+def test_shards_scanned_once_per_generation(make_db, monkeypatch):
+    db = make_db()
+    db.makeRequest("INSERT INTO links (id_child, name, date_update) "
+                   "VALUES (1, 'old', '2020-05-01 00:00:00')")
+    scans = []
+    scan = Shards.shards
+
+    def counted(folder, filename):
+        scans.append(filename)
+        return scan(folder, filename)
+
+    monkeypatch.setattr(Shards, "shards", counted)
+    try:
+        db.enableArchive("year")
+        db.archiveRows("2025-01-01", tables=["links"])
+        view = db.archiveView("links")
+        scans.clear()
+        with db.profile() as profiler:
+            for _ in range(5):
+                # без persistent каждый запрос открывает новое соединение
+                assert len(db.getRowsbyValues(view, id_child=1)) == 1
+        assert profiler.connections()["open"]["count"] >= 5
+        assert scans == []
+    finally:
+        db.disableArchive()
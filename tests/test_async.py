@@ -0,0 +1,73 @@
+"""Тесты асинхронной обертки AsyncDataBase"""
+import asyncio
+import threading
+
+import pytest
+
+from conftest import package
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_read_methods_in_read_threads(db):
+    adb = package.AsyncDataBase(db)
+
+    def thread(*args, **kwargs):
+        return threading.current_thread().name
+
+    async def main():
+        id_ = await adb.insertObject("items", True, name="a")
+        assert await adb.getValueById(id_, "items") == "a"
+        assert "items" in await adb.tables
+        db.getRowsbyValues, original = thread, db.getRowsbyValues
+        db.archiveRows = thread
+        try:
+            read = await adb.getRowsbyValues("items")
+            write = await adb.archiveRows("2000-01-01")
+        finally:
+            db.getRowsbyValues = original
+            del db.archiveRows
+        return read, write
+
+    try:
+        read, write = run(main())
+    finally:
+        adb._readers.shutdown()
+        adb._writer.shutdown()
+    assert read.startswith("DataBaseRead")
+    assert write.startswith("DataBaseWrite")
+
+
+@pytest.mark.parametrize("name", ["rebuildSearch", "archiveRows",
+                                  "enableClosure", "backup",
+                                  "startWriteQueue", "purgeChangeLog"])
+def test_write_methods_in_writer_thread(db, name):
+    adb = package.AsyncDataBase(db)
+    try:
+        method = getattr(adb, name)
+        assert method.func == adb.write
+    finally:
+        adb._readers.shutdown()
+        adb._writer.shutdown()
+
+
+def test_iterate_and_transaction(db):
+    async def main():
+        async with package.AsyncDataBase(db) as adb:
+            await adb.insertMany("items", [{"name": str(i)}
+                                           for i in range(5)])
+
+            def insert(db_):
+                db_.insertObject("items", True, name="t")
+                raise ValueError
+            with pytest.raises(ValueError):
+                await adb.transaction(insert)
+            batches = [rows async for rows in
+                       adb.iterRequest("SELECT name FROM items",
+                                       batch_size=2)]
+        return batches
+
+    batches = run(main())
+    assert [len(rows) for rows in batches] == [2, 2, 1]
@@ -0,0 +1,69 @@
+"""Тесты горячего резервного копирования и ротации архивов"""
+import gzip
+import importlib
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+from conftest import package
+
+Backup = importlib.import_module(package.__name__ + ".Backup")
+
+
+def names(path):
+    connection = sqlite3.connect(path)
+    try:
+        assert connection.execute("PRAGMA integrity_check").fetchone()[0] \
+            == "ok"
+        return sorted(row[0] for row in
+                      connection.execute("SELECT name FROM items"))
+    finally:
+        connection.close()
+
+
+def test_backup_skips_uncommitted_writes(db, tmp_path):
+    db.insertObject("items", True, name="a")
+    paths = []
+    with db.transaction():
+        db.insertObject("items", True, name="b")
+        # копия из другого потока не ждет окончания записи
+        thread = threading.Thread(
+            target=lambda: paths.append(db.backup(str(tmp_path))))
+        thread.start()
+        thread.join()
+    assert paths == Backup.archives(str(tmp_path), db.filename)
+    assert not os.path.exists(paths[0] + "-wal")
+    assert names(paths[0]) == ["a"]
+
+
+def test_backup_compressed(db, tmp_path):
+    db.insertObject("items", True, name="a")
+    path = db.backup(str(tmp_path), compress=True)
+    assert path.endswith(".gz")
+    copy = tmp_path / "copy.db3"
+    with gzip.open(path, "rb") as file:
+        copy.write_bytes(file.read())
+    assert names(str(copy)) == ["a"]
+    assert Backup.archives(str(tmp_path), db.filename) == [path]
+
+
+def test_rotate_keeps_newest(tmp_path):
+    created = []
+    for day in range(1, 6):
+        name = Backup.archiveName("base.db3", datetime(2024, 1, day))
+        (tmp_path / name).write_bytes(b"")
+        created.append(str(tmp_path / name))
+    (tmp_path / "other_20240101_000000.db3").write_bytes(b"")
+    assert Backup.rotate(str(tmp_path), "base.db3", 2) == created[:3]
+    assert Backup.archives(str(tmp_path), "base.db3") == created[3:]
+    assert os.path.exists(tmp_path / "other_20240101_000000.db3")
+
+
+def test_scheduler_runs_until_stopped():
+    calls = threading.Semaphore(0)
+    scheduler = Backup.BackupScheduler(calls.release, 0.01)
+    scheduler.start()
+    assert calls.acquire(timeout=5) and calls.acquire(timeout=5)
+    scheduler.stop()
+    assert not scheduler.is_alive()
@@ -0,0 +1,19 @@
+"""Дымовой тест модуля замеров Benchmark"""
+import random
+
+from conftest import Benchmark
+
+
+def test_run_size_and_compare(make_db):
+    db = make_db()
+    rng = random.Random(Benchmark.SEED)
+    Benchmark.fillDataBase(db, 50, rng)
+    results = Benchmark.runSize(db, 50, 2, rng)
+    assert {"getRowsByIds_x2", "getRowsByIds_typed_x2", "insertMany_x100",
+            "insertObject_loop_x100"} <= results.keys()
+    for result in results.values():
+        assert result["min_us"] <= result["median_us"]
+    old = {"sizes": {"50": results}}
+    lines = Benchmark.compare(old, {"sizes": {"50": results}})
+    assert len(lines) == len(results)
+    assert all(line.endswith("1.00x") for line in lines)
@@ -0,0 +1,129 @@
+"""Тесты кэша строк, текстов запросов и кэша схемы"""
+import sqlite3
+
+import pytest
+
+from conftest import package
+
+
+@pytest.fixture
+def cached(config):
+    """Кэш строк items со сбросом по PRAGMA data_version"""
+    config.setCacheTable("items", 100)
+    config.setCacheDataVersion(True)
+    yield
+    config.setCacheTable("items", 0)
+    config.setCacheDataVersion(False)
+
+
+def test_query_text_cache(db):
+    db.getRowsbyValues("items", name="a", tag=1)
+    before = db.queryCacheInfo()
+    db.getRowsbyValues("items", name="b", tag=2)
+    db.getRowByValues("items", name="c", tag=3)
+    after = db.queryCacheInfo()
+    assert after["hits"] - before["hits"] == 2
+    assert after["misses"] == before["misses"]
+    # другой оператор - другой текст запроса
+    db.getRowsbyValues("items", any, name="a", tag=1)
+    db.getRowsbyValues("items", any, name="b", tag=2)
+    assert db.queryCacheInfo()["hits"] - after["hits"] >= 1
+
+
+def test_statement_cache_size(config, make_db):
+    config.setCachedStatements(7)
+    try:
+        db = make_db()
+    finally:
+        config.setCachedStatements(128)
+    assert db._pool.cached_statements == 7
+
+
+@pytest.fixture
+def row_cache(config):
+    """Кэш строк items без сброса по PRAGMA data_version"""
+    config.setCacheTable("items", 100)
+    yield
+    config.setCacheTable("items", 0)
+
+
+def test_row_cache_read_through(row_cache, db):
+    id_ = db.insertObject("items", True, name="v1")
+    assert db.getValueById(id_, "items") == "v1"
+    with db.profile() as profiler:
+        assert db.getValueById(id_, "items") == "v1"
+        assert db.getIDbyValue("v1", "items") == id_
+        assert db.getIDbyValue("v1", "items") == id_
+    assert profiler.histograms().keys() == {"getIDbyValue"}
+    assert profiler.histograms()["getIDbyValue"]["count"] == 1
+    info = db.cacheInfo()["items"]
+    assert (info["hits"], info["misses"], info["size"]) == (2, 2, 2)
+
+
+def test_row_cache_invalidated_by_writes(row_cache, db):
+    id_ = db.insertObject("items", True, name="v1")
+    assert db.getValueById(id_, "items") == "v1"
+    db.insertObject("items", True, id=id_, name="v2")
+    assert db.getValueById(id_, "items") == "v2"
+    db.makeRequest("UPDATE items SET name = 'v3' WHERE id = ?", id_)
+    assert db.getValueById(id_, "items") == "v3"
+    assert db.getIDbyValue("v3", "items") == id_
+    db.deleteById("items", id_)
+    assert db.getIDbyValue("v3", "items") is None
+
+
+def test_row_cache_bypassed_in_transaction(row_cache, db):
+    id_ = db.insertObject("items", True, name="v1")
+    assert db.getValueById(id_, "items") == "v1"
+    with pytest.raises(ValueError):
+        with db.transaction():
+            db.makeRequest("UPDATE items SET name = 'v2' WHERE id = ?", id_)
+            assert db.getValueById(id_, "items") == "v2"
+            raise ValueError
+    assert db.getValueById(id_, "items") == "v1"
+
+
+def test_data_version_requires_persistent(cached, make_db):
+    with pytest.raises(package.DBError):
+        make_db(persistent=False)
+
+
+def test_data_version_sees_external_update(cached, make_db):
+    db = make_db(persistent=True)
+    id_ = db.insertObject("items", True, name="v1")
+    assert db.getValueById(id_, "items") == "v1"
+    other = sqlite3.connect(db.fullpath)
+    try:
+        with other:
+            other.execute("UPDATE items SET name = 'v2' WHERE id = ?", (id_,))
+    finally:
+        other.close()
+    assert db.getValueById(id_, "items") == "v2"
+
+
+def test_schema_cache_sees_external_alter(db):
+    id_ = db.insertObject("items", True, name="row")
+    assert "extra" not in db.getColumnsNames("items")
+    other = sqlite3.connect(db.fullpath)
+    try:
+        other.execute("ALTER TABLE items ADD COLUMN extra TEXT")
+        with other:
+            other.execute("UPDATE items SET extra = 'x' WHERE id = ?", (id_,))
+    finally:
+        other.close()
+    # вне выдачи соединения - кэш без проверки schema_version
+    assert "extra" not in db.getColumnsNames("items")
+    with db:
+        assert "extra" in db.getColumnsNames("items")
+    assert db.getRowByValues("items", id=id_)["extra"] == "x"
+
+
+def test_schema_lookup_outside_checkout_does_not_connect(make_db):
+    db = make_db(persistent=False)
+    db.getColumns("items")
+    with db.profile() as profiler:
+        for _ in range(10):
+            db.getColumns("items")
+            db.getColumnsNames("items")
+    assert profiler.connections()["open"]["count"] == 0
+    assert profiler.histograms() == {}
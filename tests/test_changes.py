@@ -0,0 +1,64 @@
+"""Тесты ленты изменений changesSince"""
+import importlib
+from datetime import datetime
+
+import pytest
+
+from conftest import package
+
+DBError = importlib.import_module(package.__name__ + ".DataBase").DBError
+
+
+def summary(changes):
+    return [(change["table"], change["op"], change["id"])
+            for change in changes]
+
+
+def test_changelog_collapses_and_resumes(db):
+    db.insertObject("items", True, name="before")
+    assert db.enableChangeLog(["items"]) == ["items"]
+    db.insertMany("items", [{"name": "a"}, {"name": "b"}, {"name": "c"}])
+    db.makeRequest("UPDATE items SET name = 'a2' WHERE id = 2")
+    db.deleteById("items", 3)
+    db.makeRequest("UPDATE items SET name = 'before2' WHERE id = 1")
+    changes, cursor = db.changesSince(limit=3)
+    # строки читаются текущими: удаленная к моменту чтения - "D"
+    assert summary(changes) == [("items", "I", 2), ("items", "D", 3),
+                                ("items", "I", 4)]
+    assert changes[0]["row"]["name"] == "a2" and changes[1]["row"] is None
+    # позиция сохраняется строкой и продолжает чтение
+    changes, cursor = db.changesSince(str(cursor))
+    assert summary(changes) == [("items", "U", 2), ("items", "D", 3),
+                                ("items", "U", 1)]
+    changes, same = db.changesSince(cursor)
+    assert changes == [] and same == cursor
+
+
+def test_purge_keeps_last_record(db):
+    db.enableChangeLog(["items"])
+    db.insertMany("items", [{"name": "a"}, {"name": "b"}])
+    changes, cursor = db.changesSince()
+    assert db.purgeChangeLog(cursor) == 1
+    db.insertObject("items", True, name="c")
+    assert summary(db.changesSince(cursor)[0]) == [("items", "I", 3)]
+
+
+def test_changelog_required(db):
+    with pytest.raises(DBError):
+        db.changesSince(0)
+
+
+def test_changes_by_date(db):
+    db.insertMany("links", [
+        {"id": i, "id_child": i, "name": f"link{i}",
+         "date_update": f"2024-01-0{day} 00:00:00"}
+        for i, day in ((1, 1), (2, 2), (3, 2), (4, 3))])
+    changes, cursor = db.changesSince(datetime(2024, 1, 1), ["links"],
+                                      limit=2, typed=True)
+    # строки с date_update, равной since, входят в выборку
+    assert summary(changes) == [("links", "U", 1), ("links", "U", 2)]
+    assert changes[1]["row"]["date_update"] == datetime(2024, 1, 2)
+    changes, cursor = db.changesSince(str(cursor), ["links"], limit=2)
+    assert summary(changes) == [("links", "U", 3), ("links", "U", 4)]
+    assert db.changesSince(cursor, ["links"])[0] == []
+
@@ -0,0 +1,46 @@
+"""Тесты колоночной выборки в массивы NumPy"""
+import pytest
+
+np = pytest.importorskip("numpy")
+
+
+@pytest.fixture
+def filled(db):
+    db.insertMany("items", [{"name": f"item{i}", "tag": i % 2,
+                             "value": i / 2} for i in range(5)])
+    db.insertMany("links", [{"id_child": 1, "name": "a",
+                             "date_update": "2024-01-02 03:04:05"}])
+    return db
+
+
+def test_columns_arrays_dtypes(filled):
+    result = filled.getColumnsArrays("items", batch_size=2)
+    assert result["id"].dtype == np.int64
+    assert result["value"].dtype == np.float64
+    assert list(result["name"]) == [f"item{i}" for i in range(5)]
+    dates = filled.getColumnsArrays("links", ["date_update"])["date_update"]
+    assert dates[0] == np.datetime64("2024-01-02T03:04:05")
+
+
+def test_columns_arrays_filter_and_records(filled):
+    records = filled.getColumnsArrays("items", ["name", "tag"],
+                                      structured=True, tag=1)
+    assert list(records.name) == ["item1", "item3"]
+    assert list(records.tag) == [1, 1]
+
+
+def test_columns_arrays_single_checkout(make_db):
+    db = make_db(persistent=False)
+    db.insertObject("items", True, name="row")
+    with db.profile() as profiler:
+        db.getColumnsArrays("items")
+    assert profiler.connections()["open"]["count"] == 1
+
+
+def test_request_arrays(filled):
+    result = filled.requestArrays(
+        "SELECT tag, COUNT(*) AS n FROM items GROUP BY tag ORDER BY tag",
+        dtypes={"n": "INTEGER"})
+    assert list(result["tag"]) == [0, 1]
+    assert result["n"].dtype == np.int64
+    assert list(result["n"]) == [3, 2]
@@ -0,0 +1,23 @@
+"""Тесты создания БД скриптом database_creator.sql"""
+
+
+def test_create_db_runs_script_once(db):
+    with db as cursor:
+        cursor.execute("PRAGMA user_version")
+        version = cursor.fetchone()[0]
+    assert version != 0
+    db.insertObject("items", True, name="kept")
+    with db.profile() as profiler:
+        db.createDB()
+    assert [record.sql for record in profiler.recent()] == \
+        ["PRAGMA user_version"]
+    assert db.getIDbyValue("kept", "items") == 1
+
+
+def test_create_db_reapplies_changed_script(db):
+    db.makeRequest("PRAGMA user_version = 1")
+    db.makeRequest("DROP TABLE tags")
+    db.createDB()
+    assert "tags" in db.tables
+    with db as cursor:
+        assert cursor.execute("PRAGMA user_version").fetchone()[0] != 1
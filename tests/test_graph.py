@@ -0,0 +1,69 @@
+"""Тесты обхода связей links (WITH RECURSIVE и closure table)"""
+import sqlite3
+
+import pytest
+
+from conftest import package
+
+# 1 -> 2 -> 3 -> 4, 5 -> 3
+EDGES = [(1, 2), (2, 3), (3, 4), (5, 3), (4, None)]
+
+
+@pytest.fixture
+def graph(db):
+    db.insertMany("links", [{"id": id_, "id_child": child}
+                            for id_, child in EDGES])
+    return db
+
+
+def check(db):
+    assert db.getDescendants(1) == [(2, 1), (3, 2), (4, 3)]
+    assert db.getDescendants(1, depth=2) == [(2, 1), (3, 2)]
+    assert db.getAncestors(4) == [(3, 1), (2, 2), (5, 2), (1, 3)]
+    assert db.getSubtree([2]) == [(2, 3, 0), (3, 4, 1)]
+
+
+def test_traverse_recursive(graph):
+    check(graph)
+
+
+def test_traverse_closure(graph):
+    graph.enableClosure()
+    check(graph)
+    graph.deleteById("links", 5)
+    graph.insertMany("links", [{"id": 6, "id_child": 1}])
+    assert graph.getAncestors(4) == [(3, 1), (2, 2), (1, 3), (6, 4)]
+    graph.disableClosure()
+    assert graph.getAncestors(4) == [(3, 1), (2, 2), (1, 3), (6, 4)]
+
+
+def test_traverse_tags(graph):
+    graph.insertMany("items", [{"id": i, "tag": i % 2} for i in range(1, 6)])
+    Tag = package.Benchmark.Tag
+    assert graph.getDescendants(1, table="items", tags={Tag(1, "odd")}) == \
+        [(3, 2)]
+    assert graph.getDescendants(1, table="items", tags=set()) == []
+
+
+def test_closure_rejects_cycles(graph):
+    graph.makeRequest("UPDATE links SET id_child = 2 WHERE id = 4")
+    assert graph.getDescendants(2) == [(3, 1), (4, 2)]
+    with pytest.raises(package.DBError):
+        graph.enableClosure()
+    graph.makeRequest("UPDATE links SET id_child = NULL WHERE id = 4")
+    graph.enableClosure()
+    with pytest.raises(sqlite3.IntegrityError):
+        graph.makeRequest("UPDATE links SET id_child = 1 WHERE id = 4")
+    with pytest.raises(sqlite3.IntegrityError):
+        graph.insertMany("links", [{"id": 7, "id_child": 7}])
+    check(graph)
+
+
+def test_traverse_single_checkout(make_db):
+    db = make_db(persistent=False)
+    db.insertMany("links", [{"id": id_, "id_child": child}
+                            for id_, child in EDGES])
+    with db.profile() as profiler:
+        db.getDescendants(1, table="items", tags=set())
+        db.getDescendants(1)
+    assert profiler.connections()["open"]["count"] == 2
@@ -0,0 +1,36 @@
+"""Тесты дешевого импорта пакета"""
+import importlib
+import os
+import subprocess
+import sys
+
+from conftest import ROOT, package
+
+HEAVY = ("concurrent.futures", "asyncio", "multiprocessing", "IPython",
+         "numpy")
+
+
+def test_import_skips_heavy_modules():
+    code = f"import sys, {package.__name__}; " \
+        f"print([m for m in {HEAVY!r} if m in sys.modules])"
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(ROOT))
+    output = subprocess.run([sys.executable, "-c", code], env=env,
+                            check=True, capture_output=True, text=True)
+    assert output.stdout.strip() == "[]"
+
+
+def test_import_does_not_create_db():
+    code = f"import {package.__name__} as p; p.DB.close(); " \
+        "print(p.DB._default_config, p.DB._db_instance)"
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(ROOT))
+    output = subprocess.run([sys.executable, "-c", code], env=env,
+                            check=True, capture_output=True, text=True)
+    assert output.stdout.strip() == "None None"
+
+
+def test_lazy_classes():
+    # подмодули с именами классов не подменяют классы в пакете
+    for name in ("AsyncDataBase", "MultiDataBase"):
+        importlib.import_module(f"{package.__name__}.{name}")
+    assert package.AsyncDataBase.__name__ == "AsyncDataBase"
+    assert package.MultiDataBase.__name__ == "MultiDataBase"
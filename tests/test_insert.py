@@ -0,0 +1,50 @@
+"""Тесты пакетной вставки insertMany"""
+import pytest
+
+
+def names(db, table="tags"):
+    return db.makeRequest(f"SELECT id, name FROM {table} ORDER BY id")
+
+
+def test_insert_many_returns_ids_in_order(db):
+    ids = db.insertMany("items", [{"name": "a"}, {"name": "b", "tag": 1},
+                                  {"name": "c"}])
+    rows = db.getRowsByIds(ids, "items")
+    assert [rows[id_]["name"] for id_ in ids] == ["a", "b", "c"]
+
+
+def test_insert_many_replace_duplicate_key(db):
+    ids = db.insertMany("tags", [{"name": "a"}, {"name": "a"}],
+                        on_conflict="REPLACE")
+    assert names(db) == [(ids[1], "a")]
+    assert ids[0] == ids[1]
+
+
+def test_insert_many_replace_existing_row(db):
+    db.insertMany("tags", [{"name": "a"}, {"name": "b"}])
+    ids = db.insertMany("tags", [{"name": "b"}, {"name": "c"}],
+                        on_conflict="REPLACE")
+    assert dict((name, id_) for id_, name in names(db)) == \
+        {"a": 1, "b": ids[0], "c": ids[1]}
+
+
+def test_insert_many_ignore_returns_existing_ids(db):
+    first = db.insertMany("tags", [{"name": "a"}])
+    ids = db.insertMany("tags", [{"name": "a"}, {"name": "b"}],
+                        on_conflict="IGNORE", conflict=["name"])
+    assert ids[0] == first[0]
+    assert names(db) == [(first[0], "a"), (ids[1], "b")]
+
+
+def test_insert_many_update(db):
+    ids = db.insertMany("tags", [{"name": "a"}, {"name": "b"}])
+    assert db.insertMany("tags", [{"id": 7, "name": "b"}],
+                         on_conflict="UPDATE", conflict=["name"]) == [7]
+    assert names(db) == [(ids[0], "a"), (7, "b")]
+
+
+def test_insert_many_explicit_ids_and_rollback(db):
+    assert db.insertMany("tags", [{"id": 5, "name": "x"}]) == [5]
+    with pytest.raises(Exception):
+        db.insertMany("tags", [{"name": "y"}, {"name": "x"}])
+    assert names(db) == [(5, "x")]
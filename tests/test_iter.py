@@ -0,0 +1,47 @@
+"""Тесты потоковых выборок iterRequest и iterRows"""
+from contextlib import closing
+from datetime import datetime
+
+ROWS = 25
+
+
+def fill(db):
+    db.insertMany("links", [{"id": i, "id_child": i % 4, "name": f"link{i}",
+                             "date_update": f"2024-01-{i:02d} 00:00:00"}
+                            for i in range(1, ROWS + 1)])
+
+
+def test_iter_request_batches(db):
+    fill(db)
+    batches = list(db.iterRequest("SELECT id FROM links WHERE id > ? "
+                                  "ORDER BY id", 5, batch_size=8))
+    assert [len(batch) for batch in batches] == [8, 8, 4]
+    assert [row[0] for batch in batches for row in batch] == \
+        list(range(6, ROWS + 1))
+    assert db._pool.depth == 0
+
+
+def test_iter_rows(db):
+    fill(db)
+    rows = list(db.iterRows("links", batch_size=3, id_child=1))
+    assert [row["id"] for row in rows] == [1, 5, 9, 13, 17, 21, 25]
+    assert rows[0]["name"] == "link1"
+    rows = list(db.iterRows("links", any, id_child=0, name="link1"))
+    assert sorted(row["id"] for row in rows) == [1, 4, 8, 12, 16, 20, 24]
+    assert len(list(db.iterRows("links", batch_size=7))) == ROWS
+
+
+def test_iter_rows_typed(db):
+    fill(db)
+    row = next(iter(db.iterRows("links", typed=True, id=3)))
+    assert row["date_update"] == datetime(2024, 1, 3)
+    row = next(iter(db.iterRows("links", id=3)))
+    assert row["date_update"] == "2024-01-03 00:00:00"
+
+
+def test_early_close_releases_connection(db):
+    fill(db)
+    with closing(db.iterRows("links", batch_size=2)) as rows:
+        assert next(rows)["id"] == 1
+        assert db._pool.depth == 1
+    assert db._pool.depth == 0
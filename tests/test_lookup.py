@@ -0,0 +1,59 @@
+"""Тесты пакетных выборок по наборам значений и ID"""
+from collections import namedtuple
+
+import pytest
+
+from conftest import DataBase
+
+ITEMS = 20
+
+
+@pytest.fixture(params=[None, 3, 1], ids=["single", "chunks", "temp"])
+def items(request, db, monkeypatch):
+    """БД с ITEMS записями items; лимит параметров запроса по параметру"""
+    db.insertMany("items", [{"name": f"item{i}", "tag": i % 3}
+                            for i in range(1, ITEMS + 1)])
+    if request.param is not None:
+        # 3 - выборка частями IN (...), 1 - через temp.lookup_values
+        monkeypatch.setattr(DataBase, "_variableLimit",
+                            staticmethod(lambda connection: request.param))
+    return db
+
+
+def test_ids_by_values(items):
+    names = [f"item{i}" for i in range(ITEMS, 0, -1)] + ["missing",
+                                                       "item1"]
+    result = items.getIDsByValues(names, "items")
+    assert list(result) == names[:-1]
+    assert result["missing"] is None
+    assert all(result[f"item{i}"] == i for i in range(1, ITEMS + 1))
+
+
+def test_values_by_ids(items):
+    ids = list(range(ITEMS + 2, 0, -1))
+    result = items.getValuesByIds(ids, "items")
+    assert list(result) == ids
+    assert result[ITEMS + 1] is None and result[ITEMS + 2] is None
+    assert all(result[i] == f"item{i}" for i in range(1, ITEMS + 1))
+
+
+def test_rows_by_ids(items):
+    result = items.getRowsByIds([5, 7, 100], "items")
+    assert result[100] == {}
+    assert result[5]["name"] == "item5" and result[5]["tag"] == 2
+    assert result[7] == {"id": 7, "name": "item7", "tag": 1, "value": None}
+
+
+def test_ids_from_view(items):
+    items.insertMany("links", [{"id": i, "id_child": i, "name": f"link{i}"}
+                               for i in range(1, ITEMS + 1)])
+    Tag = namedtuple("Tag", "id")
+    links = [{"id": i} for i in range(ITEMS + 2, 0, -1)] + [{"id": 4}]
+    rows = items.getIdsFromView("items", links, {Tag(0), Tag(2)})
+    expected = [i for i in range(1, ITEMS + 1) if i % 3 != 1]
+    assert [tuple(row) for row in rows] == [(i, i) for i in expected]
+    assert items.getIdsFromView("items", links, set()) == []
+    # без колонки tag теги не учитываются
+    rows = items.getIdsFromView("links", links, set())
+    assert [row[0] for row in rows] == list(range(1, ITEMS + 1))
+    assert items.getIdsFromView("items", [], {Tag(0)}) == []
@@ -0,0 +1,63 @@
+"""Тесты запросов к нескольким файлам БД (MultiDataBase)"""
+import importlib
+
+import pytest
+
+from conftest import package
+
+MultiDataBase = importlib.import_module(
+    package.__name__ + ".MultiDataBase").MultiDataBase
+DBError = importlib.import_module(package.__name__ + ".DataBase").DBError
+
+
+@pytest.fixture
+def paths(make_db):
+    """Два файла БД: нечетные и четные id с date_update по порядку id"""
+    result = []
+    for first in (1, 2):
+        db = make_db()
+        db.insertMany("links", [
+            {"id": i, "id_child": i % 2, "name": f"link{i}",
+             "date_update": f"2024-01-{i:02d} 00:00:00"}
+            for i in range(first, 11, 2)])
+        result.append(db.fullpath)
+    return result
+
+
+@pytest.fixture
+def mdb(paths):
+    with MultiDataBase(paths, processes=False) as mdb:
+        yield mdb
+
+
+def test_merge_order_and_limit(mdb):
+    rows = mdb.makeRequest("SELECT id, date_update FROM links",
+                           order_by="date_update", descending=True, limit=4)
+    assert [row[0] for row in rows] == [10, 9, 8, 7]
+    rows = mdb.makeRequest("SELECT id FROM links WHERE id > ?", 6)
+    assert sorted(row[0] for row in rows) == [7, 8, 9, 10]
+
+
+def test_rows_by_values_with_source(mdb, paths):
+    rows = mdb.getRowsbyValues("links", order_by=["id_child", "id"],
+                               source=True, id_child=1)
+    assert [row["id"] for row in rows] == [1, 3, 5, 7, 9]
+    assert {row["source"] for row in rows} == {paths[0]}
+    rows = mdb.getRowsbyValues("links", any, order_by="id", limit=3,
+                               id=2, name="link5")
+    assert [row["name"] for row in rows] == ["link2", "link5"]
+
+
+def test_errors(mdb, paths, tmp_path):
+    with pytest.raises(DBError):
+        mdb.makeRequest("DELETE FROM links")
+    with pytest.raises(DBError):
+        MultiDataBase(paths + [str(tmp_path / "missing.db3")],
+                      processes=False)
+
+
+def test_processes(paths):
+    with MultiDataBase(paths, workers=2) as mdb:
+        rows = mdb.makeRequest("SELECT COUNT(*) AS n FROM links",
+                               order_by="n")
+    assert rows == [(5,), (5,)]
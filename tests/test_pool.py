@@ -0,0 +1,175 @@
+"""Нагрузочные и регрессионные тесты пула соединений"""
+import sqlite3
+import threading
+
+READERS = 8
+WRITERS = 4
+ROUNDS = 25
+BATCH = 5
+
+
+def run_threads(targets):
+    """Запуск потоков и сбор исключений из них"""
+    errors = []
+
+    def wrap(target):
+        def run():
+            try:
+                target()
+            except BaseException as exc:
+                errors.append(exc)
+        return run
+
+    threads = [threading.Thread(target=wrap(target)) for target in targets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+def test_stress_readers_writers_transactions(db):
+    """Читатели видят транзакции целиком, записи не теряются"""
+    for i in range(10):
+        db.insertObject("items", True, name=f"seed{i}", tag=0)
+    stop = threading.Event()
+    partial = []
+
+    def reader():
+        while not stop.is_set():
+            assert len(db.getRowsbyValues("items", tag=0)) >= 10
+            for row in db.getRowsbyValues("items", tag=1):
+                count = len(db.getRowsbyValues("items", name=row["name"]))
+                if count != BATCH:
+                    partial.append((row["name"], count))
+
+    def writer(n):
+        def write():
+            for i in range(ROUNDS):
+                db.insertObject("items", True, name=f"w{n}-{i}", tag=2)
+                with db.transaction():
+                    for _ in range(BATCH):
+                        db.insertObject("items", True, name=f"t{n}-{i}",
+                                        tag=1)
+        return write
+
+    readers = [reader] * READERS
+    writers = [writer(n) for n in range(WRITERS)]
+    errors = []
+    reader_threads = threading.Thread(
+        target=lambda: errors.extend(run_threads(readers)))
+    reader_threads.start()
+    errors += run_threads(writers)
+    stop.set()
+    reader_threads.join()
+    assert errors == []
+    assert partial == []
+    assert len(db.getRowsbyValues("items", tag=2)) == WRITERS * ROUNDS
+    assert len(db.getRowsbyValues("items", tag=1)) == \
+        WRITERS * ROUNDS * BATCH
+
+
+def test_write_inside_iteration_uses_writer(db):
+    for i in range(3):
+        db.insertObject("items", True, name=f"row{i}")
+    other = sqlite3.connect(db.fullpath)
+    try:
+        rows = db.iterRows("items")
+        next(rows)
+        db.insertObject("items", True, name="inside")
+        assert other.execute("SELECT COUNT(*) FROM items "
+                             "WHERE name = 'inside'").fetchone() == (1,)
+        assert run_threads([lambda: db.insertObject(
+            "items", True, name="thread")]) == []
+        rows.close()
+    finally:
+        other.close()
+    assert db.getIDbyValue("thread", "items") is not None
+
+
+def test_delete_inside_read_block_is_committed(db):
+    id_ = db.insertObject("items", True, name="gone")
+    with db:
+        db.deleteById("items", id_)
+    other = sqlite3.connect(db.fullpath)
+    try:
+        assert other.execute("SELECT COUNT(*) FROM items WHERE id = ?",
+                             (id_,)).fetchone() == (0,)
+    finally:
+        other.close()
+
+
+def test_reads_see_own_uncommitted_writes(db):
+    id_ = db.insertObject("items", False, name="pending")
+    assert db.getIDbyValue("pending", "items") == id_
+    other = sqlite3.connect(db.fullpath)
+    try:
+        count = "SELECT COUNT(*) FROM items WHERE name = 'pending'"
+        assert other.execute(count).fetchone() == (0,)
+        assert run_threads([lambda: db.getIDbyValue(
+            "pending", "items")]) == []
+        db.commit()
+        assert other.execute(count).fetchone() == (1,)
+    finally:
+        other.close()
+
+
+def test_cte_write_goes_to_writer(db):
+    db.makeRequest("WITH t(x) AS (VALUES ('a'), ('b')) "
+                   "INSERT INTO items (name) SELECT x FROM t")
+    assert db.makeRequest("WITH t AS (SELECT COUNT(*) FROM items) "
+                          "SELECT * FROM t") == [(2,)]
+
+
+def test_iterator_closed_after_transaction(db):
+    for i in range(3):
+        db.insertObject("items", True, name=f"row{i}")
+    other = sqlite3.connect(db.fullpath)
+    try:
+        with db.transaction():
+            rows = db.iterRows("items", batch_size=1)
+            next(rows)
+            db.insertObject("items", True, name="inside")
+        count = "SELECT COUNT(*) FROM items WHERE name = 'inside'"
+        assert other.execute(count).fetchone() == (1,)
+        next(rows)
+        rows.close()
+        assert run_threads([lambda: db.insertObject(
+            "items", True, name="thread")]) == []
+    finally:
+        other.close()
+    assert db.getIDbyValue("thread", "items") is not None
+
+
+def test_outer_block_exits_before_iterator(db):
+    db.insertObject("items", True, name="row")
+    with db:
+        rows = db.iterRows("items")
+        next(rows)
+    db.insertObject("items", True, name="after")
+    rows.close()
+    assert db._pool.depth == 0
+    assert db.getIDbyValue("after", "items") is not None
+
+
+def test_close_during_transaction_of_other_thread(db):
+    started, closed = threading.Event(), threading.Event()
+
+    def write():
+        with db.transaction():
+            db.insertObject("items", True, name="before")
+            started.set()
+            closed.wait(5)
+            db.insertObject("items", True, name="after")
+
+    thread = threading.Thread(target=lambda: errors.extend(
+        run_threads([write])))
+    errors = []
+    thread.start()
+    assert started.wait(5)
+    db.close()
+    closed.set()
+    thread.join()
+    assert errors == []
+    assert db.getIDbyValue("before", "items") is not None
+    assert db.getIDbyValue("after", "items") is not None
@@ -0,0 +1,44 @@
+"""Тесты PRAGMA производительности из секции *_PERF"""
+import pytest
+
+
+@pytest.fixture
+def perf(config):
+    """Секция DB_TEST_PERF, восстанавливаемая после теста"""
+    saved = dict(config.config["DB_TEST_PERF"])
+    yield config.config["DB_TEST_PERF"]
+    config.config["DB_TEST_PERF"] = saved
+
+
+def pragmas(db):
+    with db as cursor:
+        return {name: cursor.execute(f"PRAGMA {name}").fetchone()[0]
+                for name in ("journal_mode", "synchronous", "cache_size",
+                             "temp_store", "busy_timeout")}
+
+
+def test_preset_with_override(make_db, perf):
+    perf["preset"] = "fast-read"
+    perf["cache_size"] = "-1000"
+    db = make_db()
+    expected = {"journal_mode": "wal", "synchronous": 1,
+                "cache_size": -1000, "temp_store": 2, "busy_timeout": 5000}
+    # каждое соединение (без persistent - новое) настроено одинаково
+    assert pragmas(db) == expected
+    assert pragmas(db) == expected
+
+
+def test_safe_preset_by_default(make_db, perf):
+    perf.clear()
+    db = make_db()
+    assert pragmas(db) == {"journal_mode": "wal", "synchronous": 2,
+                           "cache_size": -2000, "temp_store": 0,
+                           "busy_timeout": 5000}
+
+
+@pytest.mark.parametrize("name, value", [("synchronous", "fastest"),
+                                         ("cache_size", "1; DROP")])
+def test_invalid_value_rejected(config, perf, name, value):
+    perf[name] = value
+    with pytest.raises(ValueError):
+        config.getPerfPragmas(is_test=True)
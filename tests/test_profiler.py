@@ -0,0 +1,51 @@
+"""Тесты профилировщика запросов и журнала медленных запросов"""
+import importlib
+import io
+
+from conftest import package
+
+Profiler = importlib.import_module(package.__name__ + ".Profiler")
+
+
+def test_disabled_by_default(db):
+    db.getRowsbyValues("items", name="a")
+    assert not db.profiler.active
+    assert db.profiler.recent() == [] and db.profiler.histograms() == {}
+
+
+def test_scope_collects_methods_and_rows(db):
+    db.insertMany("items", [{"name": "a"}, {"name": "b"}])
+    with db.profile() as profiler:
+        db.getRowsByIds([1, 2, 3], "items")
+        db.getRowsbyValues("items", name="a")
+    db.getRowsbyValues("items", name="b")
+    stats = profiler.histograms()
+    assert stats["getRowsByIds"]["count"] == 1
+    assert stats["getRowsByIds"]["rows"] == 2
+    assert stats["getRowsbyValues"]["rows"] == 1
+    assert sum(stats["getRowsbyValues"]["histogram"].values()) == 1
+    record = profiler.recent()[0]
+    assert record.method == "getRowsByIds" and record.binds == 3
+    assert "IN (?...)" in record.sql
+    assert not db.profiler.active
+
+
+def test_slow_log(db, tmp_path):
+    log = tmp_path / "slow.log"
+    db.profiler.enable(slow_threshold=0, log_file=str(log))
+    try:
+        db.getRowsbyValues("items", name="a")
+    finally:
+        db.profiler.disable()
+    lines = log.read_text(encoding="utf-8").splitlines()
+    assert any(line.startswith("SLOW ") and "getRowsbyValues" in line
+               for line in lines)
+    assert db.profiler.histograms()["getRowsbyValues"]["count"] == 1
+    output = io.StringIO()
+    db.profiler.dump(output, count=1)
+    assert "getRowsbyValues" in output.getvalue()
+
+
+def test_sql_shape():
+    assert Profiler.sqlShape("SELECT *  FROM t\n WHERE id IN (?, ?,?)") \
+        == "SELECT * FROM t WHERE id IN (?...)"
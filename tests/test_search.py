@@ -0,0 +1,56 @@
+"""Тесты полнотекстового поиска"""
+import sqlite3
+
+import pytest
+
+from conftest import DataBase, package
+
+
+@pytest.fixture
+def searchable(config):
+    config.setSearchTable("items", ("name",))
+    yield
+    config.setSearchTable("items", None)
+
+
+def test_search(searchable, make_db):
+    db = make_db()
+    id_ = db.insertObject("items", True, name="Полнотекстовый поиск")
+    assert [row["id"] for row in db.search("items", "полнотекст")] == [id_]
+
+
+def test_existing_index_needs_no_write_lock(searchable, make_db):
+    db = make_db()
+    other = sqlite3.connect(db.fullpath)
+    try:
+        other.execute("BEGIN IMMEDIATE")
+        db.config.config["DB_TEST_PERF"]["busy_timeout"] = "0"
+        try:
+            again = DataBase(db.config, is_test=True)
+        finally:
+            db.config.config.remove_option("DB_TEST_PERF", "busy_timeout")
+        assert again.search("items", "x") == []
+        again.close()
+    finally:
+        other.rollback()
+        other.close()
+
+
+def test_search_single_checkout(searchable, make_db):
+    db = make_db(persistent=False)
+    db.insertObject("items", True, name="один два")
+    with db.profile() as profiler:
+        assert len(db.search("items", "два")) == 1
+    assert profiler.connections()["open"]["count"] == 1
+
+
+def test_search_without_index(make_db):
+    db = make_db()
+    with pytest.raises(package.DBError):
+        db.search("items", "x")
+    db.enableSearch("items", ["name"])
+    db.insertObject("items", True, name="слово")
+    assert len(db.search("items", "слово", prefix=False)) == 1
+    db.disableSearch("items")
+    with pytest.raises(package.DBError):
+        db.search("items", "слово")
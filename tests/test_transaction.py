@@ -0,0 +1,56 @@
+"""Тесты явных транзакций transaction() и вложенных SAVEPOINT"""
+import threading
+
+import pytest
+
+
+def names(db):
+    return sorted(row["name"] for row in db.getRowsbyValues("items", tag=0))
+
+
+def test_commit_once_on_exit(db):
+    seen = []
+    with db.transaction():
+        db.insertObject("items", True, name="a", tag=0)
+        db.insertObject("items", True, name="b", tag=0)
+        # другой поток не видит незафиксированных строк
+        thread = threading.Thread(target=lambda: seen.append(names(db)))
+        thread.start()
+        thread.join()
+        assert names(db) == ["a", "b"]
+    assert seen == [[]]
+    assert names(db) == ["a", "b"]
+
+
+def test_exception_rolls_back_everything(db):
+    with pytest.raises(ValueError):
+        with db.transaction():
+            db.insertObject("items", True, name="a", tag=0)
+            with db.transaction():
+                db.insertObject("items", True, name="b", tag=0)
+            raise ValueError
+    assert names(db) == []
+
+
+def test_nested_rollback_keeps_outer(db):
+    with db.transaction():
+        db.insertObject("items", True, name="a", tag=0)
+        with pytest.raises(ValueError):
+            with db.transaction():
+                db.insertObject("items", True, name="b", tag=0)
+                with db.transaction():
+                    db.insertObject("items", True, name="c", tag=0)
+                raise ValueError
+        db.insertObject("items", True, name="d", tag=0)
+    assert names(db) == ["a", "d"]
+
+
+def test_writes_after_transaction_autocommit(db):
+    with db.transaction():
+        db.insertObject("items", True, name="a", tag=0)
+    db.insertObject("items", True, name="b", tag=0)
+    seen = []
+    thread = threading.Thread(target=lambda: seen.append(names(db)))
+    thread.start()
+    thread.join()
+    assert seen == [["a", "b"]]
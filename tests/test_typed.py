@@ -0,0 +1,38 @@
+"""Тесты декодирования значений по типам колонок (typed=True)"""
+from datetime import datetime
+
+import pytest
+
+MOMENT = datetime(2024, 3, 1, 12, 30)
+
+
+@pytest.fixture
+def events(db):
+    db.makeRequest("CREATE TABLE events (id INTEGER PRIMARY KEY, "
+                   "name TEXT, done BOOLEAN, at DATETIME, score REAL)")
+    db.insertMany("events", [
+        {"id": 1, "name": "iso", "done": 1, "at": str(MOMENT),
+         "score": 1.5},
+        {"id": 2, "name": "unix", "done": 0,
+         "at": int(MOMENT.timestamp()), "score": None},
+        {"id": 3, "name": "null", "done": None, "at": None, "score": 2},
+    ])
+    return db
+
+
+def test_typed_lookups(events):
+    rows = events.getRowsbyValues("events", typed=True, name="iso")
+    assert rows == [{"id": 1, "name": "iso", "done": True, "at": MOMENT,
+                     "score": 1.5}]
+    row = events.getRowByValue("unix", "events", typed=True)
+    assert row["done"] is False and row["at"] == MOMENT
+    rows = events.getRowsByIds([1, 2, 3], "events", typed=True)
+    assert rows[3]["done"] is None and rows[3]["at"] is None
+    assert rows[3]["score"] == 2
+
+
+def test_raw_by_default(events):
+    row = events.getRowByValues("events", id=1)
+    assert row["done"] == 1 and row["at"] == str(MOMENT)
+    assert events.getRowsByIds([2], "events")[2]["at"] == \
+        int(MOMENT.timestamp())
@@ -0,0 +1,48 @@
+"""Тесты очереди записи с групповой фиксацией"""
+import pytest
+
+from test_pool import run_threads
+
+THREADS = 4
+WRITES = 25
+
+
+def test_queue_batches_writes_from_threads(db):
+    write_queue = db.startWriteQueue(max_delay=0.01)
+
+    def write(n):
+        return lambda: [db.insertObject("items", True, name=f"q{n}-{i}")
+                        for i in range(WRITES)]
+
+    assert run_threads([write(n) for n in range(THREADS)]) == []
+    db.stopWriteQueue()
+    info = write_queue.info()
+    assert info["operations"] == THREADS * WRITES
+    assert info["pending"] == 0
+    assert db.makeRequest("SELECT COUNT(*) FROM items") == \
+        [(THREADS * WRITES,)]
+
+
+def test_queue_error_fails_only_its_operation(db):
+    write_queue = db.startWriteQueue(max_delay=0.05)
+    good = write_queue.insertObject("items", name="good")
+    bad = write_queue.insertObject("missing_table", name="bad")
+    id_ = good.result(5)
+    with pytest.raises(Exception):
+        bad.result(5)
+    db.deleteById("items", id_)
+    db.stopWriteQueue()
+    assert db.makeRequest("SELECT COUNT(*) FROM items") == [(0,)]
+    with pytest.raises(RuntimeError):
+        write_queue.insertObject("items", name="late")
+
+
+def test_queue_bypassed_inside_transaction(db):
+    db.startWriteQueue()
+    try:
+        with db.transaction():
+            id_ = db.insertObject("items", True, name="direct")
+            assert db.getIDbyValue("direct", "items") == id_
+        assert db._writeQueue.info()["operations"] == 0
+    finally:
+        db.stopWriteQueue()